@@ -1,12 +1,16 @@
+import asyncio
+import copy
 import json
 import logging
 import os
 import shutil
 import base64
 
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
 from pathlib import Path
-from typing import Generic, Optional, TypeVar
+from typing import Any, Generic, Optional, TypeVar
 from urllib.parse import urlparse
 
 import requests
@@ -14,6 +18,7 @@ from pydantic import BaseModel
 from sqlalchemy import JSON, Column, DateTime, Integer, func
 
 from open_webui.env import (
+    CONFIG_SYNC_INTERVAL,
     DATA_DIR,
     DATABASE_URL,
     ENV,
@@ -79,12 +84,13 @@ def load_json_config():
 
 def save_to_db(data):
     with get_db() as db:
-        existing_config = db.query(Config).first()
+        existing_config = db.query(Config).order_by(Config.id.desc()).first()
         if not existing_config:
-            new_config = Config(data=data, version=0)
+            new_config = Config(data=data, version=1)
             db.add(new_config)
         else:
             existing_config.data = data
+            existing_config.version = (existing_config.version or 0) + 1
             existing_config.updated_at = datetime.now()
             db.add(existing_config)
         db.commit()
@@ -155,45 +161,175 @@ DEFAULT_CONFIG = {
 }
 
 
-def get_config():
+def get_config_entry() -> tuple[dict, int]:
     with get_db() as db:
         config_entry = db.query(Config).order_by(Config.id.desc()).first()
-        return config_entry.data if config_entry else DEFAULT_CONFIG
+        if config_entry:
+            return config_entry.data, config_entry.version or 0
+        return DEFAULT_CONFIG, 0
+
 
+def get_config():
+    return get_config_entry()[0]
 
-CONFIG_DATA = get_config()
+
+def get_config_version() -> int:
+    with get_db() as db:
+        version = db.query(Config.version).order_by(Config.id.desc()).limit(1).scalar()
+        return version or 0
 
 
-def get_config_value(config_path: str):
+CONFIG_DATA, CONFIG_VERSION = get_config_entry()
+
+
+def get_config_value(config_path: str, config: Optional[dict] = None):
     path_parts = config_path.split(".")
-    cur_config = CONFIG_DATA
+    cur_config = CONFIG_DATA if config is None else config
     for key in path_parts:
-        if key in cur_config:
+        if isinstance(cur_config, dict) and key in cur_config:
             cur_config = cur_config[key]
         else:
             return None
     return cur_config
 
 
+def set_config_value(config: dict, path_parts: tuple[str, ...], value: Any):
+    sub_config = config
+    for key in path_parts[:-1]:
+        if not isinstance(sub_config.get(key), dict):
+            sub_config[key] = {}
+        sub_config = sub_config[key]
+    sub_config[path_parts[-1]] = value
+
+
+def get_config_changes(
+    old: dict, new: dict, path_parts: tuple[str, ...] = ()
+) -> dict[tuple[str, ...], Any]:
+    """Return the values of `new` that differ from `old`, keyed by their path."""
+    changes = {}
+    for key, value in new.items():
+        if isinstance(value, dict) and isinstance(old.get(key), dict):
+            changes.update(get_config_changes(old[key], value, (*path_parts, key)))
+        elif key not in old or old[key] != value:
+            changes[(*path_parts, key)] = value
+    return changes
+
+
 PERSISTENT_CONFIG_REGISTRY = []
 
 
-def save_config(config):
-    global CONFIG_DATA
-    global PERSISTENT_CONFIG_REGISTRY
-    try:
-        save_to_db(config)
-        CONFIG_DATA = config
+def apply_config(config: dict, version: int):
+    """Make `config` the current config, reloading only the entries whose value changed."""
+    global CONFIG_DATA, CONFIG_VERSION
+
+    previous_config = CONFIG_DATA
+    CONFIG_DATA, CONFIG_VERSION = config, version
 
-        # Trigger updates on all registered PersistentConfig entries
-        for config_item in PERSISTENT_CONFIG_REGISTRY:
+    for config_item in PERSISTENT_CONFIG_REGISTRY:
+        if get_config_value(config_item.config_path, previous_config) != (
+            get_config_value(config_item.config_path, config)
+        ):
             config_item.update()
+
+
+def save_config_values(values: dict[tuple[str, ...], Any]):
+    """
+    Write `values` (path -> value) on top of the latest stored config in a
+    single transaction and bump its version, so changes made by other
+    instances in the meantime are kept rather than overwritten.
+    """
+    with get_db() as db:
+        config_entry = (
+            db.query(Config).order_by(Config.id.desc()).with_for_update().first()
+        )
+        config = copy.deepcopy(config_entry.data if config_entry else DEFAULT_CONFIG)
+
+        for path_parts, value in values.items():
+            set_config_value(config, path_parts, value)
+
+        if config_entry:
+            config_entry.data = config
+            config_entry.version = (config_entry.version or 0) + 1
+            config_entry.updated_at = datetime.now()
+        else:
+            config_entry = Config(data=config, version=1)
+            db.add(config_entry)
+
+        db.commit()
+        version = config_entry.version
+
+    apply_config(config, version)
+
+
+def save_config(config):
+    try:
+        changes = get_config_changes(CONFIG_DATA, config)
+        if changes:
+            log.info(
+                f"Importing config changes: {['.'.join(path) for path in changes]}"
+            )
+            save_config_values(changes)
     except Exception as e:
         log.exception(e)
         return False
     return True
 
 
+def get_config_overrides() -> dict:
+    """The stored config, limited to entries that differ from their env default."""
+    config = {}
+    for config_item in PERSISTENT_CONFIG_REGISTRY:
+        value = get_config_value(config_item.config_path)
+        if value is not None and value != config_item.env_value:
+            set_config_value(config, tuple(config_item.config_path.split(".")), value)
+    return config
+
+
+def sync_config() -> bool:
+    """Reload the config if another instance changed it, returns True if it did."""
+    if get_config_version() == CONFIG_VERSION:
+        return False
+
+    config, version = get_config_entry()
+    log.info(f"Config changed (version {CONFIG_VERSION} -> {version}), reloading")
+    apply_config(config, version)
+    return True
+
+
+async def periodic_config_sync():
+    # Polling the version is a single indexed integer read, only a changed
+    # version loads the config itself
+    while True:
+        await asyncio.sleep(CONFIG_SYNC_INTERVAL)
+        try:
+            await asyncio.to_thread(sync_config)
+        except Exception as e:
+            log.exception(f"Error syncing config: {e}")
+
+
+# Pending saves of the current request, see `config_batch`
+_config_batch: ContextVar[Optional[dict[tuple[str, ...], Any]]] = ContextVar(
+    "config_batch", default=None
+)
+
+
+@contextmanager
+def config_batch():
+    """Collect `PersistentConfig` saves and write them all at once on exit."""
+    if _config_batch.get() is not None:
+        yield
+        return
+
+    batch = {}
+    token = _config_batch.set(batch)
+    try:
+        yield
+    finally:
+        _config_batch.reset(token)
+        if batch:
+            save_config_values(batch)
+
+
 T = TypeVar("T")
 
 
@@ -234,15 +370,14 @@ class PersistentConfig(Generic[T]):
             log.info(f"Updated {self.env_name} to new value {self.value}")
 
     def save(self):
-        log.info(f"Saving '{self.env_name}' to the database")
-        path_parts = self.config_path.split(".")
-        sub_config = CONFIG_DATA
-        for key in path_parts[:-1]:
-            if key not in sub_config:
-                sub_config[key] = {}
-            sub_config = sub_config[key]
-        sub_config[path_parts[-1]] = self.value
-        save_to_db(CONFIG_DATA)
+        path_parts = tuple(self.config_path.split("."))
+
+        batch = _config_batch.get()
+        if batch is not None:
+            batch[path_parts] = self.value
+        else:
+            log.info(f"Saving '{self.env_name}' to the database")
+            save_config_values({path_parts: self.value})
         self.config_value = self.value
 
 
@@ -1558,6 +1693,16 @@ Ensure that the tools are effectively utilized to achieve the highest-quality an
 
 VECTOR_DB = os.environ.get("VECTOR_DB", "chroma")
 
+# Quantized codes ("int8" or "binary") for the first pass of vector searches,
+# the top candidates are re-scored with the full-precision vectors
+VECTOR_DB_QUANTIZATION = os.environ.get("VECTOR_DB_QUANTIZATION", "").lower()
+if VECTOR_DB_QUANTIZATION not in ["", "int8", "binary"]:
+    VECTOR_DB_QUANTIZATION = ""
+# Candidates re-scored per result
+VECTOR_DB_QUANTIZATION_OVERSAMPLING = float(
+    os.environ.get("VECTOR_DB_QUANTIZATION_OVERSAMPLING", "4")
+)
+
 # Chroma
 CHROMA_DATA_PATH = f"{DATA_DIR}/vector_db"
 
@@ -1620,6 +1765,36 @@ if VECTOR_DB == "pgvector" and not PGVECTOR_DB_URL.startswith("postgres"):
 PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH = int(
     os.environ.get("PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH", "1536")
 )
+# Connections kept open for vector queries, the other DATABASE_POOL_* settings also apply
+PGVECTOR_POOL_SIZE = int(os.environ.get("PGVECTOR_POOL_SIZE", "10"))
+# One of hnsw or ivfflat, changes to an existing index are applied by a reindex
+PGVECTOR_INDEX_TYPE = os.environ.get("PGVECTOR_INDEX_TYPE", "hnsw").lower()
+if PGVECTOR_INDEX_TYPE not in ["hnsw", "ivfflat"]:
+    PGVECTOR_INDEX_TYPE = "hnsw"
+PGVECTOR_HNSW_M = int(os.environ.get("PGVECTOR_HNSW_M", "16"))
+PGVECTOR_HNSW_EF_CONSTRUCTION = int(
+    os.environ.get("PGVECTOR_HNSW_EF_CONSTRUCTION", "64")
+)
+PGVECTOR_HNSW_EF_SEARCH = int(os.environ.get("PGVECTOR_HNSW_EF_SEARCH", "40"))
+# Only applies when the document_chunk table is created
+PGVECTOR_PARTITION_BY_COLLECTION = (
+    os.environ.get("PGVECTOR_PARTITION_BY_COLLECTION", "False").lower() == "true"
+)
+
+# Local
+LOCAL_VECTOR_DB_PATH = os.environ.get(
+    "LOCAL_VECTOR_DB_PATH", f"{DATA_DIR}/vector_db/local"
+)
+# One of float32, float16 or int8, applies to newly created collections
+LOCAL_VECTOR_DB_DTYPE = os.environ.get("LOCAL_VECTOR_DB_DTYPE", "float32").lower()
+if LOCAL_VECTOR_DB_DTYPE not in ["float32", "float16", "int8"]:
+    LOCAL_VECTOR_DB_DTYPE = "float32"
+# Collections with at least this many vectors get an IVF index when compacted
+LOCAL_VECTOR_DB_ANN_THRESHOLD = int(
+    os.environ.get("LOCAL_VECTOR_DB_ANN_THRESHOLD", "50000")
+)
+LOCAL_VECTOR_DB_ANN_NPROBE = int(os.environ.get("LOCAL_VECTOR_DB_ANN_NPROBE", "32"))
+LOCAL_VECTOR_DB_MAX_SEGMENTS = int(os.environ.get("LOCAL_VECTOR_DB_MAX_SEGMENTS", "16"))
 
 ####################################
 # Information Retrieval (RAG)
@@ -1705,6 +1880,20 @@ ENABLE_RAG_HYBRID_SEARCH = PersistentConfig(
     os.environ.get("ENABLE_RAG_HYBRID_SEARCH", "").lower() == "true",
 )
 
+# Persistent keyword index used by hybrid search
+BM25_INDEX_PATH = os.environ.get("BM25_INDEX_PATH", f"{DATA_DIR}/bm25_index.db")
+
+# Embedding cache shared by all embedding engines, 0 entries disables it
+EMBEDDING_CACHE_PATH = os.environ.get(
+    "EMBEDDING_CACHE_PATH", f"{DATA_DIR}/embedding_cache.db"
+)
+RAG_EMBEDDING_CACHE_MAX_ENTRIES = int(
+    os.environ.get("RAG_EMBEDDING_CACHE_MAX_ENTRIES", "200000")
+)
+RAG_EMBEDDING_CACHE_MEMORY_ENTRIES = int(
+    os.environ.get("RAG_EMBEDDING_CACHE_MEMORY_ENTRIES", "10000")
+)
+
 RAG_FULL_CONTEXT = PersistentConfig(
     "RAG_FULL_CONTEXT",
     "rag.full_context",
@@ -1774,6 +1963,20 @@ RAG_EMBEDDING_BATCH_SIZE = PersistentConfig(
     ),
 )
 
+# Number of embedding batches sent to Ollama/OpenAI at the same time
+RAG_EMBEDDING_CONCURRENCY = int(os.environ.get("RAG_EMBEDDING_CONCURRENCY", "4"))
+
+# Number of collections searched at the same time for one retrieval
+RAG_QUERY_CONCURRENCY = int(os.environ.get("RAG_QUERY_CONCURRENCY", "8"))
+
+# Retries (with exponential backoff) for embedding requests failing with 429/5xx
+RAG_EMBEDDING_MAX_RETRIES = int(os.environ.get("RAG_EMBEDDING_MAX_RETRIES", "3"))
+
+# Seconds before an embedding request to Ollama/OpenAI is given up (and retried)
+RAG_EMBEDDING_REQUEST_TIMEOUT = int(
+    os.environ.get("RAG_EMBEDDING_REQUEST_TIMEOUT", "60")
+)
+
 RAG_RERANKING_MODEL = PersistentConfig(
     "RAG_RERANKING_MODEL",
     "rag.reranking_model",
@@ -2065,6 +2268,37 @@ RAG_WEB_SEARCH_CONCURRENT_REQUESTS = PersistentConfig(
     int(os.getenv("RAG_WEB_SEARCH_CONCURRENT_REQUESTS", "10")),
 )
 
+# Cache of fetched web pages, bounded by the size of their extracted text (0 disables)
+WEB_FETCH_CACHE_PATH = os.environ.get(
+    "WEB_FETCH_CACHE_PATH", f"{CACHE_DIR}/web_fetch_cache.db"
+)
+RAG_WEB_FETCH_CACHE_MAX_SIZE = int(
+    os.environ.get("RAG_WEB_FETCH_CACHE_MAX_SIZE", str(256 * 1024 * 1024))
+)
+# Freshness lifetime in seconds for pages that don't send caching headers
+RAG_WEB_FETCH_CACHE_DEFAULT_TTL = int(
+    os.environ.get("RAG_WEB_FETCH_CACHE_DEFAULT_TTL", "3600")
+)
+
+# Overall time budget in seconds for searching and fetching all queries of a web search
+RAG_WEB_SEARCH_TIMEOUT = float(os.environ.get("RAG_WEB_SEARCH_TIMEOUT", "30"))
+
+# Web search collections are reused for identical queries within the TTL (0 disables),
+# and deleted once unused for the retention period or beyond the most recent max collections
+WEB_SEARCH_CACHE_PATH = os.environ.get(
+    "WEB_SEARCH_CACHE_PATH", f"{DATA_DIR}/web_search_cache.db"
+)
+RAG_WEB_SEARCH_CACHE_TTL = int(os.environ.get("RAG_WEB_SEARCH_CACHE_TTL", "3600"))
+RAG_WEB_SEARCH_CACHE_RETENTION = int(
+    os.environ.get("RAG_WEB_SEARCH_CACHE_RETENTION", str(7 * 24 * 60 * 60))
+)
+RAG_WEB_SEARCH_CACHE_MAX_COLLECTIONS = int(
+    os.environ.get("RAG_WEB_SEARCH_CACHE_MAX_COLLECTIONS", "1000")
+)
+RAG_WEB_SEARCH_CACHE_SWEEP_INTERVAL = int(
+    os.environ.get("RAG_WEB_SEARCH_CACHE_SWEEP_INTERVAL", "600")
+)
+
 RAG_WEB_LOADER_ENGINE = PersistentConfig(
     "RAG_WEB_LOADER_ENGINE",
     "rag.web.loader.engine",
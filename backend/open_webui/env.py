@@ -326,6 +326,21 @@ ENABLE_REALTIME_CHAT_SAVE = (
     os.environ.get("ENABLE_REALTIME_CHAT_SAVE", "False").lower() == "true"
 )
 
+# Maximum time (in seconds) a streamed message update may stay buffered before it is saved
+REALTIME_CHAT_SAVE_INTERVAL = os.environ.get("REALTIME_CHAT_SAVE_INTERVAL", "1")
+
+try:
+    REALTIME_CHAT_SAVE_INTERVAL = float(REALTIME_CHAT_SAVE_INTERVAL)
+except Exception:
+    REALTIME_CHAT_SAVE_INTERVAL = 1.0
+
+REALTIME_CHAT_SAVE_MAX_PENDING = os.environ.get("REALTIME_CHAT_SAVE_MAX_PENDING", "100")
+
+try:
+    REALTIME_CHAT_SAVE_MAX_PENDING = int(REALTIME_CHAT_SAVE_MAX_PENDING)
+except Exception:
+    REALTIME_CHAT_SAVE_MAX_PENDING = 100
+
 ####################################
 # REDIS
 ####################################
@@ -387,6 +402,13 @@ WEBSOCKET_MANAGER = os.environ.get("WEBSOCKET_MANAGER", "")
 WEBSOCKET_REDIS_URL = os.environ.get("WEBSOCKET_REDIS_URL", REDIS_URL)
 WEBSOCKET_REDIS_LOCK_TIMEOUT = os.environ.get("WEBSOCKET_REDIS_LOCK_TIMEOUT", 60)
 
+try:
+    WEBSOCKET_USER_POOL_CACHE_TTL = float(
+        os.environ.get("WEBSOCKET_USER_POOL_CACHE_TTL", "1")
+    )
+except Exception:
+    WEBSOCKET_USER_POOL_CACHE_TTL = 1.0
+
 AIOHTTP_CLIENT_TIMEOUT = os.environ.get("AIOHTTP_CLIENT_TIMEOUT", "")
 
 if AIOHTTP_CLIENT_TIMEOUT == "":
@@ -411,6 +433,99 @@ else:
     except Exception:
         AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST = 5
 
+# Shared connection pool used for upstream (LLM provider, pipelines) requests
+try:
+    AIOHTTP_CLIENT_POOL_SIZE = int(os.environ.get("AIOHTTP_CLIENT_POOL_SIZE", "500"))
+except Exception:
+    AIOHTTP_CLIENT_POOL_SIZE = 500
+
+try:
+    AIOHTTP_CLIENT_POOL_SIZE_PER_HOST = int(
+        os.environ.get("AIOHTTP_CLIENT_POOL_SIZE_PER_HOST", "100")
+    )
+except Exception:
+    AIOHTTP_CLIENT_POOL_SIZE_PER_HOST = 100
+
+try:
+    AIOHTTP_CLIENT_DNS_CACHE_TTL = int(
+        os.environ.get("AIOHTTP_CLIENT_DNS_CACHE_TTL", "300")
+    )
+except Exception:
+    AIOHTTP_CLIENT_DNS_CACHE_TTL = 300
+
+try:
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = float(
+        os.environ.get("AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT", "60")
+    )
+except Exception:
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = 60.0
+
+# Seconds the model id -> (owner, access control) map may be served from memory
+try:
+    MODEL_ACCESS_CACHE_TTL = float(os.environ.get("MODEL_ACCESS_CACHE_TTL", "3"))
+except Exception:
+    MODEL_ACCESS_CACHE_TTL = 3.0
+
+# Seconds between checks for config changes made by other instances, 0 disables
+try:
+    CONFIG_SYNC_INTERVAL = float(os.environ.get("CONFIG_SYNC_INTERVAL", "5"))
+except Exception:
+    CONFIG_SYNC_INTERVAL = 5.0
+
+# Seconds between checks for functions and tools changed by other instances, 0 disables
+# the checks and preloading active functions and tools at startup
+try:
+    PLUGIN_SYNC_INTERVAL = float(os.environ.get("PLUGIN_SYNC_INTERVAL", "5"))
+except Exception:
+    PLUGIN_SYNC_INTERVAL = 5.0
+
+# Seconds filter state (active, global, valves) may be served from memory before it is
+# read again, independently of PLUGIN_SYNC_INTERVAL, 0 reads it on every request
+try:
+    FILTER_CACHE_TTL = float(os.environ.get("FILTER_CACHE_TTL", "5"))
+except Exception:
+    FILTER_CACHE_TTL = 5.0
+
+# Seconds an authenticated user may be served from cache, 0 disables caching
+try:
+    USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", "5"))
+except Exception:
+    USER_CACHE_TTL = 5.0
+
+# Share the user cache (and its invalidations) between instances through Redis
+USER_CACHE_REDIS_URL = os.environ.get("USER_CACHE_REDIS_URL", "")
+
+# Seconds between bulk writes of users' last active timestamps
+try:
+    USER_LAST_ACTIVE_UPDATE_INTERVAL = float(
+        os.environ.get("USER_LAST_ACTIVE_UPDATE_INTERVAL", "30")
+    )
+except Exception:
+    USER_LAST_ACTIVE_UPDATE_INTERVAL = 30.0
+
+####################################
+# OLLAMA LOAD BALANCING
+####################################
+
+# One of: random, least_outstanding, ewma, affinity
+OLLAMA_LOAD_BALANCING_STRATEGY = os.environ.get(
+    "OLLAMA_LOAD_BALANCING_STRATEGY", "least_outstanding"
+)
+
+try:
+    OLLAMA_CIRCUIT_BREAKER_THRESHOLD = int(
+        os.environ.get("OLLAMA_CIRCUIT_BREAKER_THRESHOLD", "3")
+    )
+except Exception:
+    OLLAMA_CIRCUIT_BREAKER_THRESHOLD = 3
+
+try:
+    OLLAMA_CIRCUIT_BREAKER_COOLDOWN = float(
+        os.environ.get("OLLAMA_CIRCUIT_BREAKER_COOLDOWN", "30")
+    )
+except Exception:
+    OLLAMA_CIRCUIT_BREAKER_COOLDOWN = 30.0
+
 
 ####################################
 # OFFLINE_MODE
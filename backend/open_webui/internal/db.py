@@ -75,26 +75,26 @@ def handle_peewee_migration(DATABASE_URL):
 handle_peewee_migration(DATABASE_URL)
 
 
-SQLALCHEMY_DATABASE_URL = DATABASE_URL
-if "sqlite" in SQLALCHEMY_DATABASE_URL:
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-    )
-else:
-    if DATABASE_POOL_SIZE > 0:
-        engine = create_engine(
-            SQLALCHEMY_DATABASE_URL,
-            pool_size=DATABASE_POOL_SIZE,
+def create_database_engine(url: str, pool_size: int = DATABASE_POOL_SIZE):
+    """Engine for `url` using the DATABASE_POOL_* settings, a pool size of 0 disables pooling."""
+    if "sqlite" in url:
+        return create_engine(url, connect_args={"check_same_thread": False})
+
+    if pool_size > 0:
+        return create_engine(
+            url,
+            pool_size=pool_size,
             max_overflow=DATABASE_POOL_MAX_OVERFLOW,
             pool_timeout=DATABASE_POOL_TIMEOUT,
             pool_recycle=DATABASE_POOL_RECYCLE,
             pool_pre_ping=True,
             poolclass=QueuePool,
         )
-    else:
-        engine = create_engine(
-            SQLALCHEMY_DATABASE_URL, pool_pre_ping=True, poolclass=NullPool
-        )
+    return create_engine(url, pool_pre_ping=True, poolclass=NullPool)
+
+
+SQLALCHEMY_DATABASE_URL = DATABASE_URL
+engine = create_database_engine(SQLALCHEMY_DATABASE_URL)
 
 
 SessionLocal = sessionmaker(
@@ -90,6 +90,7 @@ from open_webui.internal.db import Session
 from open_webui.models.functions import Functions
 from open_webui.models.models import Models
 from open_webui.models.users import UserModel, Users
+from open_webui.models.groups import group_membership_cache
 
 from open_webui.config import (
     LICENSE_KEY,
@@ -311,15 +312,20 @@ from open_webui.config import (
     QUERY_GENERATION_PROMPT_TEMPLATE,
     AUTOCOMPLETE_GENERATION_PROMPT_TEMPLATE,
     AUTOCOMPLETE_GENERATION_INPUT_MAX_LENGTH,
+    RAG_WEB_SEARCH_CACHE_SWEEP_INTERVAL,
     AppConfig,
+    config_batch,
+    periodic_config_sync,
     reset_config,
 )
 from open_webui.env import (
     AUDIT_EXCLUDED_PATHS,
     AUDIT_LOG_LEVEL,
     CHANGELOG,
+    CONFIG_SYNC_INTERVAL,
     GLOBAL_LOG_LEVEL,
     MAX_BODY_LOG_SIZE,
+    PLUGIN_SYNC_INTERVAL,
     SAFE_MODE,
     SRC_LOG_LEVELS,
     VERSION,
@@ -333,6 +339,7 @@ from open_webui.env import (
     BYPASS_MODEL_ACCESS_CONTROL,
     RESET_CONFIG_ON_START,
     OFFLINE_MODE,
+    ENABLE_REALTIME_CHAT_SAVE,
 )
 
 
@@ -347,6 +354,11 @@ from open_webui.utils.chat import (
     chat_action as chat_action_handler,
 )
 from open_webui.utils.middleware import process_chat_payload, process_chat_response
+from open_webui.utils.chat_buffer import ChatMessages
+from open_webui.utils.user_activity import LastActive
+from open_webui.utils.http_client import HTTP_CLIENT_POOL
+from open_webui.utils.plugin import FUNCTIONS, TOOLS, periodic_plugin_sync
+from open_webui.retrieval.web.search_cache import periodic_web_search_cache_sweep
 from open_webui.utils.access_control import has_access
 
 from open_webui.utils.auth import (
@@ -412,8 +424,30 @@ async def lifespan(app: FastAPI):
         get_license_data(app, LICENSE_KEY)
 
     asyncio.create_task(periodic_usage_pool_cleanup())
+
+    if CONFIG_SYNC_INTERVAL > 0:
+        asyncio.create_task(periodic_config_sync())
+
+    if PLUGIN_SYNC_INTERVAL > 0:
+        asyncio.create_task(periodic_plugin_sync())
+
+    if RAG_WEB_SEARCH_CACHE_SWEEP_INTERVAL > 0:
+        asyncio.create_task(periodic_web_search_cache_sweep())
+
+    await HTTP_CLIENT_POOL.start()
+    LastActive.start()
+
+    if ENABLE_REALTIME_CHAT_SAVE:
+        ChatMessages.start()
+
     yield
 
+    if ENABLE_REALTIME_CHAT_SAVE:
+        await ChatMessages.stop()
+
+    await LastActive.stop()
+    await HTTP_CLIENT_POOL.close()
+
 
 app = FastAPI(
     docs_url="/docs" if ENV == "dev" else None,
@@ -530,8 +564,8 @@ app.state.AUTH_TRUSTED_EMAIL_HEADER = WEBUI_AUTH_TRUSTED_EMAIL_HEADER
 app.state.AUTH_TRUSTED_NAME_HEADER = WEBUI_AUTH_TRUSTED_NAME_HEADER
 
 app.state.USER_COUNT = None
-app.state.TOOLS = {}
-app.state.FUNCTIONS = {}
+app.state.TOOLS = TOOLS
+app.state.FUNCTIONS = FUNCTIONS
 
 ########################################
 #
@@ -824,6 +858,22 @@ app.add_middleware(RedirectMiddleware)
 app.add_middleware(SecurityHeadersMiddleware)
 
 
+@app.middleware("http")
+async def cache_group_memberships(request: Request, call_next):
+    # Access checks for every model/knowledge/tool in a listing resolve the
+    # user's groups once per request instead of once per item.
+    with group_membership_cache():
+        return await call_next(request)
+
+
+@app.middleware("http")
+async def batch_config_saves(request: Request, call_next):
+    # Config fields set while handling a request (e.g. a settings form) are
+    # written to the database together once the handler returns.
+    with config_batch():
+        return await call_next(request)
+
+
 @app.middleware("http")
 async def commit_session_after_request(request: Request, call_next):
     response = await call_next(request)
@@ -931,6 +981,8 @@ if audit_level != AuditLevel.NONE:
 @app.get("/api/models")
 async def get_models(request: Request, user=Depends(get_verified_user)):
     def get_filtered_models(models, user):
+        readable_model_ids = Models.get_readable_model_ids(user.id)
+
         filtered_models = []
         for model in models:
             if model.get("arena"):
@@ -944,12 +996,8 @@ async def get_models(request: Request, user=Depends(get_verified_user)):
                     filtered_models.append(model)
                 continue
 
-            model_info = Models.get_model_by_id(model["id"])
-            if model_info:
-                if user.id == model_info.user_id or has_access(
-                    user.id, type="read", access_control=model_info.access_control
-                ):
-                    filtered_models.append(model)
+            if model["id"] in readable_model_ids:
+                filtered_models.append(model)
 
         return filtered_models
 
@@ -1127,6 +1175,11 @@ async def list_tasks_endpoint(user=Depends(get_verified_user)):
     return {"tasks": list_tasks()}  # Use the function from tasks.py
 
 
+@app.get("/api/http/pool")
+async def get_http_pool_stats(user=Depends(get_admin_user)):
+    return HTTP_CLIENT_POOL.get_stats()
+
+
 ##################################
 #
 # Config Endpoints
@@ -0,0 +1,46 @@
+"""Add function and tool content_hash columns
+
+Revision ID: 2f8d6c4a1e93
+Revises: 7c3e9a51b2d4
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "2f8d6c4a1e93"
+down_revision = "7c3e9a51b2d4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Loaded plugin modules are invalidated by comparing content hashes
+    conn = op.get_bind()
+    for table_name in ["function", "tool"]:
+        op.add_column(table_name, sa.Column("content_hash", sa.String(), nullable=True))
+
+        table = sa.table(
+            table_name,
+            sa.column("id", sa.String()),
+            sa.column("content", sa.Text()),
+            sa.column("content_hash", sa.String()),
+        )
+        for id, content in conn.execute(
+            sa.select(table.c.id, table.c.content)
+        ).fetchall():
+            conn.execute(
+                table.update()
+                .where(table.c.id == id)
+                .values(
+                    content_hash=hashlib.sha256((content or "").encode()).hexdigest()
+                )
+            )
+
+
+def downgrade():
+    op.drop_column("tool", "content_hash")
+    op.drop_column("function", "content_hash")
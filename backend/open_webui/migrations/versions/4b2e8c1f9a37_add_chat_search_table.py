@@ -0,0 +1,178 @@
+"""Add chat_search table
+
+Revision ID: 4b2e8c1f9a37
+Revises: 9b1c2d7e4f60
+Create Date: 2026-10-16 07:00:00.000000
+
+"""
+
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "4b2e8c1f9a37"
+down_revision = "9b1c2d7e4f60"
+branch_labels = None
+depends_on = None
+
+SEARCH_CONTENT_MAX_LENGTH = 500_000
+
+
+def get_search_content(chat: dict, message_rows: dict) -> str:
+    messages = {
+        **{
+            message.get("id", idx): message
+            for idx, message in enumerate(chat.get("messages", []))
+        },
+        **(chat.get("history", {}).get("messages", {}) or {}),
+        **message_rows,
+    }
+
+    contents = [message.get("content") for message in messages.values()]
+    return "\n".join(content for content in contents if isinstance(content, str))[
+        :SEARCH_CONTENT_MAX_LENGTH
+    ]
+
+
+def upgrade():
+    # Text mirror of every chat's title and message contents, indexed with
+    # FTS5 on SQLite and a GIN-indexed tsvector on PostgreSQL.
+    op.create_table(
+        "chat_search",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("chat_id", sa.Text(), nullable=False, unique=True),
+        sa.Column("user_id", sa.Text(), nullable=False),
+        sa.Column("title", sa.Text(), nullable=True),
+        sa.Column("content", sa.Text(), nullable=True),
+    )
+    op.create_index("chat_search_user_id_idx", "chat_search", ["user_id"])
+
+    conn = op.get_bind()
+    if conn.dialect.name == "sqlite":
+        op.execute(
+            """
+            CREATE VIRTUAL TABLE chat_fts USING fts5(
+                title,
+                content,
+                content='chat_search',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER chat_search_ai AFTER INSERT ON chat_search BEGIN
+                INSERT INTO chat_fts (rowid, title, content)
+                VALUES (new.id, new.title, new.content);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER chat_search_ad AFTER DELETE ON chat_search BEGIN
+                INSERT INTO chat_fts (chat_fts, rowid, title, content)
+                VALUES ('delete', old.id, old.title, old.content);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER chat_search_au AFTER UPDATE ON chat_search BEGIN
+                INSERT INTO chat_fts (chat_fts, rowid, title, content)
+                VALUES ('delete', old.id, old.title, old.content);
+                INSERT INTO chat_fts (rowid, title, content)
+                VALUES (new.id, new.title, new.content);
+            END
+            """
+        )
+    elif conn.dialect.name == "postgresql":
+        op.execute(
+            """
+            ALTER TABLE chat_search ADD COLUMN document tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(content, '')), 'B')
+            ) STORED
+            """
+        )
+        op.execute(
+            "CREATE INDEX chat_search_document_idx ON chat_search USING GIN (document)"
+        )
+
+    chat_table = sa.table(
+        "chat",
+        sa.column("id", sa.Text()),
+        sa.column("user_id", sa.Text()),
+        sa.column("title", sa.Text()),
+        sa.column("chat", sa.JSON()),
+    )
+    chat_message_table = sa.table(
+        "chat_message",
+        sa.column("chat_id", sa.Text()),
+        sa.column("id", sa.Text()),
+        sa.column("message", sa.JSON()),
+        sa.column("updated_at", sa.BigInteger()),
+    )
+    chat_search_table = sa.table(
+        "chat_search",
+        sa.column("chat_id", sa.Text()),
+        sa.column("user_id", sa.Text()),
+        sa.column("title", sa.Text()),
+        sa.column("content", sa.Text()),
+    )
+
+    message_rows = {}
+    for chat_id, message_id, message in conn.execute(
+        sa.select(
+            chat_message_table.c.chat_id,
+            chat_message_table.c.id,
+            chat_message_table.c.message,
+        ).order_by(chat_message_table.c.updated_at)
+    ):
+        if isinstance(message, str):
+            message = json.loads(message)
+        message_rows.setdefault(chat_id, {})[message_id] = message or {}
+
+    rows = []
+    for chat_id, user_id, title, chat in conn.execute(
+        sa.select(
+            chat_table.c.id,
+            chat_table.c.user_id,
+            chat_table.c.title,
+            chat_table.c.chat,
+        ).where(sa.not_(chat_table.c.user_id.like("shared-%")))
+    ):
+        if isinstance(chat, str):
+            chat = json.loads(chat)
+        rows.append(
+            {
+                "chat_id": chat_id,
+                "user_id": user_id,
+                "title": title,
+                "content": get_search_content(
+                    chat or {}, message_rows.get(chat_id, {})
+                ),
+            }
+        )
+
+        if len(rows) >= 1000:
+            op.bulk_insert(chat_search_table, rows)
+            rows = []
+
+    if rows:
+        op.bulk_insert(chat_search_table, rows)
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS chat_search_ai")
+        op.execute("DROP TRIGGER IF EXISTS chat_search_ad")
+        op.execute("DROP TRIGGER IF EXISTS chat_search_au")
+        op.execute("DROP TABLE IF EXISTS chat_fts")
+
+    op.drop_index("chat_search_user_id_idx", table_name="chat_search")
+    op.drop_table("chat_search")
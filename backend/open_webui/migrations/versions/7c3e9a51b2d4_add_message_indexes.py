@@ -0,0 +1,36 @@
+"""Add message indexes
+
+Revision ID: 7c3e9a51b2d4
+Revises: e5a7c3b9d812
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+
+from alembic import op
+
+revision = "7c3e9a51b2d4"
+down_revision = "e5a7c3b9d812"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Channel pages and threads are read newest first by (created_at, id),
+    # replies and reactions are aggregated by their parent message.
+    op.create_index(
+        "message_channel_id_parent_id_created_at_idx",
+        "message",
+        ["channel_id", "parent_id", "created_at", "id"],
+    )
+    op.create_index(
+        "message_parent_id_created_at_idx", "message", ["parent_id", "created_at"]
+    )
+    op.create_index(
+        "message_reaction_message_id_idx", "message_reaction", ["message_id"]
+    )
+
+
+def downgrade():
+    op.drop_index("message_reaction_message_id_idx", table_name="message_reaction")
+    op.drop_index("message_parent_id_created_at_idx", table_name="message")
+    op.drop_index("message_channel_id_parent_id_created_at_idx", table_name="message")
@@ -0,0 +1,58 @@
+"""Add group_member table
+
+Revision ID: 9b1c2d7e4f60
+Revises: d31026856c01
+Create Date: 2026-10-16 05:00:00.000000
+
+"""
+
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "9b1c2d7e4f60"
+down_revision = "d31026856c01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Membership index mirroring `group.user_ids`, so groups can be looked up
+    # by member without scanning and casting every group's JSON column.
+    op.create_table(
+        "group_member",
+        sa.Column("group_id", sa.Text(), nullable=False),
+        sa.Column("user_id", sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint("group_id", "user_id"),
+    )
+    op.create_index("group_member_user_id_idx", "group_member", ["user_id"])
+
+    conn = op.get_bind()
+    group_table = sa.table(
+        "group",
+        sa.column("id", sa.Text()),
+        sa.column("user_ids", sa.JSON()),
+    )
+    group_member_table = sa.table(
+        "group_member",
+        sa.column("group_id", sa.Text()),
+        sa.column("user_id", sa.Text()),
+    )
+
+    rows = []
+    for group_id, user_ids in conn.execute(
+        sa.select(group_table.c.id, group_table.c.user_ids)
+    ):
+        if isinstance(user_ids, str):
+            user_ids = json.loads(user_ids)
+        for user_id in set(user_ids or []):
+            rows.append({"group_id": group_id, "user_id": user_id})
+
+    if rows:
+        op.bulk_insert(group_member_table, rows)
+
+
+def downgrade():
+    op.drop_index("group_member_user_id_idx", table_name="group_member")
+    op.drop_table("group_member")
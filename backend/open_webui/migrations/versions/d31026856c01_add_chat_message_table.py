@@ -0,0 +1,33 @@
+"""Add chat_message table
+
+Revision ID: d31026856c01
+Revises: 3781e22d8b01
+Create Date: 2026-10-16 03:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "d31026856c01"
+down_revision = "3781e22d8b01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Per-message storage for chats; rows take precedence over the messages
+    # embedded in `chat.chat` and are folded back into it on full chat updates.
+    op.create_table(
+        "chat_message",
+        sa.Column("chat_id", sa.Text(), nullable=False),
+        sa.Column("id", sa.Text(), nullable=False),
+        sa.Column("message", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("chat_id", "id"),
+    )
+
+
+def downgrade():
+    op.drop_table("chat_message")
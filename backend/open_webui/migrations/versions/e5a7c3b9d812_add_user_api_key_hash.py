@@ -0,0 +1,49 @@
+"""Add user api_key_hash column
+
+Revision ID: e5a7c3b9d812
+Revises: 4b2e8c1f9a37
+Create Date: 2026-10-16 08:00:00.000000
+
+"""
+
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "e5a7c3b9d812"
+down_revision = "4b2e8c1f9a37"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # API keys are looked up by their sha256 digest
+    op.add_column("user", sa.Column("api_key_hash", sa.String(), nullable=True))
+    op.create_index("user_api_key_hash_idx", "user", ["api_key_hash"], unique=True)
+
+    conn = op.get_bind()
+    user_table = sa.table(
+        "user",
+        sa.column("id", sa.String()),
+        sa.column("api_key", sa.String()),
+        sa.column("api_key_hash", sa.String()),
+    )
+
+    users = conn.execute(
+        sa.select(user_table.c.id, user_table.c.api_key).where(
+            user_table.c.api_key.isnot(None)
+        )
+    ).fetchall()
+
+    for id, api_key in users:
+        conn.execute(
+            user_table.update()
+            .where(user_table.c.id == id)
+            .values(api_key_hash=hashlib.sha256(api_key.encode()).hexdigest())
+        )
+
+
+def downgrade():
+    op.drop_index("user_api_key_hash_idx", table_name="user")
+    op.drop_column("user", "api_key_hash")
@@ -1,5 +1,6 @@
 import logging
 import json
+import re
 import time
 import uuid
 from typing import Optional
@@ -9,9 +10,20 @@ from open_webui.models.tags import TagModel, Tag, Tags
 from open_webui.env import SRC_LOG_LEVELS
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    Float,
+    Integer,
+    String,
+    Text,
+    JSON,
+    PrimaryKeyConstraint,
+)
 from sqlalchemy import or_, func, select, and_, text
 from sqlalchemy.sql import exists
+from sqlalchemy.exc import IntegrityError
 
 ####################
 # Chat DB Schema
@@ -40,6 +52,51 @@ class Chat(Base):
     folder_id = Column(Text, nullable=True)
 
 
+class ChatMessage(Base):
+    __tablename__ = "chat_message"
+
+    chat_id = Column(Text)
+    id = Column(Text)
+
+    message = Column(JSON)
+
+    created_at = Column(BigInteger)  # time_ns
+    updated_at = Column(BigInteger)  # time_ns
+
+    __table_args__ = (PrimaryKeyConstraint("chat_id", "id"),)
+
+
+class ChatSearch(Base):
+    __tablename__ = "chat_search"
+
+    # Full-text index over `title` and `content`: an FTS5 table kept in sync by
+    # triggers on SQLite, a generated `document` tsvector column on PostgreSQL
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chat_id = Column(Text, unique=True)
+    user_id = Column(Text)
+
+    title = Column(Text)
+    content = Column(Text)
+
+
+SEARCH_CONTENT_MAX_LENGTH = 500_000  # tsvector values are capped at 1MB
+
+
+def get_chat_search_content(chat: dict) -> str:
+    messages = {
+        **{
+            message.get("id", idx): message
+            for idx, message in enumerate(chat.get("messages", []))
+        },
+        **(chat.get("history", {}).get("messages", {}) or {}),
+    }
+
+    contents = [message.get("content") for message in messages.values()]
+    return "\n".join(content for content in contents if isinstance(content, str))[
+        :SEARCH_CONTENT_MAX_LENGTH
+    ]
+
+
 class ChatModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -105,6 +162,82 @@ class ChatTitleIdResponse(BaseModel):
 
 
 class ChatTable:
+    ####################
+    # Messages are stored per row in `chat_message` once they have been updated
+    # individually; rows override the copy embedded in `chat.chat` and are
+    # folded back into it (and deleted) whenever the whole chat is updated.
+    ####################
+
+    def _merge_message_rows(self, chat: dict, rows: list[ChatMessage]) -> dict:
+        history = chat.get("history", {})
+        messages = {
+            **history.get("messages", {}),
+            **{row.id: row.message for row in rows},
+        }
+
+        # Only follow rows continuing the current branch (e.g. a streamed reply),
+        # an update to an older message must not switch the branch shown
+        current_id = history.get("currentId")
+        children = {row.message.get("parentId"): row.id for row in rows}
+        while current_id in children:
+            current_id = children.pop(current_id)
+
+        return {
+            **chat,
+            "history": {
+                **history,
+                "messages": messages,
+                "currentId": current_id,
+            },
+        }
+
+    def _to_chat_models(self, db, chats: list[Chat]) -> list[ChatModel]:
+        """Validate chats with their full history, loading message rows in one query."""
+        rows_by_chat_id = {}
+
+        chat_ids = [chat.id for chat in chats]
+        if chat_ids:
+            rows = (
+                db.query(ChatMessage)
+                .filter(ChatMessage.chat_id.in_(chat_ids))
+                .order_by(ChatMessage.updated_at)
+                .all()
+            )
+            for row in rows:
+                rows_by_chat_id.setdefault(row.chat_id, []).append(row)
+
+        chat_models = []
+        for chat in chats:
+            chat_model = ChatModel.model_validate(chat)
+            if chat.id in rows_by_chat_id:
+                chat_model.chat = self._merge_message_rows(
+                    chat_model.chat, rows_by_chat_id[chat.id]
+                )
+            chat_models.append(chat_model)
+
+        return chat_models
+
+    def _to_chat_model(self, db, chat: Chat) -> ChatModel:
+        return self._to_chat_models(db, [chat])[0]
+
+    def _update_search_index(self, db, chat: Chat):
+        """Refresh the chat's `chat_search` row, must be called before committing."""
+        content = get_chat_search_content(self._to_chat_model(db, chat).chat)
+
+        chat_search = db.query(ChatSearch).filter_by(chat_id=chat.id).first()
+        if chat_search:
+            chat_search.title = chat.title
+            chat_search.content = content
+        else:
+            db.add(
+                ChatSearch(
+                    chat_id=chat.id,
+                    user_id=chat.user_id,
+                    title=chat.title,
+                    content=content,
+                )
+            )
+
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
@@ -125,6 +258,7 @@ class ChatTable:
 
             result = Chat(**chat.model_dump())
             db.add(result)
+            self._update_search_index(db, result)
             db.commit()
             db.refresh(result)
             return ChatModel.model_validate(result) if result else None
@@ -154,6 +288,7 @@ class ChatTable:
 
             result = Chat(**chat.model_dump())
             db.add(result)
+            self._update_search_index(db, result)
             db.commit()
             db.refresh(result)
             return ChatModel.model_validate(result) if result else None
@@ -165,6 +300,10 @@ class ChatTable:
                 chat_item.chat = chat
                 chat_item.title = chat["title"] if "title" in chat else "New Chat"
                 chat_item.updated_at = int(time.time())
+
+                # The chat now holds the full history, drop the per-message rows
+                db.query(ChatMessage).filter_by(chat_id=id).delete()
+                self._update_search_index(db, chat_item)
                 db.commit()
                 db.refresh(chat_item)
 
@@ -219,52 +358,97 @@ class ChatTable:
     def get_message_by_id_and_message_id(
         self, id: str, message_id: str
     ) -> Optional[dict]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            message = db.get(ChatMessage, (id, message_id))
+            if message:
+                return message.message
+
+            # Fall back to the message embedded in the chat
+            chat = db.get(Chat, id)
+            if chat is None:
+                return None
 
-        return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
+            return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
+
+    def update_search_index_by_id(self, id: str):
+        with get_db() as db:
+            chat = db.get(Chat, id)
+            if chat is None:
+                return
+
+            self._update_search_index(db, chat)
+            db.commit()
 
     def upsert_message_to_chat_by_id_and_message_id(
-        self, id: str, message_id: str, message: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        self,
+        id: str,
+        message_id: str,
+        message: dict,
+        update_search_index: bool = True,
+    ) -> Optional[dict]:
+        """
+        Save a message update in its own row. Streamed partial updates pass
+        `update_search_index=False` since refreshing `chat_search` reads the
+        whole chat, it is refreshed once the message is complete.
+        """
+        try:
+            return self._upsert_message(id, message_id, message, update_search_index)
+        except IntegrityError:
+            # The row was inserted concurrently (e.g. a status event racing a
+            # buffered flush), it exists now so the update is merged into it
+            return self._upsert_message(id, message_id, message, update_search_index)
+
+    def _upsert_message(
+        self, id: str, message_id: str, message: dict, update_search_index: bool
+    ) -> Optional[dict]:
+        with get_db() as db:
+            now = time.time_ns()
 
-        chat = chat.chat
-        history = chat.get("history", {})
+            # Lock the row so concurrent read-merge-writes don't drop updates
+            chat_message = db.get(ChatMessage, (id, message_id), with_for_update=True)
+            if chat_message:
+                chat_message.message = {**chat_message.message, **message}
+                chat_message.updated_at = now
+            else:
+                chat = db.get(Chat, id)
+                if chat is None:
+                    return None
 
-        if message_id in history.get("messages", {}):
-            history["messages"][message_id] = {
-                **history["messages"][message_id],
-                **message,
-            }
-        else:
-            history["messages"][message_id] = message
+                # Seed the row from the message embedded in the chat, if any
+                existing = (
+                    chat.chat.get("history", {}).get("messages", {}).get(message_id)
+                )
+                chat_message = ChatMessage(
+                    chat_id=id,
+                    id=message_id,
+                    message={**(existing or {}), **message},
+                    created_at=now,
+                    updated_at=now,
+                )
+                db.add(chat_message)
 
-        history["currentId"] = message_id
+            db.query(Chat).filter_by(id=id).update({"updated_at": int(time.time())})
 
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+            if update_search_index and "content" in message:
+                db.flush()
+                self._update_search_index(db, db.get(Chat, id))
+
+            db.commit()
+            return chat_message.message
 
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
+    ) -> Optional[dict]:
+        message = self.get_message_by_id_and_message_id(id, message_id)
+        if not message:
             return None
 
-        chat = chat.chat
-        history = chat.get("history", {})
-
-        if message_id in history.get("messages", {}):
-            status_history = history["messages"][message_id].get("statusHistory", [])
-            status_history.append(status)
-            history["messages"][message_id]["statusHistory"] = status_history
+        status_history = message.get("statusHistory", [])
+        status_history.append(status)
 
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+        return self.upsert_message_to_chat_by_id_and_message_id(
+            id, message_id, {"statusHistory": status_history}
+        )
 
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
@@ -279,7 +463,7 @@ class ChatTable:
                     "id": str(uuid.uuid4()),
                     "user_id": f"shared-{chat_id}",
                     "title": chat.title,
-                    "chat": chat.chat,
+                    "chat": self._to_chat_model(db, chat).chat,
                     "created_at": chat.created_at,
                     "updated_at": int(time.time()),
                 }
@@ -310,7 +494,7 @@ class ChatTable:
                     return self.insert_shared_chat_by_chat_id(chat_id)
 
                 shared_chat.title = chat.title
-                shared_chat.chat = chat.chat
+                shared_chat.chat = self._to_chat_model(db, chat).chat
 
                 shared_chat.updated_at = int(time.time())
                 db.commit()
@@ -339,7 +523,7 @@ class ChatTable:
                 chat.share_id = share_id
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -351,7 +535,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -363,7 +547,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -387,7 +571,7 @@ class ChatTable:
                 # .limit(limit).offset(skip)
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chat_list_by_user_id(
         self,
@@ -409,7 +593,7 @@ class ChatTable:
                 query = query.limit(limit)
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chat_title_id_list_by_user_id(
         self,
@@ -460,13 +644,13 @@ class ChatTable:
                 .order_by(Chat.updated_at.desc())
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
                 chat = db.get(Chat, id)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -488,7 +672,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 chat = db.query(Chat).filter_by(id=id, user_id=user_id).first()
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -499,7 +683,7 @@ class ChatTable:
                 # .limit(limit).offset(skip)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -508,7 +692,7 @@ class ChatTable:
                 .filter_by(user_id=user_id)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -517,7 +701,7 @@ class ChatTable:
                 .filter_by(user_id=user_id, pinned=True, archived=False)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_archived_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -526,7 +710,7 @@ class ChatTable:
                 .filter_by(user_id=user_id, archived=True)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_user_id_and_search_text(
         self,
@@ -537,7 +721,8 @@ class ChatTable:
         limit: int = 60,
     ) -> list[ChatModel]:
         """
-        Filters chats based on a search query using Python, allowing pagination using skip and limit.
+        Searches chat titles and messages through the `chat_search` full-text index, ranking the
+        best matches first, with optional `tag:` filters and pagination using skip and limit.
         """
         search_text = search_text.lower().strip()
 
@@ -559,35 +744,56 @@ class ChatTable:
 
         search_text = " ".join(search_text_words)
 
+        # Every word is matched as a prefix so results update while typing
+        search_terms = re.findall(r"\w+", search_text)
+
         with get_db() as db:
             query = db.query(Chat).filter(Chat.user_id == user_id)
 
             if not include_archived:
                 query = query.filter(Chat.archived == False)
 
-            query = query.order_by(Chat.updated_at.desc())
-
-            # Check if the database dialect is either 'sqlite' or 'postgresql'
             dialect_name = db.bind.dialect.name
-            if dialect_name == "sqlite":
-                # SQLite case: using JSON1 extension for JSON searching
-                query = query.filter(
-                    (
-                        Chat.title.ilike(
-                            f"%{search_text}%"
-                        )  # Case-insensitive search in title
-                        | text(
-                            """
-                            EXISTS (
-                                SELECT 1 
-                                FROM json_each(Chat.chat, '$.messages') AS message 
-                                WHERE LOWER(message.value->>'content') LIKE '%' || :search_text || '%'
-                            )
-                            """
-                        )
-                    ).params(search_text=search_text)
+            if search_terms:
+                if dialect_name == "sqlite":
+                    search_query = " ".join(f'"{term}"*' for term in search_terms)
+                    matches = text(
+                        """
+                        SELECT chat_search.chat_id AS chat_id,
+                               bm25(chat_fts, 10.0, 1.0) AS rank
+                        FROM chat_fts
+                        JOIN chat_search ON chat_search.id = chat_fts.rowid
+                        WHERE chat_fts MATCH :search_query
+                          AND chat_search.user_id = :user_id
+                        """
+                    )
+                elif dialect_name == "postgresql":
+                    search_query = " & ".join(f"{term}:*" for term in search_terms)
+                    matches = text(
+                        """
+                        SELECT chat_id, -ts_rank(document, search_query) AS rank
+                        FROM chat_search,
+                             to_tsquery('simple', :search_query) AS search_query
+                        WHERE user_id = :user_id
+                          AND document @@ search_query
+                        """
+                    )
+                else:
+                    raise NotImplementedError(f"Unsupported dialect: {dialect_name}")
+
+                matches = (
+                    matches.bindparams(search_query=search_query, user_id=user_id)
+                    .columns(chat_id=Text, rank=Float)
+                    .subquery("matches")
                 )
 
+                # Best matches first, lower rank is better for both dialects
+                query = query.join(matches, matches.c.chat_id == Chat.id)
+                query = query.order_by(matches.c.rank, Chat.updated_at.desc())
+            else:
+                query = query.order_by(Chat.updated_at.desc())
+
+            if dialect_name == "sqlite":
                 # Check if there are any tags to filter, it should have all the tags
                 if "none" in tag_ids:
                     query = query.filter(
@@ -619,24 +825,6 @@ class ChatTable:
                     )
 
             elif dialect_name == "postgresql":
-                # PostgreSQL relies on proper JSON query for search
-                query = query.filter(
-                    (
-                        Chat.title.ilike(
-                            f"%{search_text}%"
-                        )  # Case-insensitive search in title
-                        | text(
-                            """
-                            EXISTS (
-                                SELECT 1
-                                FROM json_array_elements(Chat.chat->'messages') AS message
-                                WHERE LOWER(message->>'content') LIKE '%' || :search_text || '%'
-                            )
-                            """
-                        )
-                    ).params(search_text=search_text)
-                )
-
                 # Check if there are any tags to filter, it should have all the tags
                 if "none" in tag_ids:
                     query = query.filter(
@@ -677,7 +865,7 @@ class ChatTable:
             log.info(f"The number of chats: {len(all_chats)}")
 
             # Validate and return chats
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_folder_id_and_user_id(
         self, folder_id: str, user_id: str
@@ -690,7 +878,7 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_folder_ids_and_user_id(
         self, folder_ids: list[str], user_id: str
@@ -705,7 +893,7 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def update_chat_folder_id_by_id_and_user_id(
         self, id: str, user_id: str, folder_id: str
@@ -718,7 +906,7 @@ class ChatTable:
                 chat.pinned = False
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -757,7 +945,7 @@ class ChatTable:
 
             all_chats = query.all()
             log.debug(f"all_chats: {all_chats}")
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def add_chat_tag_by_id_and_user_id_and_tag_name(
         self, id: str, user_id: str, tag_name: str
@@ -778,7 +966,7 @@ class ChatTable:
 
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -854,6 +1042,8 @@ class ChatTable:
     def delete_chat_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
+                db.query(ChatMessage).filter_by(chat_id=id).delete()
+                db.query(ChatSearch).filter_by(chat_id=id).delete()
                 db.query(Chat).filter_by(id=id).delete()
                 db.commit()
 
@@ -864,7 +1054,9 @@ class ChatTable:
     def delete_chat_by_id_and_user_id(self, id: str, user_id: str) -> bool:
         try:
             with get_db() as db:
-                db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                if db.query(Chat).filter_by(id=id, user_id=user_id).delete():
+                    db.query(ChatMessage).filter_by(chat_id=id).delete()
+                    db.query(ChatSearch).filter_by(chat_id=id).delete()
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -876,6 +1068,12 @@ class ChatTable:
             with get_db() as db:
                 self.delete_shared_chats_by_user_id(user_id)
 
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(Chat.user_id == user_id)
+                    )
+                ).delete(synchronize_session=False)
+                db.query(ChatSearch).filter_by(user_id=user_id).delete()
                 db.query(Chat).filter_by(user_id=user_id).delete()
                 db.commit()
 
@@ -888,6 +1086,20 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(
+                            Chat.user_id == user_id, Chat.folder_id == folder_id
+                        )
+                    )
+                ).delete(synchronize_session=False)
+                db.query(ChatSearch).filter(
+                    ChatSearch.chat_id.in_(
+                        select(Chat.id).where(
+                            Chat.user_id == user_id, Chat.folder_id == folder_id
+                        )
+                    )
+                ).delete(synchronize_session=False)
                 db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
                 db.commit()
 
@@ -1,3 +1,4 @@
+import hashlib
 import logging
 import time
 from typing import Optional
@@ -16,6 +17,10 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 ####################
 
 
+def get_content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
 class Function(Base):
     __tablename__ = "function"
 
@@ -24,6 +29,7 @@ class Function(Base):
     name = Column(Text)
     type = Column(Text)
     content = Column(Text)
+    content_hash = Column(String)
     meta = Column(JSONField)
     valves = Column(JSONField)
     is_active = Column(Boolean)
@@ -80,7 +86,20 @@ class FunctionValves(BaseModel):
     valves: Optional[dict] = None
 
 
+class FunctionStateModel(BaseModel):
+    id: str
+    type: str
+    is_active: bool = False
+    is_global: bool = False
+    valves: dict = {}
+
+
 class FunctionsTable:
+    def __init__(self):
+        # Incremented on every write through this process, so state cached
+        # from this table (see utils/filter.py) is refreshed right away
+        self.version = 0
+
     def insert_new_function(
         self, user_id: str, type: str, form_data: FunctionForm
     ) -> Optional[FunctionModel]:
@@ -96,10 +115,14 @@ class FunctionsTable:
 
         try:
             with get_db() as db:
-                result = Function(**function.model_dump())
+                result = Function(
+                    **function.model_dump(),
+                    content_hash=get_content_hash(function.content),
+                )
                 db.add(result)
                 db.commit()
                 db.refresh(result)
+                self.version += 1
                 if result:
                     return FunctionModel.model_validate(result)
                 else:
@@ -129,6 +152,39 @@ class FunctionsTable:
                     for function in db.query(Function).all()
                 ]
 
+    def get_function_content_hashes(self, active_only=False) -> dict[str, str]:
+        with get_db() as db:
+            query = db.query(Function.id, Function.content_hash)
+            if active_only:
+                query = query.filter_by(is_active=True)
+            return {id: content_hash for id, content_hash in query.all()}
+
+    def get_function_states(
+        self, type: Optional[str] = None
+    ) -> list[FunctionStateModel]:
+        """Everything but the content of functions, a light query to poll."""
+        with get_db() as db:
+            query = db.query(
+                Function.id,
+                Function.type,
+                Function.is_active,
+                Function.is_global,
+                Function.valves,
+            )
+            if type:
+                query = query.filter_by(type=type)
+
+            return [
+                FunctionStateModel(
+                    id=id,
+                    type=type,
+                    is_active=bool(is_active),
+                    is_global=bool(is_global),
+                    valves=valves or {},
+                )
+                for id, type, is_active, is_global, valves in query.all()
+            ]
+
     def get_functions_by_type(
         self, type: str, active_only=False
     ) -> list[FunctionModel]:
@@ -183,6 +239,7 @@ class FunctionsTable:
                 function.updated_at = int(time.time())
                 db.commit()
                 db.refresh(function)
+                self.version += 1
                 return self.get_function_by_id(id)
             except Exception:
                 return None
@@ -191,7 +248,8 @@ class FunctionsTable:
         self, id: str, user_id: str
     ) -> Optional[dict]:
         try:
-            user = Users.get_user_by_id(user_id)
+            # Read for every filter on every chunk of a stream
+            user = Users.get_user_by_id_cached(user_id)
             user_settings = user.settings.model_dump() if user.settings else {}
 
             # Check if user has "functions" and "valves" settings
@@ -235,6 +293,12 @@ class FunctionsTable:
     def update_function_by_id(self, id: str, updated: dict) -> Optional[FunctionModel]:
         with get_db() as db:
             try:
+                if "content" in updated:
+                    updated = {
+                        **updated,
+                        "content_hash": get_content_hash(updated["content"]),
+                    }
+
                 db.query(Function).filter_by(id=id).update(
                     {
                         **updated,
@@ -242,6 +306,7 @@ class FunctionsTable:
                     }
                 )
                 db.commit()
+                self.version += 1
                 return self.get_function_by_id(id)
             except Exception:
                 return None
@@ -256,6 +321,7 @@ class FunctionsTable:
                     }
                 )
                 db.commit()
+                self.version += 1
                 return True
             except Exception:
                 return None
@@ -265,6 +331,7 @@ class FunctionsTable:
             try:
                 db.query(Function).filter_by(id=id).delete()
                 db.commit()
+                self.version += 1
 
                 return True
             except Exception:
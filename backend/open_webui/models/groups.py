@@ -1,6 +1,8 @@
 import json
 import logging
 import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from typing import Optional
 import uuid
 
@@ -11,7 +13,7 @@ from open_webui.models.files import FileMetadataResponse
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON, func
+from sqlalchemy import BigInteger, Column, Index, PrimaryKeyConstraint, Text, JSON
 
 
 log = logging.getLogger(__name__)
@@ -41,6 +43,18 @@ class Group(Base):
     updated_at = Column(BigInteger)
 
 
+class GroupMember(Base):
+    __tablename__ = "group_member"
+
+    group_id = Column(Text)
+    user_id = Column(Text)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("group_id", "user_id"),
+        Index("group_member_user_id_idx", "user_id"),
+    )
+
+
 class GroupModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: str
@@ -87,7 +101,38 @@ class GroupUpdateForm(GroupForm):
     user_ids: Optional[list[str]] = None
 
 
+# Memoized memberships for the duration of a request, see `group_membership_cache`
+_membership_cache: ContextVar[Optional[dict[str, list[GroupModel]]]] = ContextVar(
+    "group_membership_cache", default=None
+)
+
+
+@contextmanager
+def group_membership_cache():
+    token = _membership_cache.set({})
+    try:
+        yield
+    finally:
+        _membership_cache.reset(token)
+
+
+def _clear_membership_cache():
+    cache = _membership_cache.get()
+    if cache is not None:
+        cache.clear()
+
+
 class GroupTable:
+    def _set_members(self, db, group_id: str, user_ids: list[str]):
+        db.query(GroupMember).filter_by(group_id=group_id).delete()
+        db.add_all(
+            [
+                GroupMember(group_id=group_id, user_id=user_id)
+                for user_id in set(user_ids)
+            ]
+        )
+        _clear_membership_cache()
+
     def insert_new_group(
         self, user_id: str, form_data: GroupForm
     ) -> Optional[GroupModel]:
@@ -123,20 +168,24 @@ class GroupTable:
             ]
 
     def get_groups_by_member_id(self, user_id: str) -> list[GroupModel]:
+        cache = _membership_cache.get()
+        if cache is not None and user_id in cache:
+            return cache[user_id]
+
         with get_db() as db:
-            return [
+            groups = [
                 GroupModel.model_validate(group)
                 for group in db.query(Group)
-                .filter(
-                    func.json_array_length(Group.user_ids) > 0
-                )  # Ensure array exists
-                .filter(
-                    Group.user_ids.cast(String).like(f'%"{user_id}"%')
-                )  # String-based check
+                .join(GroupMember, GroupMember.group_id == Group.id)
+                .filter(GroupMember.user_id == user_id)
                 .order_by(Group.updated_at.desc())
                 .all()
             ]
 
+        if cache is not None:
+            cache[user_id] = groups
+        return groups
+
     def get_group_by_id(self, id: str) -> Optional[GroupModel]:
         try:
             with get_db() as db:
@@ -163,6 +212,8 @@ class GroupTable:
                         "updated_at": int(time.time()),
                     }
                 )
+                if form_data.user_ids is not None:
+                    self._set_members(db, id, form_data.user_ids)
                 db.commit()
                 return self.get_group_by_id(id=id)
         except Exception as e:
@@ -173,7 +224,9 @@ class GroupTable:
         try:
             with get_db() as db:
                 db.query(Group).filter_by(id=id).delete()
+                db.query(GroupMember).filter_by(group_id=id).delete()
                 db.commit()
+                _clear_membership_cache()
                 return True
         except Exception:
             return False
@@ -182,7 +235,9 @@ class GroupTable:
         with get_db() as db:
             try:
                 db.query(Group).delete()
+                db.query(GroupMember).delete()
                 db.commit()
+                _clear_membership_cache()
 
                 return True
             except Exception:
@@ -203,6 +258,9 @@ class GroupTable:
                     )
                     db.commit()
 
+                db.query(GroupMember).filter_by(user_id=user_id).delete()
+                db.commit()
+                _clear_membership_cache()
                 return True
             except Exception:
                 return False
@@ -8,7 +8,7 @@ from open_webui.models.tags import TagModel, Tag, Tags
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Boolean, Column, Index, String, Text, JSON
 from sqlalchemy import or_, func, select, and_, text
 from sqlalchemy.sql import exists
 
@@ -25,6 +25,8 @@ class MessageReaction(Base):
     name = Column(Text)
     created_at = Column(BigInteger)
 
+    __table_args__ = (Index("message_reaction_message_id_idx", "message_id"),)
+
 
 class MessageReactionModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -52,6 +54,17 @@ class Message(Base):
     created_at = Column(BigInteger)  # time_ns
     updated_at = Column(BigInteger)  # time_ns
 
+    __table_args__ = (
+        Index(
+            "message_channel_id_parent_id_created_at_idx",
+            "channel_id",
+            "parent_id",
+            "created_at",
+            "id",
+        ),
+        Index("message_parent_id_created_at_idx", "parent_id", "created_at"),
+    )
+
 
 class MessageModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -128,17 +141,50 @@ class MessageTable:
             if not message:
                 return None
 
-            reactions = self.get_reactions_by_message_id(id)
-            replies = self.get_replies_by_message_id(id)
-
-            return MessageResponse(
+            responses = self.get_message_responses(
+                [MessageModel.model_validate(message)]
+            )
+            return responses[0]
+
+    def get_message_responses(
+        self, messages: list[MessageModel], include_replies: bool = True
+    ) -> list[MessageResponse]:
+        """Add reply counts and reactions to messages with one aggregate query each."""
+        ids = [message.id for message in messages]
+        replies = self.get_reply_stats_by_message_ids(ids) if include_replies else {}
+        reactions = self.get_reactions_by_message_ids(ids)
+
+        return [
+            MessageResponse(
                 **{
-                    **MessageModel.model_validate(message).model_dump(),
-                    "latest_reply_at": replies[0].created_at if replies else None,
-                    "reply_count": len(replies),
-                    "reactions": reactions,
+                    **message.model_dump(),
+                    "latest_reply_at": replies.get(message.id, (0, None))[1],
+                    "reply_count": replies.get(message.id, (0, None))[0],
+                    "reactions": reactions.get(message.id, []),
                 }
             )
+            for message in messages
+        ]
+
+    def get_reply_stats_by_message_ids(
+        self, ids: list[str]
+    ) -> dict[str, tuple[int, int]]:
+        """Reply count and latest reply time by message id."""
+        if not ids:
+            return {}
+
+        with get_db() as db:
+            rows = (
+                db.query(
+                    Message.parent_id,
+                    func.count(Message.id),
+                    func.max(Message.created_at),
+                )
+                .filter(Message.parent_id.in_(ids))
+                .group_by(Message.parent_id)
+                .all()
+            )
+            return {parent_id: (count, latest) for parent_id, count, latest in rows}
 
     def get_replies_by_message_id(self, id: str) -> list[MessageModel]:
         with get_db() as db:
@@ -157,22 +203,54 @@ class MessageTable:
                 for message in db.query(Message).filter_by(parent_id=id).all()
             ]
 
+    def _paginate(self, db, query, skip: int, limit: int, before: Optional[str]):
+        """
+        Newest first, continuing after the `before` message id if given (keyset
+        pagination, unaffected by messages posted meanwhile) or else at `skip`.
+        """
+        query = query.order_by(Message.created_at.desc(), Message.id.desc())
+
+        if before:
+            cursor = db.get(Message, before)
+            if cursor:
+                query = query.filter(
+                    or_(
+                        Message.created_at < cursor.created_at,
+                        and_(
+                            Message.created_at == cursor.created_at,
+                            Message.id < cursor.id,
+                        ),
+                    )
+                )
+        elif skip:
+            query = query.offset(skip)
+
+        return query.limit(limit).all()
+
     def get_messages_by_channel_id(
-        self, channel_id: str, skip: int = 0, limit: int = 50
+        self,
+        channel_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        before: Optional[str] = None,
     ) -> list[MessageModel]:
         with get_db() as db:
-            all_messages = (
-                db.query(Message)
-                .filter_by(channel_id=channel_id, parent_id=None)
-                .order_by(Message.created_at.desc())
-                .offset(skip)
-                .limit(limit)
-                .all()
+            all_messages = self._paginate(
+                db,
+                db.query(Message).filter_by(channel_id=channel_id, parent_id=None),
+                skip,
+                limit,
+                before,
             )
             return [MessageModel.model_validate(message) for message in all_messages]
 
     def get_messages_by_parent_id(
-        self, channel_id: str, parent_id: str, skip: int = 0, limit: int = 50
+        self,
+        channel_id: str,
+        parent_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        before: Optional[str] = None,
     ) -> list[MessageModel]:
         with get_db() as db:
             message = db.get(Message, parent_id)
@@ -180,13 +258,12 @@ class MessageTable:
             if not message:
                 return []
 
-            all_messages = (
-                db.query(Message)
-                .filter_by(channel_id=channel_id, parent_id=parent_id)
-                .order_by(Message.created_at.desc())
-                .offset(skip)
-                .limit(limit)
-                .all()
+            all_messages = self._paginate(
+                db,
+                db.query(Message).filter_by(channel_id=channel_id, parent_id=parent_id),
+                skip,
+                limit,
+                before,
             )
 
             # If length of all_messages is less than limit, then add the parent message
@@ -243,6 +320,37 @@ class MessageTable:
 
             return [Reactions(**reaction) for reaction in reactions.values()]
 
+    def get_reactions_by_message_ids(
+        self, ids: list[str]
+    ) -> dict[str, list[Reactions]]:
+        if not ids:
+            return {}
+
+        with get_db() as db:
+            all_reactions = (
+                db.query(
+                    MessageReaction.message_id,
+                    MessageReaction.name,
+                    MessageReaction.user_id,
+                )
+                .filter(MessageReaction.message_id.in_(ids))
+                .order_by(MessageReaction.created_at)
+                .all()
+            )
+
+            reactions = {}
+            for message_id, name, user_id in all_reactions:
+                reaction = reactions.setdefault(message_id, {}).setdefault(
+                    name, {"name": name, "user_ids": [], "count": 0}
+                )
+                reaction["user_ids"].append(user_id)
+                reaction["count"] += 1
+
+            return {
+                message_id: [Reactions(**reaction) for reaction in names.values()]
+                for message_id, names in reactions.items()
+            }
+
     def remove_reaction_by_id_and_user_id_and_name(
         self, id: str, user_id: str, name: str
     ) -> bool:
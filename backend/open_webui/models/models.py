@@ -3,9 +3,10 @@ import time
 from typing import Optional
 
 from open_webui.internal.db import Base, JSONField, get_db
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, MODEL_ACCESS_CACHE_TTL
 
 from open_webui.models.users import Users, UserResponse
+from open_webui.models.groups import Groups
 
 
 from pydantic import BaseModel, ConfigDict
@@ -143,6 +144,51 @@ class ModelForm(BaseModel):
 
 
 class ModelsTable:
+    def __init__(self):
+        # model id -> (owner id, access control), refreshed every
+        # MODEL_ACCESS_CACHE_TTL seconds and dropped on local writes
+        self._access_map: Optional[dict[str, tuple[str, Optional[dict]]]] = None
+        self._access_map_expires_at = 0.0
+        # (user id, group ids) -> ids of the models that user can read, kept
+        # until the access map is refreshed
+        self._readable_model_ids: dict[tuple, set[str]] = {}
+
+    def _invalidate_access_cache(self):
+        self._access_map = None
+        self._readable_model_ids = {}
+
+    def get_model_access_map(self) -> dict[str, tuple[str, Optional[dict]]]:
+        now = time.monotonic()
+        if self._access_map is not None and now < self._access_map_expires_at:
+            return self._access_map
+
+        with get_db() as db:
+            access_map = {
+                id: (user_id, access_control)
+                for id, user_id, access_control in db.query(
+                    Model.id, Model.user_id, Model.access_control
+                ).all()
+            }
+
+        self._readable_model_ids = {}
+        self._access_map = access_map
+        self._access_map_expires_at = now + MODEL_ACCESS_CACHE_TTL
+        return access_map
+
+    def get_readable_model_ids(self, user_id: str) -> set[str]:
+        access_map = self.get_model_access_map()
+        group_ids = {group.id for group in Groups.get_groups_by_member_id(user_id)}
+
+        key = (user_id, tuple(sorted(group_ids)))
+        if key not in self._readable_model_ids:
+            self._readable_model_ids[key] = {
+                id
+                for id, (owner_id, access_control) in access_map.items()
+                if owner_id == user_id
+                or has_access(user_id, "read", access_control, group_ids)
+            }
+        return self._readable_model_ids[key]
+
     def insert_new_model(
         self, form_data: ModelForm, user_id: str
     ) -> Optional[ModelModel]:
@@ -160,6 +206,7 @@ class ModelsTable:
                 db.add(result)
                 db.commit()
                 db.refresh(result)
+                self._invalidate_access_cache()
 
                 if result:
                     return ModelModel.model_validate(result)
@@ -241,6 +288,7 @@ class ModelsTable:
                     .update(model.model_dump(exclude={"id"}))
                 )
                 db.commit()
+                self._invalidate_access_cache()
 
                 model = db.get(Model, id)
                 db.refresh(model)
@@ -254,6 +302,7 @@ class ModelsTable:
             with get_db() as db:
                 db.query(Model).filter_by(id=id).delete()
                 db.commit()
+                self._invalidate_access_cache()
 
                 return True
         except Exception:
@@ -264,6 +313,7 @@ class ModelsTable:
             with get_db() as db:
                 db.query(Model).delete()
                 db.commit()
+                self._invalidate_access_cache()
 
                 return True
         except Exception:
@@ -3,6 +3,7 @@ import time
 from typing import Optional
 
 from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.models.functions import get_content_hash
 from open_webui.models.users import Users, UserResponse
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
@@ -26,6 +27,7 @@ class Tool(Base):
     user_id = Column(String)
     name = Column(Text)
     content = Column(Text)
+    content_hash = Column(String)
     specs = Column(JSONField)
     meta = Column(JSONField)
     valves = Column(JSONField)
@@ -122,7 +124,9 @@ class ToolsTable:
             )
 
             try:
-                result = Tool(**tool.model_dump())
+                result = Tool(
+                    **tool.model_dump(), content_hash=get_content_hash(tool.content)
+                )
                 db.add(result)
                 db.commit()
                 db.refresh(result)
@@ -234,9 +238,22 @@ class ToolsTable:
             )
             return None
 
+    def get_tool_content_hashes(self) -> dict[str, str]:
+        with get_db() as db:
+            return {
+                id: content_hash
+                for id, content_hash in db.query(Tool.id, Tool.content_hash).all()
+            }
+
     def update_tool_by_id(self, id: str, updated: dict) -> Optional[ToolModel]:
         try:
             with get_db() as db:
+                if "content" in updated:
+                    updated = {
+                        **updated,
+                        "content_hash": get_content_hash(updated["content"]),
+                    }
+
                 db.query(Tool).filter_by(id=id).update(
                     {**updated, "updated_at": int(time.time())}
                 )
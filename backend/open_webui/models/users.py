@@ -1,7 +1,13 @@
+import hashlib
+import hmac
+import logging
 import time
 from typing import Optional
 
+import redis
+
 from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.env import SRC_LOG_LEVELS, USER_CACHE_REDIS_URL, USER_CACHE_TTL
 
 
 from open_webui.models.chats import Chats
@@ -9,7 +15,10 @@ from open_webui.models.groups import Groups
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text
+from sqlalchemy import BigInteger, Column, String, Text, bindparam, update
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 ####################
 # User DB Schema
@@ -30,6 +39,7 @@ class User(Base):
     created_at = Column(BigInteger)
 
     api_key = Column(String, nullable=True, unique=True)
+    api_key_hash = Column(String, nullable=True, unique=True)
     settings = Column(JSONField, nullable=True)
     info = Column(JSONField, nullable=True)
 
@@ -94,7 +104,75 @@ class UserUpdateForm(BaseModel):
     password: Optional[str] = None
 
 
+def get_api_key_hash(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+class UserCache:
+    """
+    Short-lived cache of serialized users, used to authenticate requests.
+
+    Entries expire after `ttl` seconds and are dropped as soon as the user is
+    changed through `UsersTable`. With a `redis_url` the cache lives in Redis
+    so all instances share it, and its invalidations.
+    """
+
+    def __init__(self, ttl: float, redis_url: str = ""):
+        self.ttl = ttl
+        self._local: dict[str, tuple[str, float]] = {}
+        self._redis = (
+            redis.Redis.from_url(redis_url, decode_responses=True)
+            if redis_url
+            else None
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.ttl:
+            return None
+
+        if self._redis:
+            try:
+                return self._redis.get(f"open-webui:user_cache:{key}")
+            except Exception as e:
+                log.warning(f"Unable to read user cache: {e}")
+                return None
+
+        value = self._local.get(key)
+        if value and value[1] > time.monotonic():
+            return value[0]
+        return None
+
+    def set(self, key: str, value: str):
+        if not self.ttl:
+            return
+
+        if self._redis:
+            try:
+                self._redis.set(
+                    f"open-webui:user_cache:{key}", value, px=int(self.ttl * 1000)
+                )
+            except Exception as e:
+                log.warning(f"Unable to write user cache: {e}")
+        else:
+            self._local[key] = (value, time.monotonic() + self.ttl)
+
+    def delete(self, key: str):
+        if self._redis:
+            try:
+                self._redis.delete(f"open-webui:user_cache:{key}")
+            except Exception as e:
+                log.warning(f"Unable to invalidate user cache: {e}")
+        else:
+            self._local.pop(key, None)
+
+
 class UsersTable:
+    def __init__(self):
+        self._cache = UserCache(USER_CACHE_TTL, USER_CACHE_REDIS_URL)
+
+    def _invalidate_cache(self, id: str):
+        self._cache.delete(f"id:{id}")
+
     def insert_new_user(
         self,
         id: str,
@@ -135,14 +213,38 @@ class UsersTable:
         except Exception:
             return None
 
+    def get_user_by_id_cached(self, id: str) -> Optional[UserModel]:
+        """Like `get_user_by_id`, but may serve the user from the short-lived cache."""
+        cached = self._cache.get(f"id:{id}")
+        if cached:
+            return UserModel.model_validate_json(cached)
+
+        user = self.get_user_by_id(id)
+        if user:
+            self._cache.set(f"id:{id}", user.model_dump_json())
+        return user
+
     def get_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
+        api_key_hash = get_api_key_hash(api_key)
+
+        # The key -> id mapping is never invalidated, so check the key still matches
+        user_id = self._cache.get(f"api_key:{api_key_hash}")
+        if user_id:
+            user = self.get_user_by_id_cached(user_id)
+            if user and user.api_key and hmac.compare_digest(user.api_key, api_key):
+                return user
+
         try:
             with get_db() as db:
-                user = db.query(User).filter_by(api_key=api_key).first()
-                return UserModel.model_validate(user)
+                user = db.query(User).filter_by(api_key_hash=api_key_hash).first()
+                user = UserModel.model_validate(user)
         except Exception:
             return None
 
+        self._cache.set(f"api_key:{api_key_hash}", user.id)
+        self._cache.set(f"id:{user.id}", user.model_dump_json())
+        return user
+
     def get_user_by_email(self, email: str) -> Optional[UserModel]:
         try:
             with get_db() as db:
@@ -213,6 +315,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"role": role})
                 db.commit()
+                self._invalidate_cache(id)
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
         except Exception:
@@ -227,6 +330,7 @@ class UsersTable:
                     {"profile_image_url": profile_image_url}
                 )
                 db.commit()
+                self._invalidate_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -246,6 +350,24 @@ class UsersTable:
         except Exception:
             return None
 
+    def update_users_last_active(self, last_active: dict[str, int]):
+        """Bulk update `last_active_at` from a user id -> timestamp map."""
+        if not last_active:
+            return
+
+        with get_db() as db:
+            # Core executemany, users deleted in the meantime are simply skipped
+            db.execute(
+                update(User.__table__)
+                .where(User.__table__.c.id == bindparam("user_id"))
+                .values(last_active_at=bindparam("last_active_at")),
+                [
+                    {"user_id": id, "last_active_at": last_active_at}
+                    for id, last_active_at in last_active.items()
+                ],
+            )
+            db.commit()
+
     def update_user_oauth_sub_by_id(
         self, id: str, oauth_sub: str
     ) -> Optional[UserModel]:
@@ -253,6 +375,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"oauth_sub": oauth_sub})
                 db.commit()
+                self._invalidate_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -264,6 +387,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update(updated)
                 db.commit()
+                self._invalidate_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -283,6 +407,7 @@ class UsersTable:
 
                 db.query(User).filter_by(id=id).update({"settings": user_settings})
                 db.commit()
+                self._invalidate_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -301,6 +426,7 @@ class UsersTable:
                     # Delete User
                     db.query(User).filter_by(id=id).delete()
                     db.commit()
+                    self._invalidate_cache(id)
 
                 return True
             else:
@@ -311,8 +437,20 @@ class UsersTable:
     def update_user_api_key_by_id(self, id: str, api_key: str) -> str:
         try:
             with get_db() as db:
-                result = db.query(User).filter_by(id=id).update({"api_key": api_key})
+                result = (
+                    db.query(User)
+                    .filter_by(id=id)
+                    .update(
+                        {
+                            "api_key": api_key,
+                            "api_key_hash": (
+                                get_api_key_hash(api_key) if api_key else None
+                            ),
+                        }
+                    )
+                )
                 db.commit()
+                self._invalidate_cache(id)
                 return True if result == 1 else False
         except Exception:
             return False
@@ -0,0 +1,266 @@
+import json
+import logging
+import math
+import re
+import heapq
+from collections import Counter
+from typing import Optional
+
+from open_webui.retrieval.sqlite import connect
+from open_webui.retrieval.vector.main import GetResult, SearchResult
+from open_webui.config import BM25_INDEX_PATH
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def tokenize(text: str) -> list[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+class BM25Index:
+    """
+    Persistent inverted index used for the keyword half of hybrid search.
+
+    Each collection keeps its documents, per-term postings and length
+    statistics in a SQLite database, so documents can be added and removed
+    incrementally and queries only touch the postings of the query terms
+    instead of re-tokenizing the whole collection.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+
+        with connect(self.path) as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS collection (
+                    name TEXT PRIMARY KEY,
+                    doc_count INTEGER NOT NULL DEFAULT 0,
+                    total_length INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS document (
+                    collection TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    text TEXT,
+                    metadata TEXT,
+                    length INTEGER NOT NULL,
+                    PRIMARY KEY (collection, id)
+                );
+                CREATE TABLE IF NOT EXISTS posting (
+                    collection TEXT NOT NULL,
+                    term TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    tf INTEGER NOT NULL,
+                    PRIMARY KEY (collection, term, id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS posting_collection_id
+                    ON posting (collection, id);
+                """
+            )
+
+    def has_collection(self, collection_name: str) -> bool:
+        with connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT 1 FROM collection WHERE name = ?", (collection_name,)
+            ).fetchone()
+            return row is not None
+
+    def get_collection_names(self) -> list[str]:
+        with connect(self.path) as conn:
+            return [row[0] for row in conn.execute("SELECT name FROM collection")]
+
+    def _delete_ids(self, conn, collection_name: str, ids: list[str]):
+        removed_count = 0
+        removed_length = 0
+
+        for id in ids:
+            row = conn.execute(
+                "SELECT length FROM document WHERE collection = ? AND id = ?",
+                (collection_name, id),
+            ).fetchone()
+            if row is None:
+                continue
+
+            conn.execute(
+                "DELETE FROM posting WHERE collection = ? AND id = ?",
+                (collection_name, id),
+            )
+            conn.execute(
+                "DELETE FROM document WHERE collection = ? AND id = ?",
+                (collection_name, id),
+            )
+            removed_count += 1
+            removed_length += row[0]
+
+        if removed_count:
+            conn.execute(
+                "UPDATE collection SET doc_count = doc_count - ?, total_length = total_length - ? WHERE name = ?",
+                (removed_count, removed_length, collection_name),
+            )
+
+    def _upsert(self, conn, collection_name: str, items: list[dict]):
+        conn.execute(
+            "INSERT OR IGNORE INTO collection (name) VALUES (?)",
+            (collection_name,),
+        )
+        self._delete_ids(conn, collection_name, [item["id"] for item in items])
+
+        total_length = 0
+        for item in items:
+            terms = Counter(tokenize(item["text"]))
+            length = sum(terms.values())
+            total_length += length
+
+            conn.execute(
+                "INSERT INTO document (collection, id, text, metadata, length) VALUES (?, ?, ?, ?, ?)",
+                (
+                    collection_name,
+                    item["id"],
+                    item["text"],
+                    json.dumps(item.get("metadata")),
+                    length,
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO posting (collection, term, id, tf) VALUES (?, ?, ?, ?)",
+                [(collection_name, term, item["id"], tf) for term, tf in terms.items()],
+            )
+
+        conn.execute(
+            "UPDATE collection SET doc_count = doc_count + ?, total_length = total_length + ? WHERE name = ?",
+            (len(items), total_length, collection_name),
+        )
+
+    def upsert(self, collection_name: str, items: list[dict]):
+        """Add documents (dicts with `id`, `text` and `metadata`) to a collection."""
+        with connect(self.path) as conn:
+            self._upsert(conn, collection_name, items)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        """Delete documents by id or by exact metadata match."""
+        with connect(self.path) as conn:
+            if filter:
+                query = "SELECT id FROM document WHERE collection = ?"
+                params = [collection_name]
+                for key, value in filter.items():
+                    query += " AND json_extract(metadata, ?) = ?"
+                    params.extend([f'$."{key}"', value])
+
+                ids = [*(ids or []), *[row[0] for row in conn.execute(query, params)]]
+
+            if ids:
+                self._delete_ids(conn, collection_name, ids)
+
+    def _delete_collection(self, conn, collection_name: str):
+        for table, column in [
+            ("posting", "collection"),
+            ("document", "collection"),
+            ("collection", "name"),
+        ]:
+            conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (collection_name,))
+
+    def delete_collection(self, collection_name: str):
+        with connect(self.path) as conn:
+            self._delete_collection(conn, collection_name)
+
+    def reset(self):
+        with connect(self.path) as conn:
+            for table in ["posting", "document", "collection"]:
+                conn.execute(f"DELETE FROM {table}")
+
+    def search(
+        self, collection_name: str, query: str, limit: int
+    ) -> Optional[SearchResult]:
+        terms = set(tokenize(query))
+
+        with connect(self.path) as conn:
+            stats = conn.execute(
+                "SELECT doc_count, total_length FROM collection WHERE name = ?",
+                (collection_name,),
+            ).fetchone()
+            if stats is None:
+                return None
+
+            doc_count, total_length = stats
+            if not doc_count or not terms:
+                return SearchResult(
+                    ids=[[]], documents=[[]], metadatas=[[]], distances=[[]]
+                )
+
+            avg_length = total_length / doc_count
+
+            scores: dict[str, float] = {}
+            for term in terms:
+                postings = conn.execute(
+                    """
+                    SELECT posting.id, posting.tf, document.length
+                    FROM posting JOIN document
+                        ON document.collection = posting.collection
+                        AND document.id = posting.id
+                    WHERE posting.collection = ? AND posting.term = ?
+                    """,
+                    (collection_name, term),
+                ).fetchall()
+                if not postings:
+                    continue
+
+                df = len(postings)
+                idf = math.log((doc_count - df + 0.5) / (df + 0.5) + 1)
+
+                for id, tf, length in postings:
+                    scores[id] = scores.get(id, 0.0) + idf * (
+                        tf
+                        * (self.k1 + 1)
+                        / (tf + self.k1 * (1 - self.b + self.b * length / avg_length))
+                    )
+
+            top = heapq.nlargest(limit, scores.items(), key=lambda x: x[1])
+
+            ids, documents, metadatas, distances = [], [], [], []
+            for id, score in top:
+                text, metadata = conn.execute(
+                    "SELECT text, metadata FROM document WHERE collection = ? AND id = ?",
+                    (collection_name, id),
+                ).fetchone()
+                ids.append(id)
+                documents.append(text)
+                metadatas.append(json.loads(metadata) if metadata else {})
+                distances.append(score)
+
+            return SearchResult(
+                ids=[ids],
+                documents=[documents],
+                metadatas=[metadatas],
+                distances=[distances],
+            )
+
+    def rebuild(self, collection_name: str, result: Optional[GetResult]):
+        """Replace the index of a collection with the contents of a vector DB `get`."""
+        items = []
+        if result is not None and result.ids:
+            items = [
+                {
+                    "id": id,
+                    "text": result.documents[0][idx],
+                    "metadata": result.metadatas[0][idx],
+                }
+                for idx, id in enumerate(result.ids[0])
+            ]
+
+        # One transaction, so concurrent searches see the old index until the new one is complete
+        with connect(self.path) as conn:
+            self._delete_collection(conn, collection_name)
+            self._upsert(conn, collection_name, items)
+        log.info(f"Rebuilt BM25 index for {collection_name} ({len(items)} documents)")
+
+
+BM25_INDEX = BM25Index(BM25_INDEX_PATH)
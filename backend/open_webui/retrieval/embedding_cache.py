@@ -0,0 +1,188 @@
+import hashlib
+import logging
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Optional, Union
+
+from open_webui.retrieval.sqlite import connect
+from open_webui.config import (
+    EMBEDDING_CACHE_PATH,
+    RAG_EMBEDDING_CACHE_MAX_ENTRIES,
+    RAG_EMBEDDING_CACHE_MEMORY_ENTRIES,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of embeddings, keyed by (engine, model, text).
+
+    Lookups go through an in-memory LRU of `memory_entries` vectors first and
+    then through a SQLite table of at most `max_entries` float32 vectors,
+    evicted least recently used first. Only texts missing from both tiers are
+    sent to the embedding backend.
+    """
+
+    def __init__(self, path: str, max_entries: int, memory_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+
+        self._memory: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        with connect(self.path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedding (
+                    key TEXT PRIMARY KEY,
+                    vector BLOB NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS embedding_accessed_at ON embedding (accessed_at)"
+            )
+
+    @staticmethod
+    def get_key(engine: str, model: str, text: str) -> str:
+        return hashlib.sha256(f"{engine}\0{model}\0{text}".encode()).hexdigest()
+
+    def _remember(self, key: str, vector: list[float]):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get_many(self, keys: list[str]) -> list[Optional[list[float]]]:
+        vectors: list[Optional[list[float]]] = [None] * len(keys)
+
+        missing = {}
+        with self._lock:
+            for idx, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    vectors[idx] = self._memory[key]
+                    self._stats["memory_hits"] += 1
+                else:
+                    missing.setdefault(key, []).append(idx)
+
+        if not missing:
+            return vectors
+
+        found = {}
+        with connect(self.path) as conn:
+            unique_keys = list(missing.keys())
+            for i in range(0, len(unique_keys), 500):
+                chunk = unique_keys[i : i + 500]
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embedding WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE embedding SET accessed_at = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+
+        for key, idxs in missing.items():
+            if key in found:
+                self._remember(key, found[key])
+                for idx in idxs:
+                    vectors[idx] = found[key]
+                self._stats["disk_hits"] += len(idxs)
+            else:
+                self._stats["misses"] += len(idxs)
+
+        return vectors
+
+    def set_many(self, keys: list[str], vectors: list[list[float]]):
+        now = time.time()
+        for key, vector in zip(keys, vectors):
+            self._remember(key, vector)
+
+        with connect(self.path) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embedding (key, vector, accessed_at) VALUES (?, ?, ?)",
+                [
+                    (key, array("f", vector).tobytes(), now)
+                    for key, vector in zip(keys, vectors)
+                ],
+            )
+
+            (count,) = conn.execute("SELECT COUNT(*) FROM embedding").fetchone()
+            if count > self.max_entries:
+                # Evict a little extra so we don't evict on every insert
+                overflow = count - self.max_entries + self.max_entries // 10
+                conn.execute(
+                    "DELETE FROM embedding WHERE key IN (SELECT key FROM embedding ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+
+    def embed(
+        self,
+        engine: str,
+        model: str,
+        text: Union[str, list[str]],
+        func: Callable[[list[str]], Optional[list[list[float]]]],
+    ):
+        """Embed `text` with `func`, only passing it the texts not cached yet."""
+        texts = [text] if isinstance(text, str) else text
+        keys = [self.get_key(engine, model, t) for t in texts]
+        vectors = self.get_many(keys)
+
+        missing = {}
+        for idx, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[idx], []).append(idx)
+
+        if missing:
+            missing_keys = list(missing.keys())
+            embeddings = func([texts[missing[key][0]] for key in missing_keys])
+            if embeddings is None:
+                return None
+
+            embeddings = [
+                embedding.tolist() if hasattr(embedding, "tolist") else embedding
+                for embedding in embeddings
+            ]
+            self.set_many(missing_keys, embeddings)
+            for key, embedding in zip(missing_keys, embeddings):
+                for idx in missing[key]:
+                    vectors[idx] = embedding
+
+        return vectors[0] if isinstance(text, str) else vectors
+
+    def get_stats(self) -> dict:
+        lookups = sum(self._stats.values())
+        hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+        return {
+            **self._stats,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+
+EMBEDDING_CACHE = (
+    EmbeddingCache(
+        EMBEDDING_CACHE_PATH,
+        max_entries=RAG_EMBEDDING_CACHE_MAX_ENTRIES,
+        memory_entries=RAG_EMBEDDING_CACHE_MEMORY_ENTRIES,
+    )
+    if RAG_EMBEDDING_CACHE_MAX_ENTRIES > 0
+    else None
+)
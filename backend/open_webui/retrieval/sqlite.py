@@ -0,0 +1,18 @@
+import sqlite3
+from contextlib import contextmanager
+
+
+@contextmanager
+def connect(path: str):
+    """
+    Connection to a SQLite cache or index file in WAL mode, so readers in
+    other workers aren't blocked by a writer. The block runs in a transaction
+    that is committed on exit, or rolled back on an exception.
+    """
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            yield conn
+    finally:
+        conn.close()
@@ -1,20 +1,33 @@
 import logging
 import os
+import random
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Union
 
 import asyncio
 import requests
 import hashlib
+import heapq
+from requests.adapters import HTTPAdapter
 
 from huggingface_hub import snapshot_download
 from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
 
-from open_webui.config import VECTOR_DB
+from open_webui.config import (
+    VECTOR_DB,
+    RAG_EMBEDDING_CONCURRENCY,
+    RAG_EMBEDDING_MAX_RETRIES,
+    RAG_EMBEDDING_REQUEST_TIMEOUT,
+    RAG_QUERY_CONCURRENCY,
+)
 from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
+from open_webui.retrieval.bm25 import BM25_INDEX
+from open_webui.retrieval.embedding_cache import EMBEDDING_CACHE
+from open_webui.retrieval.web.search_cache import WEB_SEARCH_CACHE
 from open_webui.utils.misc import get_last_user_message, calculate_sha256_string
 
 from open_webui.models.users import UserModel
@@ -68,6 +81,47 @@ class VectorSearchRetriever(BaseRetriever):
         return results
 
 
+class BM25SearchRetriever(BaseRetriever):
+    collection_name: Any
+    top_k: int
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        result = BM25_INDEX.search(
+            collection_name=self.collection_name,
+            query=query,
+            limit=self.top_k,
+        )
+        if result is None:
+            return []
+
+        metadatas = result.metadatas[0]
+        documents = result.documents[0]
+
+        results = []
+        for idx in range(len(documents)):
+            results.append(
+                Document(
+                    metadata=metadatas[idx],
+                    page_content=documents[idx],
+                )
+            )
+        return results
+
+
+def rebuild_bm25_index(collection_name: str):
+    result = (
+        VECTOR_DB_CLIENT.get(collection_name=collection_name)
+        if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name)
+        else None
+    )
+    BM25_INDEX.rebuild(collection_name, result)
+
+
 def query_doc(
     collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
 ):
@@ -109,13 +163,15 @@ def query_doc_with_hybrid_search(
     r: float,
 ) -> dict:
     try:
-        result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+        # Collections ingested before the keyword index existed are indexed on
+        # first use; afterwards the index is kept in sync on insert/delete.
+        if not BM25_INDEX.has_collection(collection_name):
+            rebuild_bm25_index(collection_name)
 
-        bm25_retriever = BM25Retriever.from_texts(
-            texts=result.documents[0],
-            metadatas=result.metadatas[0],
+        bm25_retriever = BM25SearchRetriever(
+            collection_name=collection_name,
+            top_k=k,
         )
-        bm25_retriever.k = k
 
         vector_search_retriever = VectorSearchRetriever(
             collection_name=collection_name,
@@ -177,31 +233,34 @@ def merge_get_results(get_results: list[dict]) -> dict:
 def merge_and_sort_query_results(
     query_results: list[dict], k: int, reverse: bool = False
 ) -> dict:
-    # Initialize lists to store combined data
-    combined = []
-    seen_hashes = set()  # To store unique document hashes
+    # Keep the best distance of every unique document
+    combined = {}
 
     for data in query_results:
-        distances = data["distances"][0]
-        documents = data["documents"][0]
-        metadatas = data["metadatas"][0]
-
-        for distance, document, metadata in zip(distances, documents, metadatas):
-            if isinstance(document, str):
-                doc_hash = hashlib.md5(
-                    document.encode()
-                ).hexdigest()  # Compute a hash for uniqueness
-
-                if doc_hash not in seen_hashes:
-                    seen_hashes.add(doc_hash)
-                    combined.append((distance, document, metadata))
-
-    # Sort the list based on distances
-    combined.sort(key=lambda x: x[0], reverse=reverse)
+        # Batched searches return one list of matches per query vector
+        for distances, documents, metadatas in zip(
+            data["distances"], data["documents"], data["metadatas"]
+        ):
+            for distance, document, metadata in zip(distances, documents, metadatas):
+                if isinstance(document, str):
+                    doc_hash = hashlib.md5(
+                        document.encode()
+                    ).hexdigest()  # Compute a hash for uniqueness
+
+                    best = combined.get(doc_hash)
+                    if (
+                        best is None
+                        or (reverse and distance > best[0])
+                        or (not reverse and distance < best[0])
+                    ):
+                        combined[doc_hash] = (distance, document, metadata)
+
+    # Select the top k without sorting every match
+    select = heapq.nlargest if reverse else heapq.nsmallest
+    top = select(k, combined.values(), key=lambda x: x[0])
 
-    # Slice to keep only the top k elements
     sorted_distances, sorted_documents, sorted_metadatas = (
-        zip(*combined[:k]) if combined else ([], [], [])
+        zip(*top) if top else ([], [], [])
     )
 
     # Create and return the output dictionary
@@ -235,23 +294,55 @@ def query_collection(
     embedding_function,
     k: int,
 ) -> dict:
+    collection_names = [name for name in collection_names if name]
     results = []
-    for query in queries:
-        query_embedding = embedding_function(query)
-        for collection_name in collection_names:
-            if collection_name:
-                try:
-                    result = query_doc(
-                        collection_name=collection_name,
-                        k=k,
-                        query_embedding=query_embedding,
+
+    if collection_names and queries:
+        # Embed every query in one call and search each collection once with
+        # all of them, collections are searched concurrently.
+        try:
+            query_embeddings = embedding_function(queries)
+        except Exception as e:
+            log.exception(f"Error when embedding the queries: {e}")
+            query_embeddings = None
+
+        def search(collection_name):
+            try:
+                result = VECTOR_DB_CLIENT.search(
+                    collection_name=collection_name,
+                    vectors=query_embeddings,
+                    limit=k,
+                )
+                if result and len(result.ids) != len(query_embeddings):
+                    # The client answered fewer query vectors than it was
+                    # given, search them one at a time instead
+                    log.warning(
+                        f"Batched search of {collection_name} returned {len(result.ids)} rows "
+                        f"for {len(query_embeddings)} queries, searching them one by one"
                     )
-                    if result is not None:
-                        results.append(result.model_dump())
-                except Exception as e:
-                    log.exception(f"Error when querying the collection: {e}")
-            else:
-                pass
+                    return [
+                        VECTOR_DB_CLIENT.search(
+                            collection_name=collection_name,
+                            vectors=[query_embedding],
+                            limit=k,
+                        )
+                        for query_embedding in query_embeddings
+                    ]
+                if result:
+                    log.info(f"query_collection:result {result.ids} {result.metadatas}")
+                return [result]
+            except Exception as e:
+                log.exception(f"Error when querying the collection: {e}")
+                return []
+
+        if query_embeddings:
+            with ThreadPoolExecutor(
+                max_workers=min(RAG_QUERY_CONCURRENCY, len(collection_names))
+            ) as executor:
+                for collection_results in executor.map(search, collection_names):
+                    for result in collection_results:
+                        if result is not None:
+                            results.append(result.model_dump())
 
     if VECTOR_DB == "chroma":
         # Chroma uses unconventional cosine similarity, so we don't need to reverse the results
@@ -311,8 +402,11 @@ def get_embedding_function(
     embedding_batch_size,
 ):
     if embedding_engine == "":
-        return lambda query, user=None: embedding_function.encode(query).tolist()
+        engine = "sentence_transformers"
+        generate = lambda query, user=None: embedding_function.encode(query).tolist()
     elif embedding_engine in ["ollama", "openai"]:
+        # The same model name may be served differently by another endpoint
+        engine = f"{embedding_engine}:{url}"
         func = lambda query, user=None: generate_embeddings(
             engine=embedding_engine,
             model=embedding_model,
@@ -324,19 +418,43 @@ def get_embedding_function(
 
         def generate_multiple(query, user, func):
             if isinstance(query, list):
-                embeddings = []
-                for i in range(0, len(query), embedding_batch_size):
-                    embeddings.extend(
-                        func(query[i : i + embedding_batch_size], user=user)
+                batch_size = min(
+                    embedding_batch_size,
+                    EMBEDDING_BATCH_SIZE_LIMITS.get(
+                        (embedding_engine, url, embedding_model), embedding_batch_size
+                    ),
+                )
+                batches = [
+                    query[i : i + batch_size] for i in range(0, len(query), batch_size)
+                ]
+                if len(batches) <= 1:
+                    return func(query, user=user)
+
+                # Any failing batch raises here instead of leaving gaps
+                with ThreadPoolExecutor(
+                    max_workers=RAG_EMBEDDING_CONCURRENCY
+                ) as executor:
+                    results = executor.map(
+                        lambda batch: func(batch, user=user), batches
                     )
-                return embeddings
+                    return [embedding for result in results for embedding in result]
             else:
                 return func(query, user)
 
-        return lambda query, user=None: generate_multiple(query, user, func)
+        generate = lambda query, user=None: generate_multiple(query, user, func)
     else:
         raise ValueError(f"Unknown embedding engine: {embedding_engine}")
 
+    if EMBEDDING_CACHE is None:
+        return generate
+
+    return lambda query, user=None: EMBEDDING_CACHE.embed(
+        engine,
+        embedding_model,
+        query,
+        lambda texts: generate(texts, user=user),
+    )
+
 
 def get_sources_from_files(
     request,
@@ -441,6 +559,13 @@ def get_sources_from_files(
                 log.debug(f"skipping {file} as it has already been extracted")
                 continue
 
+            if file.get("type") == "web_search":
+                # Keep the collection from being swept while chats use it
+                try:
+                    WEB_SEARCH_CACHE.touch(list(collection_names))
+                except Exception as e:
+                    log.warning(f"Error updating the web search cache: {e}")
+
             if full_context:
                 try:
                     context = get_all_items_from_collections(collection_names)
@@ -548,75 +673,134 @@ def get_model_path(model: str, update_model: bool = False):
         return model
 
 
+# Shared keep-alive session for the (concurrent) embedding requests
+EMBEDDING_REQUEST_SESSION = requests.Session()
+EMBEDDING_REQUEST_SESSION.mount(
+    "http://", HTTPAdapter(pool_maxsize=max(RAG_EMBEDDING_CONCURRENCY, 10))
+)
+EMBEDDING_REQUEST_SESSION.mount(
+    "https://", HTTPAdapter(pool_maxsize=max(RAG_EMBEDDING_CONCURRENCY, 10))
+)
+
+# (engine, url, model) -> largest batch size the server accepted after a rejection
+EMBEDDING_BATCH_SIZE_LIMITS: dict[tuple, int] = {}
+
+
+def post_embedding_request(url: str, payload: dict, headers: dict) -> dict:
+    """POST to an embedding endpoint, retrying 429/5xx and connection errors."""
+    for attempt in range(RAG_EMBEDDING_MAX_RETRIES + 1):
+        retry_after = None
+        try:
+            r = EMBEDDING_REQUEST_SESSION.post(
+                url,
+                headers=headers,
+                json=payload,
+                timeout=RAG_EMBEDDING_REQUEST_TIMEOUT,
+            )
+            retry_after = r.headers.get("Retry-After")
+            r.raise_for_status()
+            return r.json()
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            retryable = not isinstance(e, requests.HTTPError) or (
+                e.response is not None
+                and (e.response.status_code == 429 or e.response.status_code >= 500)
+            )
+            if not retryable or attempt == RAG_EMBEDDING_MAX_RETRIES:
+                raise
+
+            try:
+                # Don't let a server hold the upload for longer than the backoff would
+                delay = min(max(float(retry_after), 0), 30)
+            except (TypeError, ValueError):
+                delay = min(0.5 * 2**attempt, 30) + random.uniform(0, 0.5)
+
+            log.warning(
+                f"Embedding request to {url} failed ({e}), retrying in {delay:.1f}s"
+            )
+            time.sleep(delay)
+
+
+def generate_adaptive_batch_embeddings(func, texts: list[str], limit_key: tuple):
+    """
+    Embed `texts` with `func`, halving the batch whenever the server rejects it
+    as too large (HTTP 400/413) and remembering the size that worked.
+    """
+    try:
+        return func(texts)
+    except requests.HTTPError as e:
+        if (
+            len(texts) <= 1
+            or e.response is None
+            or e.response.status_code not in (400, 413)
+        ):
+            raise
+
+        half = len(texts) // 2
+        EMBEDDING_BATCH_SIZE_LIMITS[limit_key] = min(
+            EMBEDDING_BATCH_SIZE_LIMITS.get(limit_key, half), half
+        )
+        log.warning(
+            f"Embedding batch of {len(texts)} rejected ({e.response.status_code}), splitting"
+        )
+        return generate_adaptive_batch_embeddings(
+            func, texts[:half], limit_key
+        ) + generate_adaptive_batch_embeddings(func, texts[half:], limit_key)
+
+
 def generate_openai_batch_embeddings(
     model: str,
     texts: list[str],
     url: str = "https://api.openai.com/v1",
     key: str = "",
     user: UserModel = None,
-) -> Optional[list[list[float]]]:
-    try:
-        r = requests.post(
-            f"{url}/embeddings",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key}",
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": user.name,
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            json={"input": texts, "model": model},
-        )
-        r.raise_for_status()
-        data = r.json()
-        if "data" in data:
-            return [elem["embedding"] for elem in data["data"]]
-        else:
-            raise "Something went wrong :/"
-    except Exception as e:
-        log.exception(f"Error generating openai batch embeddings: {e}")
-        return None
+) -> list[list[float]]:
+    data = post_embedding_request(
+        f"{url}/embeddings",
+        {"input": texts, "model": model},
+        headers={
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {key}",
+            **(
+                {
+                    "X-OpenWebUI-User-Name": user.name,
+                    "X-OpenWebUI-User-Id": user.id,
+                    "X-OpenWebUI-User-Email": user.email,
+                    "X-OpenWebUI-User-Role": user.role,
+                }
+                if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                else {}
+            ),
+        },
+    )
+    if "data" not in data:
+        raise Exception(f"Unexpected OpenAI embeddings response: {data}")
+    return [elem["embedding"] for elem in data["data"]]
 
 
 def generate_ollama_batch_embeddings(
     model: str, texts: list[str], url: str, key: str = "", user: UserModel = None
-) -> Optional[list[list[float]]]:
-    try:
-        r = requests.post(
-            f"{url}/api/embed",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key}",
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": user.name,
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS
-                    else {}
-                ),
-            },
-            json={"input": texts, "model": model},
-        )
-        r.raise_for_status()
-        data = r.json()
-
-        if "embeddings" in data:
-            return data["embeddings"]
-        else:
-            raise "Something went wrong :/"
-    except Exception as e:
-        log.exception(f"Error generating ollama batch embeddings: {e}")
-        return None
+) -> list[list[float]]:
+    data = post_embedding_request(
+        f"{url}/api/embed",
+        {"input": texts, "model": model},
+        headers={
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {key}",
+            **(
+                {
+                    "X-OpenWebUI-User-Name": user.name,
+                    "X-OpenWebUI-User-Id": user.id,
+                    "X-OpenWebUI-User-Email": user.email,
+                    "X-OpenWebUI-User-Role": user.role,
+                }
+                if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                else {}
+            ),
+        },
+    )
+    if "embeddings" not in data:
+        raise Exception(f"Unexpected Ollama embeddings response: {data}")
+    return data["embeddings"]
 
 
 def generate_embeddings(engine: str, model: str, text: Union[str, list[str]], **kwargs):
@@ -625,28 +809,26 @@ def generate_embeddings(engine: str, model: str, text: Union[str, list[str]], **
     user = kwargs.get("user")
 
     if engine == "ollama":
-        if isinstance(text, list):
-            embeddings = generate_ollama_batch_embeddings(
-                **{"model": model, "texts": text, "url": url, "key": key, "user": user}
-            )
-        else:
-            embeddings = generate_ollama_batch_embeddings(
-                **{
-                    "model": model,
-                    "texts": [text],
-                    "url": url,
-                    "key": key,
-                    "user": user,
-                }
-            )
-        return embeddings[0] if isinstance(text, str) else embeddings
+        func = lambda texts: generate_ollama_batch_embeddings(
+            model=model, texts=texts, url=url, key=key, user=user
+        )
     elif engine == "openai":
-        if isinstance(text, list):
-            embeddings = generate_openai_batch_embeddings(model, text, url, key, user)
-        else:
-            embeddings = generate_openai_batch_embeddings(model, [text], url, key, user)
+        func = lambda texts: generate_openai_batch_embeddings(
+            model, texts, url, key, user
+        )
+    else:
+        raise ValueError(f"Unknown embedding engine: {engine}")
+
+    texts = [text] if isinstance(text, str) else text
+    try:
+        embeddings = generate_adaptive_batch_embeddings(
+            func, texts, (engine, url, model)
+        )
+    except Exception as e:
+        log.exception(f"Error generating {engine} embeddings: {e}")
+        raise e
 
-        return embeddings[0] if isinstance(text, str) else embeddings
+    return embeddings[0] if isinstance(text, str) else embeddings
 
 
 import operator
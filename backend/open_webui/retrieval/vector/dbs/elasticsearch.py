@@ -73,23 +73,26 @@ class ElasticsearchClient:
         return GetResult(ids=[ids], documents=[documents], metadatas=[metadatas])
 
     # Status: works
-    def _result_to_search_result(self, result) -> SearchResult:
+    def _result_to_search_result(self, results) -> SearchResult:
+        # One row of matches per search response
         ids = []
         distances = []
         documents = []
         metadatas = []
 
-        for hit in result["hits"]["hits"]:
-            ids.append(hit["_id"])
-            distances.append(hit["_score"])
-            documents.append(hit["_source"].get("text"))
-            metadatas.append(hit["_source"].get("metadata"))
+        for result in results:
+            # Failed searches come back as an error entry without hits
+            hits = result.get("hits", {}).get("hits", [])
+            ids.append([hit["_id"] for hit in hits])
+            distances.append([hit["_score"] for hit in hits])
+            documents.append([hit["_source"].get("text") for hit in hits])
+            metadatas.append([hit["_source"].get("metadata") for hit in hits])
 
         return SearchResult(
-            ids=[ids],
-            distances=[distances],
-            documents=[documents],
-            metadatas=[metadatas],
+            ids=ids,
+            distances=distances,
+            documents=documents,
+            metadatas=metadatas,
         )
 
     # Status: works
@@ -148,29 +151,35 @@ class ElasticsearchClient:
     def search(
         self, collection_name: str, vectors: list[list[float]], limit: int
     ) -> Optional[SearchResult]:
-        query = {
-            "size": limit,
-            "_source": ["text", "metadata"],
-            "query": {
-                "script_score": {
+        # One search per query vector, sent in a single multi-search request
+        searches = []
+        for vector in vectors:
+            searches.append({"index": self._get_index_name(len(vector))})
+            searches.append(
+                {
+                    "size": limit,
+                    "_source": ["text", "metadata"],
                     "query": {
-                        "bool": {"filter": [{"term": {"collection": collection_name}}]}
-                    },
-                    "script": {
-                        "source": "cosineSimilarity(params.vector, 'vector') + 1.0",
-                        "params": {
-                            "vector": vectors[0]
-                        },  # Assuming single query vector
+                        "script_score": {
+                            "query": {
+                                "bool": {
+                                    "filter": [
+                                        {"term": {"collection": collection_name}}
+                                    ]
+                                }
+                            },
+                            "script": {
+                                "source": "cosineSimilarity(params.vector, 'vector') + 1.0",
+                                "params": {"vector": vector},
+                            },
+                        }
                     },
                 }
-            },
-        }
+            )
 
-        result = self.client.search(
-            index=self._get_index_name(len(vectors[0])), body=query
-        )
+        result = self.client.msearch(searches=searches)
 
-        return self._result_to_search_result(result)
+        return self._result_to_search_result(result["responses"])
 
     # Status: only tested halfwat
     def query(
@@ -0,0 +1,850 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional
+
+import numpy as np
+
+from open_webui.retrieval.vector.main import VectorItem, SearchResult, GetResult
+from open_webui.retrieval.vector.quantization import (
+    INT8_SCALE,
+    get_candidate_limit,
+    normalize,
+    quantize,
+    score,
+)
+from open_webui.config import (
+    LOCAL_VECTOR_DB_ANN_NPROBE,
+    LOCAL_VECTOR_DB_ANN_THRESHOLD,
+    LOCAL_VECTOR_DB_DTYPE,
+    LOCAL_VECTOR_DB_MAX_SEGMENTS,
+    LOCAL_VECTOR_DB_PATH,
+    VECTOR_DB_QUANTIZATION,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# Rows scored per matrix product, bounds the memory used to decode segments
+CHUNK_SIZE = 16384
+# Compact once this fraction of the stored vectors has been deleted
+MAX_DELETED_RATIO = 0.25
+# SQLite's default limit on the number of bound parameters
+MAX_PARAMS = 900
+
+
+def encode(vectors: np.ndarray, dtype: str) -> np.ndarray:
+    if dtype == "int8":
+        return quantize(vectors, "int8")
+    return vectors.astype(dtype)
+
+
+def decode(vectors: np.ndarray) -> np.ndarray:
+    if vectors.dtype == np.int8:
+        return vectors.astype(np.float32) / INT8_SCALE
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores of each row, best first."""
+    if scores.shape[1] > k:
+        indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        indices = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, indices, axis=1), axis=1)
+    return np.take_along_axis(indices, order, axis=1)
+
+
+def batched(values: list, size: int = MAX_PARAMS):
+    for i in range(0, len(values), size):
+        yield values[i : i + size]
+
+
+class IVFIndex:
+    """
+    Inverted file index over a segment: vectors are grouped by their nearest
+    k-means centroid and a search only scores the `nprobe` closest groups.
+    """
+
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray, bounds: np.ndarray):
+        self.centroids = centroids
+        # Segment offsets ordered by group, group i is offsets[bounds[i]:bounds[i + 1]]
+        self.offsets = offsets
+        self.bounds = bounds
+
+    @staticmethod
+    def assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        return np.concatenate(
+            [
+                np.argmax(decode(vectors[i : i + CHUNK_SIZE]) @ centroids.T, axis=1)
+                for i in range(0, len(vectors), CHUNK_SIZE)
+            ]
+        )
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, iterations: int = 10) -> "IVFIndex":
+        rng = np.random.default_rng(0)
+        n = len(vectors)
+        nlist = max(1, int(np.sqrt(n)))
+
+        # Spherical k-means on a sample, the vectors are already normalized
+        sample = decode(
+            vectors[np.sort(rng.choice(n, min(n, nlist * 64), replace=False))]
+        )
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)]
+        for _ in range(iterations):
+            assignments = cls.assign(sample, centroids)
+            counts = np.bincount(assignments, minlength=nlist)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            nonempty = counts > 0
+
+            sums = np.empty_like(centroids)
+            sums[nonempty] = np.add.reduceat(
+                sample[np.argsort(assignments, kind="stable")],
+                starts[nonempty],
+                axis=0,
+            )
+            sums[~nonempty] = sample[rng.choice(len(sample), int((~nonempty).sum()))]
+            centroids = normalize(sums)
+
+        assignments = cls.assign(vectors, centroids)
+        bounds = np.concatenate(
+            [[0], np.cumsum(np.bincount(assignments, minlength=nlist))]
+        )
+        return cls(centroids, np.argsort(assignments, kind="stable"), bounds)
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        groups = top_k((self.centroids @ query)[None], nprobe)[0]
+        return np.sort(
+            np.concatenate(
+                [self.offsets[self.bounds[i] : self.bounds[i + 1]] for i in groups]
+            )
+        )
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            np.savez(
+                f, centroids=self.centroids, offsets=self.offsets, bounds=self.bounds
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(path) as data:
+            return cls(data["centroids"], data["offsets"], data["bounds"])
+
+
+class Segment:
+    def __init__(
+        self,
+        id: int,
+        vectors: np.ndarray,
+        rows: np.ndarray,
+        index: Optional[IVFIndex] = None,
+        codes: Optional[np.ndarray] = None,
+    ):
+        self.id = id
+        # Read-only memory map of the segment's .npy file
+        self.vectors = vectors
+        # Sidecar row of each vector, -1 once deleted
+        self.rows = rows
+        self.index = index
+        # Read-only memory map of the quantized vectors scanned before re-scoring
+        self.codes = codes
+
+    def _rescore(self, query: np.ndarray, offsets: np.ndarray, limit: int):
+        # Full-precision scores of the candidates, read in offset order
+        offsets = np.sort(offsets)
+        scores = decode(self.vectors[offsets]) @ query
+        best = top_k(scores[None], limit)[0]
+        return scores[best], self.rows[offsets[best]]
+
+    def search(self, queries: np.ndarray, limit: int, nprobe: int):
+        """Yield (query index, scores, rows) of the best live vectors for the queries."""
+        candidate_limit = get_candidate_limit(limit)
+        if self.index is not None:
+            for i, query in enumerate(queries):
+                offsets = self.index.candidates(query, nprobe)
+                offsets = offsets[self.rows[offsets] >= 0]
+                if self.codes is not None:
+                    approximate = score(self.codes[offsets], query[None])
+                    offsets = offsets[top_k(approximate, candidate_limit)[0]]
+                yield i, *self._rescore(query, offsets, limit)
+            return
+
+        for start in range(0, len(self.vectors), CHUNK_SIZE):
+            rows = self.rows[start : start + CHUNK_SIZE]
+            deleted = rows < 0
+            if deleted.all():
+                continue
+
+            if self.codes is not None:
+                scores = score(self.codes[start : start + CHUNK_SIZE], queries)
+                scores[:, deleted] = -np.inf
+                candidates = top_k(scores, candidate_limit)
+                for i, query in enumerate(queries):
+                    offsets = candidates[i][np.isfinite(scores[i, candidates[i]])]
+                    yield i, *self._rescore(query, start + offsets, limit)
+                continue
+
+            scores = queries @ decode(self.vectors[start : start + CHUNK_SIZE]).T
+            scores[:, deleted] = -np.inf
+            best = top_k(scores, limit)
+            for i in range(len(queries)):
+                yield i, scores[i, best[i]], rows[best[i]]
+
+
+class Collection:
+    """
+    A collection stored as append-only segments of normalized vectors, one
+    memory-mapped .npy file per insert, with a SQLite sidecar holding the ids,
+    texts, metadata and the segment offset of every vector. With
+    VECTOR_DB_QUANTIZATION set at creation, every segment also keeps a
+    .codes.npy file of quantized vectors that searches scan first, re-scoring
+    only the best candidates with the stored vectors.
+
+    Deleted vectors are only unlinked from the sidecar; compaction merges
+    small segments and drops deleted vectors in the background, indexing the
+    merged segment with IVF once it is large enough. Writers are serialized by `write_lock` in
+    this process and by the sidecar's write transaction across processes,
+    other processes' writes are picked up through the `version` counter. The
+    counter restarts when a collection is deleted and created again, so it is
+    compared together with the `generation` id picked at creation.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.write_lock = threading.RLock()
+
+        self.generation = None
+        self.version = None
+        self.dtype = LOCAL_VECTOR_DB_DTYPE
+        self.quantization = VECTOR_DB_QUANTIZATION
+        self.dimension = None
+        self.segments: list[Segment] = []
+        self.compacting = False
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(
+            os.path.join(self.path, "meta.db"), timeout=30, isolation_level=None
+        )
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self.write_lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh(conn)
+                yield conn
+                conn.execute(
+                    "UPDATE config SET value = value + 1 WHERE key = 'version'"
+                )
+                self.generation, self.version = self._get_state(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                # The in-memory segments may have been changed, reload them
+                self.generation, self.version = None, None
+                raise
+
+    def _segment_path(self, segment_id: int | str) -> str:
+        return os.path.join(self.path, f"{segment_id}.npy")
+
+    def _index_path(self, segment_id: int | str) -> str:
+        return os.path.join(self.path, f"{segment_id}.ivf.npz")
+
+    def _codes_path(self, segment_id: int | str) -> str:
+        return os.path.join(self.path, f"{segment_id}.codes.npy")
+
+    def _segment_paths(self, segment_id: int | str) -> list[str]:
+        # Named by segment id, or by a temporary name while compacting
+        return [
+            self._segment_path(segment_id),
+            self._index_path(segment_id),
+            self._codes_path(segment_id),
+        ]
+
+    def _load_codes(self, segment_id: int) -> Optional[np.ndarray]:
+        if not self.quantization:
+            return None
+        return np.load(self._codes_path(segment_id), mmap_mode="r")
+
+    def create(self, dimension: int):
+        os.makedirs(self.path, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS config (
+                    key TEXT PRIMARY KEY,
+                    value NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS segment (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    size INTEGER NOT NULL,
+                    indexed INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS item (
+                    row INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL UNIQUE,
+                    segment INTEGER NOT NULL,
+                    offset INTEGER NOT NULL,
+                    text TEXT,
+                    metadata TEXT
+                );
+                """
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO config VALUES (?, ?)",
+                [
+                    ("generation", uuid.uuid4().hex),
+                    ("version", 0),
+                    ("dtype", self.dtype),
+                    ("dimension", dimension),
+                    ("quantization", self.quantization),
+                ],
+            )
+
+    @staticmethod
+    def _get_state(conn) -> tuple[Optional[str], int]:
+        config = dict(
+            conn.execute(
+                "SELECT key, value FROM config WHERE key IN ('generation', 'version')"
+            )
+        )
+        return config.get("generation"), config["version"]
+
+    def _is_current(self, conn) -> bool:
+        return self._get_state(conn) == (self.generation, self.version)
+
+    def _refresh(self, conn):
+        """Reload the segments if the sidecar was changed by another process."""
+        if self._is_current(conn):
+            return
+
+        config = dict(conn.execute("SELECT key, value FROM config"))
+        # Collections created before quantization was added have no codes
+        self.quantization = config.get("quantization", "")
+        segments = {}
+        for id, size, indexed in conn.execute(
+            "SELECT id, size, indexed FROM segment ORDER BY id"
+        ):
+            segments[id] = Segment(
+                id,
+                np.load(self._segment_path(id), mmap_mode="r"),
+                np.full(size, -1, dtype=np.int64),
+                IVFIndex.load(self._index_path(id)) if indexed else None,
+                self._load_codes(id),
+            )
+
+        items = np.array(
+            conn.execute("SELECT row, segment, offset FROM item").fetchall(),
+            dtype=np.int64,
+        ).reshape(-1, 3)
+        for id, segment in segments.items():
+            mask = items[:, 1] == id
+            segment.rows[items[mask, 2]] = items[mask, 0]
+
+        with self.lock:
+            self.dtype = config["dtype"]
+            self.dimension = int(config["dimension"])
+            self.segments = list(segments.values())
+            self.generation = config.get("generation")
+            self.version = config["version"]
+
+    def _snapshot(self) -> list[Segment]:
+        with self._connect() as conn:
+            with self.lock:
+                if self._is_current(conn):
+                    return list(self.segments)
+            with self.write_lock:
+                self._refresh(conn)
+                return list(self.segments)
+
+    def _unlink(self, conn, rows: list[tuple[int, int, int]]):
+        segments = {segment.id: segment for segment in self.segments}
+        for row, segment_id, offset in rows:
+            segments[segment_id].rows[offset] = -1
+        for batch in batched([row for row, _, _ in rows]):
+            conn.execute(
+                f"DELETE FROM item WHERE row IN ({', '.join('?' * len(batch))})",
+                batch,
+            )
+
+    def _create_segment(
+        self, conn, size: int
+    ) -> tuple[int, np.memmap, Optional[np.memmap]]:
+        segment_id = conn.execute(
+            "INSERT INTO segment (size) VALUES (?)", (size,)
+        ).lastrowid
+        return segment_id, *self._create_segment_files(segment_id, size)
+
+    def _create_segment_files(
+        self, segment_id: int | str, size: int
+    ) -> tuple[np.memmap, Optional[np.memmap]]:
+        vectors = np.lib.format.open_memmap(
+            self._segment_path(segment_id),
+            mode="w+",
+            dtype=self.dtype,
+            shape=(size, self.dimension),
+        )
+
+        codes = None
+        if self.quantization == "int8":
+            codes = np.lib.format.open_memmap(
+                self._codes_path(segment_id),
+                mode="w+",
+                dtype=np.int8,
+                shape=(size, self.dimension),
+            )
+        elif self.quantization == "binary":
+            # Sign bits packed eight to a byte
+            codes = np.lib.format.open_memmap(
+                self._codes_path(segment_id),
+                mode="w+",
+                dtype=np.uint8,
+                shape=(size, (self.dimension + 7) // 8),
+            )
+        return vectors, codes
+
+    def _remove_segment_files(self, segment_id: int | str):
+        for path in self._segment_paths(segment_id):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _load_segment(self, conn, segment_id: int, index=None) -> Segment:
+        vectors = np.load(self._segment_path(segment_id), mmap_mode="r")
+        rows = np.full(len(vectors), -1, dtype=np.int64)
+        for row, offset in conn.execute(
+            "SELECT row, offset FROM item WHERE segment = ?", (segment_id,)
+        ):
+            rows[offset] = row
+        return Segment(segment_id, vectors, rows, index, self._load_codes(segment_id))
+
+    def upsert(self, items: list[VectorItem]):
+        # Later items win over earlier ones with the same id
+        items = list({item["id"]: item for item in items}.values())
+        if not items:
+            return
+
+        with self._transaction() as conn:
+            vectors = normalize([item["vector"] for item in items])
+            if vectors.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Expected vectors of dimension {self.dimension}, got {vectors.shape[1]}"
+                )
+
+            ids = [item["id"] for item in items]
+            existing = []
+            for batch in batched(ids):
+                existing.extend(
+                    conn.execute(
+                        f"SELECT row, segment, offset FROM item WHERE id IN ({', '.join('?' * len(batch))})",
+                        batch,
+                    ).fetchall()
+                )
+            self._unlink(conn, existing)
+
+            segment_id, array, codes = self._create_segment(conn, len(vectors))
+            try:
+                array[:] = encode(vectors, self.dtype)
+                array.flush()
+                if codes is not None:
+                    codes[:] = quantize(vectors, self.quantization)
+                    codes.flush()
+                del array, codes
+                conn.executemany(
+                    "INSERT INTO item (id, segment, offset, text, metadata) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (
+                            item["id"],
+                            segment_id,
+                            offset,
+                            item["text"],
+                            json.dumps(item["metadata"], default=str),
+                        )
+                        for offset, item in enumerate(items)
+                    ],
+                )
+                segment = self._load_segment(conn, segment_id)
+            except Exception:
+                self._remove_segment_files(segment_id)
+                raise
+
+            with self.lock:
+                self.segments = [*self.segments, segment]
+
+    def delete(self, ids: Optional[list[str]] = None, filter: Optional[dict] = None):
+        if not ids and not filter:
+            return
+
+        with self._transaction() as conn:
+            if ids:
+                rows = []
+                for batch in batched(ids):
+                    rows.extend(
+                        conn.execute(
+                            f"SELECT row, segment, offset FROM item WHERE id IN ({', '.join('?' * len(batch))})",
+                            batch,
+                        ).fetchall()
+                    )
+            else:
+                where, params = self._where(filter)
+                rows = conn.execute(
+                    f"SELECT row, segment, offset FROM item WHERE {where}", params
+                ).fetchall()
+            self._unlink(conn, rows)
+
+    @staticmethod
+    def _where(filter: dict) -> tuple[str, list]:
+        clauses = []
+        params = []
+        for key, value in filter.items():
+            clauses.append("json_extract(metadata, ?) IS ?")
+            params.extend([f'$."{key}"', value])
+        return " AND ".join(clauses) or "1", params
+
+    def _to_result(self, rows: list[tuple]) -> tuple[list, list, list]:
+        return (
+            [id for id, _, _ in rows],
+            [text for _, text, _ in rows],
+            [json.loads(metadata) for _, _, metadata in rows],
+        )
+
+    def query(self, filter: dict, limit: Optional[int] = None) -> GetResult:
+        where, params = self._where(filter)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, text, metadata FROM item WHERE {where} ORDER BY row LIMIT ?",
+                [*params, -1 if limit is None else limit],
+            ).fetchall()
+
+        ids, documents, metadatas = self._to_result(rows)
+        return GetResult(ids=[ids], documents=[documents], metadatas=[metadatas])
+
+    def search(self, vectors: list[list[float | int]], limit: int) -> SearchResult:
+        queries = normalize(vectors)
+        segments = self._snapshot()
+
+        if segments and queries.shape[1] != self.dimension:
+            raise ValueError(
+                f"Expected vectors of dimension {self.dimension}, got {queries.shape[1]}"
+            )
+
+        scores = [[] for _ in queries]
+        rows = [[] for _ in queries]
+        for segment in segments:
+            for i, segment_scores, segment_rows in segment.search(
+                queries, limit, LOCAL_VECTOR_DB_ANN_NPROBE
+            ):
+                scores[i].append(segment_scores)
+                rows[i].append(segment_rows)
+
+        results = []
+        for query_scores, query_rows in zip(scores, rows):
+            if not query_scores:
+                results.append(([], []))
+                continue
+
+            query_scores = np.concatenate(query_scores)
+            query_rows = np.concatenate(query_rows)
+            best = top_k(query_scores[None], limit)[0]
+            best = best[np.isfinite(query_scores[best])]
+            results.append((query_scores[best].tolist(), query_rows[best].tolist()))
+
+        items = {}
+        with self._connect() as conn:
+            for batch in batched(list({row for _, rows in results for row in rows})):
+                for row, *item in conn.execute(
+                    f"SELECT row, id, text, metadata FROM item WHERE row IN ({', '.join('?' * len(batch))})",
+                    batch,
+                ):
+                    items[row] = item
+
+        result = {"ids": [], "distances": [], "documents": [], "metadatas": []}
+        for query_scores, query_rows in results:
+            # Rows deleted since the snapshot was taken are skipped
+            found = [
+                (score, items[row])
+                for score, row in zip(query_scores, query_rows)
+                if row in items
+            ]
+            ids, documents, metadatas = self._to_result([item for _, item in found])
+            result["ids"].append(ids)
+            result["distances"].append([score for score, _ in found])
+            result["documents"].append(documents)
+            result["metadatas"].append(metadatas)
+        return SearchResult(**result)
+
+    def get_compaction(self) -> list[Segment]:
+        """
+        The segments to merge: all of them once too many vectors were deleted,
+        otherwise the unindexed ones once there are too many of them or they
+        hold enough vectors to be worth indexing.
+        """
+        segments = self.segments
+        total = sum(len(segment.rows) for segment in segments)
+        live = sum(int((segment.rows >= 0).sum()) for segment in segments)
+        if total and (total - live) / total > MAX_DELETED_RATIO:
+            return segments
+
+        unindexed = [segment for segment in segments if segment.index is None]
+        if len(unindexed) > LOCAL_VECTOR_DB_MAX_SEGMENTS or (
+            sum(int((segment.rows >= 0).sum()) for segment in unindexed)
+            >= LOCAL_VECTOR_DB_ANN_THRESHOLD
+        ):
+            return unindexed
+        return []
+
+    def compact(self):
+        """Rewrite the live vectors of `get_compaction` into one segment, indexed if it's large enough."""
+        # The merged segment and its index are written under a temporary name
+        # outside of the write transaction, which only swaps them in
+        self._snapshot()
+        with self.lock:
+            generation = self.generation
+            old = self.get_compaction()
+            live = [segment.rows >= 0 for segment in old]
+        size = sum(int(mask.sum()) for mask in live)
+
+        name = f"compact-{uuid.uuid4().hex}"
+        index = None
+        rows = np.empty(size, dtype=np.int64)
+        try:
+            if size:
+                vectors, codes = self._create_segment_files(name, size)
+                offset = 0
+                for old_segment, mask in zip(old, live):
+                    for i in range(0, len(mask), CHUNK_SIZE):
+                        chunk = mask[i : i + CHUNK_SIZE]
+                        count = int(chunk.sum())
+                        vectors[offset : offset + count] = old_segment.vectors[
+                            i : i + CHUNK_SIZE
+                        ][chunk]
+                        if codes is not None:
+                            codes[offset : offset + count] = old_segment.codes[
+                                i : i + CHUNK_SIZE
+                            ][chunk]
+                        rows[offset : offset + count] = old_segment.rows[
+                            i : i + CHUNK_SIZE
+                        ][chunk]
+                        offset += count
+                vectors.flush()
+                if codes is not None:
+                    codes.flush()
+                del codes
+
+                if size >= LOCAL_VECTOR_DB_ANN_THRESHOLD:
+                    index = IVFIndex.build(vectors)
+                    index.save(self._index_path(name))
+                del vectors
+
+            with self._transaction() as conn:
+                current = {segment.id for segment in self.segments}
+                if self.generation != generation or any(
+                    old_segment.id not in current for old_segment in old
+                ):
+                    # Another process compacted or re-created the collection
+                    log.debug(
+                        f"Skipped the compaction of outdated segments in {self.path}"
+                    )
+                    return
+
+                segment = None
+                if size:
+                    segment_id = conn.execute(
+                        "INSERT INTO segment (size, indexed) VALUES (?, ?)",
+                        (size, int(index is not None)),
+                    ).lastrowid
+                    try:
+                        for path, segment_path in zip(
+                            self._segment_paths(name), self._segment_paths(segment_id)
+                        ):
+                            if os.path.exists(path):
+                                os.replace(path, segment_path)
+
+                        # Vectors deleted since the copy keep no item and stay unlinked
+                        conn.executemany(
+                            "UPDATE item SET segment = ?, offset = ? WHERE row = ?",
+                            [
+                                (segment_id, offset, row)
+                                for offset, row in enumerate(rows.tolist())
+                            ],
+                        )
+                        segment = self._load_segment(conn, segment_id, index)
+                    except Exception:
+                        self._remove_segment_files(segment_id)
+                        raise
+
+                old_ids = [old_segment.id for old_segment in old]
+                for batch in batched(old_ids):
+                    conn.execute(
+                        f"DELETE FROM segment WHERE id IN ({', '.join('?' * len(batch))})",
+                        batch,
+                    )
+
+                with self.lock:
+                    self.segments = [
+                        *[s for s in self.segments if s.id not in old_ids],
+                        *([segment] if segment else []),
+                    ]
+        finally:
+            self._remove_segment_files(name)
+
+        for old_segment in old:
+            for path in self._segment_paths(old_segment.id):
+                try:
+                    if os.path.exists(path):
+                        os.remove(path)
+                except OSError as e:
+                    log.warning(f"Error removing {path}: {e}")
+
+        log.debug(f"Compacted {len(old)} segments into {size} vectors in {self.path}")
+
+
+class LocalClient:
+    """
+    Embedded vector store kept under LOCAL_VECTOR_DB_PATH, one directory per
+    collection. Collections are opened lazily so startup does no work, and
+    segment files are memory-mapped so only the pages being scored are
+    resident. Scores are cosine similarities, higher is better.
+    """
+
+    def __init__(self):
+        self.path = LOCAL_VECTOR_DB_PATH
+        os.makedirs(self.path, exist_ok=True)
+
+        self.collections: dict[str, Collection] = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="local_vector_db_compaction"
+        )
+
+    def _get_path(self, collection_name: str) -> str:
+        if not re.fullmatch(r"[A-Za-z0-9][A-Za-z0-9_.-]*", collection_name):
+            collection_name = hashlib.sha256(collection_name.encode()).hexdigest()
+        return os.path.join(self.path, collection_name)
+
+    def _get_collection(self, collection_name: str) -> Optional[Collection]:
+        path = self._get_path(collection_name)
+        with self.lock:
+            if not os.path.exists(os.path.join(path, "meta.db")):
+                # Another process may have deleted the collection
+                self.collections.pop(collection_name, None)
+                return None
+
+            collection = self.collections.get(collection_name)
+            if collection is None:
+                collection = Collection(path)
+                self.collections[collection_name] = collection
+            return collection
+
+    def _compact(self, collection: Collection):
+        try:
+            if os.path.exists(collection.path):
+                collection.compact()
+        except Exception as e:
+            log.exception(f"Error compacting {collection.path}: {e}")
+        finally:
+            collection.compacting = False
+
+    def _schedule_compaction(self, collection: Collection):
+        if not collection.compacting and collection.get_compaction():
+            collection.compacting = True
+            self.executor.submit(self._compact, collection)
+
+    def has_collection(self, collection_name: str) -> bool:
+        return os.path.exists(os.path.join(self._get_path(collection_name), "meta.db"))
+
+    def delete_collection(self, collection_name: str):
+        with self.lock:
+            collection = self.collections.pop(collection_name, None)
+
+        path = self._get_path(collection_name)
+        if collection is not None:
+            with collection.write_lock:
+                shutil.rmtree(path, ignore_errors=True)
+        else:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def search(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        try:
+            collection = self._get_collection(collection_name)
+            if collection is None:
+                return None
+            return collection.search(vectors, limit)
+        except Exception as e:
+            log.exception(f"Error during search: {e}")
+            return None
+
+    def query(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        try:
+            collection = self._get_collection(collection_name)
+            if collection is None:
+                return None
+            return collection.query(filter, limit)
+        except Exception as e:
+            log.exception(f"Error during query: {e}")
+            return None
+
+    def get(self, collection_name: str) -> Optional[GetResult]:
+        collection = self._get_collection(collection_name)
+        if collection is None:
+            return None
+        return collection.query({})
+
+    def insert(self, collection_name: str, items: list[VectorItem]):
+        self.upsert(collection_name, items)
+
+    def upsert(self, collection_name: str, items: list[VectorItem]):
+        # Creates the collection on first use, items with an existing id replace it
+        if not items:
+            return
+
+        collection = self._get_collection(collection_name)
+        if collection is None:
+            collection = Collection(self._get_path(collection_name))
+            collection.create(len(items[0]["vector"]))
+            with self.lock:
+                collection = self.collections.setdefault(collection_name, collection)
+
+        collection.upsert(items)
+        self._schedule_compaction(collection)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        collection = self._get_collection(collection_name)
+        if collection is None:
+            return
+
+        collection.delete(ids=ids, filter=filter)
+        self._schedule_compaction(collection)
+
+    def reset(self):
+        with self.lock:
+            self.collections = {}
+
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path, exist_ok=True)
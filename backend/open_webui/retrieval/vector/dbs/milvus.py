@@ -4,11 +4,19 @@ import json
 import logging
 from typing import Optional
 
+import numpy as np
+
 from open_webui.retrieval.vector.main import VectorItem, SearchResult, GetResult
+from open_webui.retrieval.vector.quantization import (
+    get_candidate_limit,
+    normalize,
+    rescore,
+)
 from open_webui.config import (
     MILVUS_URI,
     MILVUS_DB,
     MILVUS_TOKEN,
+    VECTOR_DB_QUANTIZATION,
 )
 from open_webui.env import SRC_LOG_LEVELS
 
@@ -24,6 +32,10 @@ class MilvusClient:
         else:
             self.client = Client(uri=MILVUS_URI, db_name=MILVUS_DB, token=MILVUS_TOKEN)
 
+        if VECTOR_DB_QUANTIZATION == "binary":
+            # Milvus only quantizes FLOAT_VECTOR fields with scalar quantizers
+            log.info("Milvus has no binary quantization for float vectors, using int8")
+
     def _result_to_get_result(self, result) -> GetResult:
         ids = []
         documents = []
@@ -105,12 +117,20 @@ class MilvusClient:
         )
 
         index_params = self.client.prepare_index_params()
-        index_params.add_index(
-            field_name="vector",
-            index_type="HNSW",
-            metric_type="COSINE",
-            params={"M": 16, "efConstruction": 100},
-        )
+        if VECTOR_DB_QUANTIZATION:
+            index_params.add_index(
+                field_name="vector",
+                index_type="IVF_SQ8",
+                metric_type="COSINE",
+                params={"nlist": 128},
+            )
+        else:
+            index_params.add_index(
+                field_name="vector",
+                index_type="HNSW",
+                metric_type="COSINE",
+                params={"M": 16, "efConstruction": 100},
+            )
 
         self.client.create_collection(
             collection_name=f"{self.collection_prefix}_{collection_name}",
@@ -137,14 +157,40 @@ class MilvusClient:
     ) -> Optional[SearchResult]:
         # Search for the nearest neighbor items based on the vectors and return 'limit' number of results.
         collection_name = collection_name.replace("-", "_")
+        if not VECTOR_DB_QUANTIZATION:
+            result = self.client.search(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                data=vectors,
+                limit=limit,
+                output_fields=["data", "metadata"],
+            )
+            return self._result_to_search_result(result)
+
+        # Oversample on the quantized index, then re-score with the float vectors
         result = self.client.search(
             collection_name=f"{self.collection_prefix}_{collection_name}",
             data=vectors,
-            limit=limit,
-            output_fields=["data", "metadata"],
+            limit=get_candidate_limit(limit),
+            output_fields=["data", "metadata", "vector"],
         )
 
-        return self._result_to_search_result(result)
+        rescored = []
+        for query, match in zip(normalize(vectors), result):
+            match = list(match)
+            best, scores = rescore(
+                query, np.array([item["entity"]["vector"] for item in match]), limit
+            )
+            rescored.append(
+                [
+                    {
+                        "id": match[i].get("id"),
+                        "distance": float(score),
+                        "entity": match[i].get("entity"),
+                    }
+                    for i, score in zip(best.tolist(), scores)
+                ]
+            )
+        return self._result_to_search_result(rescored)
 
     def query(self, collection_name: str, filter: dict, limit: Optional[int] = None):
         # Construct the filter string for querying
@@ -33,17 +33,20 @@ class OpenSearchClient:
 
         return GetResult(ids=ids, documents=documents, metadatas=metadatas)
 
-    def _result_to_search_result(self, result) -> SearchResult:
+    def _result_to_search_result(self, results) -> SearchResult:
+        # One row of matches per search response
         ids = []
         distances = []
         documents = []
         metadatas = []
 
-        for hit in result["hits"]["hits"]:
-            ids.append(hit["_id"])
-            distances.append(hit["_score"])
-            documents.append(hit["_source"].get("text"))
-            metadatas.append(hit["_source"].get("metadata"))
+        for result in results:
+            # Failed searches come back as an error entry without hits
+            hits = result.get("hits", {}).get("hits", [])
+            ids.append([hit["_id"] for hit in hits])
+            distances.append([hit["_score"] for hit in hits])
+            documents.append([hit["_source"].get("text") for hit in hits])
+            metadatas.append([hit["_source"].get("metadata") for hit in hits])
 
         return SearchResult(
             ids=ids, distances=distances, documents=documents, metadatas=metadatas
@@ -95,27 +98,29 @@ class OpenSearchClient:
     def search(
         self, collection_name: str, vectors: list[list[float]], limit: int
     ) -> Optional[SearchResult]:
-        query = {
-            "size": limit,
-            "_source": ["text", "metadata"],
-            "query": {
-                "script_score": {
-                    "query": {"match_all": {}},
-                    "script": {
-                        "source": "cosineSimilarity(params.vector, 'vector') + 1.0",
-                        "params": {
-                            "vector": vectors[0]
-                        },  # Assuming single query vector
+        # One search per query vector, sent in a single multi-search request
+        searches = []
+        for vector in vectors:
+            searches.append({"index": f"{self.index_prefix}_{collection_name}"})
+            searches.append(
+                {
+                    "size": limit,
+                    "_source": ["text", "metadata"],
+                    "query": {
+                        "script_score": {
+                            "query": {"match_all": {}},
+                            "script": {
+                                "source": "cosineSimilarity(params.vector, 'vector') + 1.0",
+                                "params": {"vector": vector},
+                            },
+                        }
                     },
                 }
-            },
-        }
+            )
 
-        result = self.client.search(
-            index=f"{self.index_prefix}_{collection_name}", body=query
-        )
+        result = self.client.msearch(body=searches)
 
-        return self._result_to_search_result(result)
+        return self._result_to_search_result(result["responses"])
 
     def query(
         self, collection_name: str, filter: dict, limit: Optional[int] = None
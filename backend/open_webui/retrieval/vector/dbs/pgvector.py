@@ -1,10 +1,15 @@
 from typing import Optional, List, Dict, Any
+import hashlib
+import io
+import json
 import logging
+import struct
+from contextlib import contextmanager
 from sqlalchemy import (
     cast,
     column,
-    create_engine,
     Column,
+    func,
     Integer,
     MetaData,
     select,
@@ -14,18 +19,29 @@ from sqlalchemy import (
     values,
 )
 from sqlalchemy.sql import true
-from sqlalchemy.pool import NullPool
 
-from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
+from sqlalchemy.orm import declarative_base, sessionmaker
 from sqlalchemy.dialects.postgresql import JSONB, array
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import BIT, HALFVEC, Vector
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.exc import NoSuchTableError
 
 from open_webui.retrieval.vector.main import VectorItem, SearchResult, GetResult
-from open_webui.config import PGVECTOR_DB_URL, PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH
+from open_webui.retrieval.vector.quantization import get_candidate_limit
+from open_webui.internal.db import create_database_engine
+from open_webui.config import (
+    PGVECTOR_DB_URL,
+    PGVECTOR_HNSW_EF_CONSTRUCTION,
+    PGVECTOR_HNSW_EF_SEARCH,
+    PGVECTOR_HNSW_M,
+    PGVECTOR_INDEX_TYPE,
+    PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH,
+    PGVECTOR_PARTITION_BY_COLLECTION,
+    PGVECTOR_POOL_SIZE,
+    VECTOR_DB_QUANTIZATION,
+)
 
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import DATABASE_URL, SRC_LOG_LEVELS
 
 VECTOR_LENGTH = PGVECTOR_INITIALIZE_MAX_VECTOR_LENGTH
 Base = declarative_base()
@@ -33,6 +49,44 @@ Base = declarative_base()
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
+COPY_COLUMNS = "id, vector, collection_name, text, vmetadata"
+# Header and trailer of PostgreSQL's binary COPY format
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+COPY_TRAILER = struct.pack("!h", -1)
+
+
+def encode_copy_field(value: Optional[bytes]) -> bytes:
+    if value is None:
+        return struct.pack("!i", -1)
+    return struct.pack("!i", len(value)) + value
+
+
+def encode_copy_rows(rows: list[tuple]) -> bytes:
+    """Encode (id, vector, collection_name, text, metadata) rows for COPY ... (FORMAT binary)."""
+    buffer = io.BytesIO()
+    buffer.write(COPY_HEADER)
+    for id, vector, collection_name, text, metadata in rows:
+        buffer.write(struct.pack("!h", 5))
+        buffer.write(encode_copy_field(id.encode()))
+        # pgvector's binary format: int16 dimensions, int16 unused, float4 values
+        buffer.write(
+            encode_copy_field(
+                struct.pack(f"!hh{len(vector)}f", len(vector), 0, *vector)
+            )
+        )
+        buffer.write(encode_copy_field(collection_name.encode()))
+        buffer.write(encode_copy_field(text.encode() if text is not None else None))
+        # jsonb's binary format: version 1 followed by the JSON text
+        buffer.write(
+            encode_copy_field(
+                b"\x01" + json.dumps(metadata, default=str).encode()
+                if metadata is not None
+                else None
+            )
+        )
+    buffer.write(COPY_TRAILER)
+    return buffer.getvalue()
+
 
 class DocumentChunk(Base):
     __tablename__ = "document_chunk"
@@ -46,55 +100,235 @@ class DocumentChunk(Base):
 
 class PgvectorClient:
     def __init__(self) -> None:
+        # Sessions are opened per call from a pooled engine, so concurrent
+        # requests and worker threads each check out their own connection.
+        self.engine = create_database_engine(
+            PGVECTOR_DB_URL or DATABASE_URL, pool_size=PGVECTOR_POOL_SIZE
+        )
+        self.SessionLocal = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine, expire_on_commit=False
+        )
+
+        with self.get_session() as session:
+            self.initialize(session)
+
+    @contextmanager
+    def get_session(self):
+        session = self.SessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
 
-        # if no pgvector uri, use the existing database connection
-        if not PGVECTOR_DB_URL:
-            from open_webui.internal.db import Session
-
-            self.session = Session
-        else:
-            engine = create_engine(
-                PGVECTOR_DB_URL, pool_pre_ping=True, poolclass=NullPool
-            )
-            SessionLocal = sessionmaker(
-                autocommit=False, autoflush=False, bind=engine, expire_on_commit=False
-            )
-            self.session = scoped_session(SessionLocal)
-
+    def initialize(self, session) -> None:
         try:
             # Ensure the pgvector extension is available
-            self.session.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
+            session.execute(text("CREATE EXTENSION IF NOT EXISTS vector;"))
 
             # Check vector length consistency
-            self.check_vector_length()
+            self.check_vector_length(session)
+
+            if PGVECTOR_PARTITION_BY_COLLECTION:
+                self.create_partitioned_table(session)
 
             # Create the tables if they do not exist
             # Base.metadata.create_all requires a bind (engine or connection)
             # Get the connection from the session
-            connection = self.session.connection()
+            connection = session.connection()
             Base.metadata.create_all(bind=connection)
 
-            # Create an index on the vector column if it doesn't exist
-            self.session.execute(
-                text(
-                    "CREATE INDEX IF NOT EXISTS idx_document_chunk_vector "
-                    "ON document_chunk USING ivfflat (vector vector_cosine_ops) WITH (lists = 100);"
+            self.partitioned = self.is_partitioned(session)
+            if PGVECTOR_PARTITION_BY_COLLECTION and not self.partitioned:
+                log.warning(
+                    "PGVECTOR_PARTITION_BY_COLLECTION is ignored, the existing document_chunk table is not partitioned."
                 )
-            )
-            self.session.execute(
+
+            self.create_vector_index(session)
+            session.execute(
                 text(
                     "CREATE INDEX IF NOT EXISTS idx_document_chunk_collection_name "
                     "ON document_chunk (collection_name);"
                 )
             )
-            self.session.commit()
+            session.commit()
             log.info("Initialization complete.")
         except Exception as e:
-            self.session.rollback()
+            session.rollback()
             log.exception(f"Error during initialization: {e}")
             raise
 
-    def check_vector_length(self) -> None:
+    def create_partitioned_table(self, session) -> None:
+        # Partitioned tables need the partition key in their primary key
+        session.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS document_chunk ("
+                "id TEXT NOT NULL, "
+                f"vector vector({VECTOR_LENGTH}), "
+                "collection_name TEXT NOT NULL, "
+                "text TEXT, "
+                "vmetadata JSONB, "
+                "PRIMARY KEY (collection_name, id)"
+                ") PARTITION BY LIST (collection_name);"
+            )
+        )
+
+        # An existing unpartitioned table is kept as is, initialize() warns about it
+        if not self.is_partitioned(session):
+            return
+
+        session.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS document_chunk_default "
+                "PARTITION OF document_chunk DEFAULT;"
+            )
+        )
+
+    def is_partitioned(self, session) -> bool:
+        return (
+            session.execute(
+                text(
+                    "SELECT 1 FROM pg_partitioned_table "
+                    "WHERE partrelid = 'document_chunk'::regclass;"
+                )
+            ).first()
+            is not None
+        )
+
+    @staticmethod
+    def get_partition_name(collection_name: str) -> str:
+        return f"document_chunk_{hashlib.sha256(collection_name.encode()).hexdigest()[:32]}"
+
+    def create_partition(self, session, collection_name: str) -> None:
+        # Not cached: another worker may have dropped the partition, and rows
+        # written without it would land in the default partition
+        if not self.partitioned:
+            return
+
+        literal = "'" + collection_name.replace("'", "''") + "'"
+        session.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {self.get_partition_name(collection_name)} "
+                f"PARTITION OF document_chunk FOR VALUES IN ({literal});"
+            )
+        )
+
+    @staticmethod
+    def get_index_quantization(indexdef: str) -> str:
+        if "binary_quantize" in indexdef:
+            return "binary"
+        # pgvector has no int8 type, half precision is its scalar quantization
+        if "halfvec" in indexdef:
+            return "int8"
+        return ""
+
+    def get_vector_index_sql(self, name: str, lists: int = 100) -> str:
+        if VECTOR_DB_QUANTIZATION == "int8":
+            expression = f"(vector::halfvec({VECTOR_LENGTH})) halfvec_cosine_ops"
+        elif VECTOR_DB_QUANTIZATION == "binary":
+            expression = (
+                f"(binary_quantize(vector)::bit({VECTOR_LENGTH})) bit_hamming_ops"
+            )
+        else:
+            expression = "vector vector_cosine_ops"
+
+        if PGVECTOR_INDEX_TYPE == "hnsw":
+            return (
+                f"CREATE INDEX IF NOT EXISTS {name} "
+                f"ON document_chunk USING hnsw ({expression}) "
+                f"WITH (m = {PGVECTOR_HNSW_M}, ef_construction = {PGVECTOR_HNSW_EF_CONSTRUCTION});"
+            )
+        return (
+            f"CREATE INDEX IF NOT EXISTS {name} "
+            f"ON document_chunk USING ivfflat ({expression}) WITH (lists = {lists});"
+        )
+
+    def create_vector_index(self, session) -> None:
+        indexdef = session.execute(
+            text(
+                "SELECT indexdef FROM pg_indexes "
+                "WHERE tablename = 'document_chunk' AND indexname = 'idx_document_chunk_vector';"
+            )
+        ).scalar()
+        is_empty = (
+            session.execute(text("SELECT 1 FROM document_chunk LIMIT 1;")).first()
+            is None
+        )
+
+        # Searches order by the expression of the existing index
+        self.index_quantization = VECTOR_DB_QUANTIZATION
+        if indexdef is not None and (
+            f"USING {PGVECTOR_INDEX_TYPE} " not in indexdef
+            or self.get_index_quantization(indexdef) != VECTOR_DB_QUANTIZATION
+        ):
+            if not is_empty:
+                log.warning(
+                    f"The vector index is not a {PGVECTOR_INDEX_TYPE} index with "
+                    f"VECTOR_DB_QUANTIZATION={VECTOR_DB_QUANTIZATION!r}, "
+                    "reindex the vector database to rebuild it."
+                )
+                self.index_quantization = self.get_index_quantization(indexdef)
+                return
+            session.execute(text("DROP INDEX idx_document_chunk_vector;"))
+            indexdef = None
+
+        # IVFFlat centroids are computed from the rows present at build time,
+        # so the index is only built once there is data (see `reindex`).
+        if indexdef is None and (PGVECTOR_INDEX_TYPE == "hnsw" or not is_empty):
+            session.execute(
+                text(
+                    self.get_vector_index_sql(
+                        "idx_document_chunk_vector", self.get_ivfflat_lists(session)
+                    )
+                )
+            )
+
+    def get_ivfflat_lists(self, session) -> int:
+        if PGVECTOR_INDEX_TYPE != "ivfflat":
+            return 100
+
+        # pgvector recommends rows / 1000 lists up to 1M rows, sqrt(rows) above
+        count = session.execute(text("SELECT count(*) FROM document_chunk;")).scalar()
+        if count <= 1_000_000:
+            return max(10, count // 1000)
+        return int(count**0.5)
+
+    def reindex(self) -> None:
+        """
+        Rebuild the vector index with the configured type and parameters.
+
+        The new index is built next to the old one, so searches keep working
+        while writes wait for the build.
+        """
+        with self.get_session() as session:
+            try:
+                session.execute(
+                    text("DROP INDEX IF EXISTS idx_document_chunk_vector_new;")
+                )
+                session.execute(
+                    text(
+                        self.get_vector_index_sql(
+                            "idx_document_chunk_vector_new",
+                            self.get_ivfflat_lists(session),
+                        )
+                    )
+                )
+                session.execute(text("DROP INDEX IF EXISTS idx_document_chunk_vector;"))
+                session.execute(
+                    text(
+                        "ALTER INDEX idx_document_chunk_vector_new "
+                        "RENAME TO idx_document_chunk_vector;"
+                    )
+                )
+                session.execute(text("ANALYZE document_chunk;"))
+                session.commit()
+                self.index_quantization = VECTOR_DB_QUANTIZATION
+                log.info(f"Rebuilt the {PGVECTOR_INDEX_TYPE} vector index.")
+            except Exception as e:
+                session.rollback()
+                log.exception(f"Error during reindex: {e}")
+                raise
+
+    def check_vector_length(self, session) -> None:
         """
         Check if the VECTOR_LENGTH matches the existing vector column dimension in the database.
         Raises an exception if there is a mismatch.
@@ -103,7 +337,7 @@ class PgvectorClient:
         try:
             # Attempt to reflect the 'document_chunk' table
             document_chunk_table = Table(
-                "document_chunk", metadata, autoload_with=self.session.bind
+                "document_chunk", metadata, autoload_with=session.connection()
             )
         except NoSuchTableError:
             # Table does not exist; no action needed
@@ -141,62 +375,143 @@ class PgvectorClient:
             )
         return vector
 
-    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
-        try:
-            new_items = []
-            for item in items:
-                vector = self.adjust_vector_length(item["vector"])
-                new_chunk = DocumentChunk(
-                    id=item["id"],
-                    vector=vector,
-                    collection_name=collection_name,
-                    text=item["text"],
-                    vmetadata=item["metadata"],
+    def copy_items(
+        self, session, table: str, collection_name: str, items: List[VectorItem]
+    ) -> None:
+        """Bulk load items into `table` with a binary COPY."""
+        data = encode_copy_rows(
+            [
+                (
+                    item["id"],
+                    self.adjust_vector_length(list(item["vector"])),
+                    collection_name,
+                    item["text"],
+                    item["metadata"],
                 )
-                new_items.append(new_chunk)
-            self.session.bulk_save_objects(new_items)
-            self.session.commit()
-            log.info(
-                f"Inserted {len(new_items)} items into collection '{collection_name}'."
+                for item in items
+            ]
+        )
+        cursor = session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table} ({COPY_COLUMNS}) FROM STDIN WITH (FORMAT binary)",
+                io.BytesIO(data),
             )
-        except Exception as e:
-            self.session.rollback()
-            log.exception(f"Error during insert: {e}")
-            raise
+        finally:
+            cursor.close()
 
-    def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
-        try:
-            for item in items:
-                vector = self.adjust_vector_length(item["vector"])
-                existing = (
-                    self.session.query(DocumentChunk)
-                    .filter(DocumentChunk.id == item["id"])
-                    .first()
+    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
+        with self.get_session() as session:
+            try:
+                self.create_partition(session, collection_name)
+                self.copy_items(session, "document_chunk", collection_name, items)
+                session.commit()
+                log.info(
+                    f"Inserted {len(items)} items into collection '{collection_name}'."
                 )
-                if existing:
-                    existing.vector = vector
-                    existing.text = item["text"]
-                    existing.vmetadata = item["metadata"]
-                    existing.collection_name = (
-                        collection_name  # Update collection_name if necessary
+            except Exception as e:
+                session.rollback()
+                log.exception(f"Error during insert: {e}")
+                raise
+
+    def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        with self.get_session() as session:
+            try:
+                # ON CONFLICT can't update the same row twice, the last item wins
+                items = list({item["id"]: item for item in items}.values())
+
+                self.create_partition(session, collection_name)
+                session.execute(
+                    text(
+                        "CREATE TEMP TABLE document_chunk_staging "
+                        "(LIKE document_chunk INCLUDING DEFAULTS) ON COMMIT DROP;"
                     )
+                )
+                self.copy_items(
+                    session, "document_chunk_staging", collection_name, items
+                )
+
+                if self.partitioned:
+                    conflict = "(collection_name, id)"
+                    updates = ""
                 else:
-                    new_chunk = DocumentChunk(
-                        id=item["id"],
-                        vector=vector,
-                        collection_name=collection_name,
-                        text=item["text"],
-                        vmetadata=item["metadata"],
+                    # Moves the item if it exists in another collection
+                    conflict = "(id)"
+                    updates = "collection_name = EXCLUDED.collection_name, "
+                session.execute(
+                    text(
+                        f"INSERT INTO document_chunk ({COPY_COLUMNS}) "
+                        f"SELECT {COPY_COLUMNS} FROM document_chunk_staging "
+                        f"ON CONFLICT {conflict} DO UPDATE SET {updates}"
+                        "vector = EXCLUDED.vector, text = EXCLUDED.text, "
+                        "vmetadata = EXCLUDED.vmetadata;"
                     )
-                    self.session.add(new_chunk)
-            self.session.commit()
-            log.info(
-                f"Upserted {len(items)} items into collection '{collection_name}'."
+                )
+                session.commit()
+                log.info(
+                    f"Upserted {len(items)} items into collection '{collection_name}'."
+                )
+            except Exception as e:
+                session.rollback()
+                log.exception(f"Error during upsert: {e}")
+                raise
+
+    def get_search_query(self, collection_name: str, q_vector, limit: Optional[int]):
+        distance = DocumentChunk.vector.cosine_distance(q_vector)
+        query = (
+            select(
+                DocumentChunk.id,
+                DocumentChunk.text,
+                DocumentChunk.vmetadata,
+                distance.label("distance"),
+            )
+            .where(DocumentChunk.collection_name == collection_name)
+            .order_by(distance)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    def get_quantized_search_query(self, collection_name: str, q_vector, limit: int):
+        """
+        Take the best `limit * VECTOR_DB_QUANTIZATION_OVERSAMPLING` candidates
+        by the quantized distance the vector index is built on, then order
+        them by the exact cosine distance of the full vectors.
+        """
+        if self.index_quantization == "binary":
+            bit = BIT(VECTOR_LENGTH)
+            approximate = cast(
+                func.binary_quantize(DocumentChunk.vector), bit
+            ).hamming_distance(cast(func.binary_quantize(q_vector), bit))
+        else:
+            halfvec = HALFVEC(VECTOR_LENGTH)
+            approximate = cast(DocumentChunk.vector, halfvec).cosine_distance(
+                cast(q_vector, halfvec)
             )
-        except Exception as e:
-            self.session.rollback()
-            log.exception(f"Error during upsert: {e}")
-            raise
+
+        candidates = (
+            select(
+                DocumentChunk.id,
+                DocumentChunk.text,
+                DocumentChunk.vmetadata,
+                DocumentChunk.vector,
+            )
+            .where(DocumentChunk.collection_name == collection_name)
+            .order_by(approximate)
+            .limit(get_candidate_limit(limit))
+            .lateral("candidates")
+        )
+        distance = candidates.c.vector.cosine_distance(q_vector)
+        return (
+            select(
+                candidates.c.id,
+                candidates.c.text,
+                candidates.c.vmetadata,
+                distance.label("distance"),
+            )
+            .order_by(distance)
+            .limit(limit)
+        )
 
     def search(
         self,
@@ -204,146 +519,158 @@ class PgvectorClient:
         vectors: List[List[float]],
         limit: Optional[int] = None,
     ) -> Optional[SearchResult]:
-        try:
-            if not vectors:
-                return None
-
-            # Adjust query vectors to VECTOR_LENGTH
-            vectors = [self.adjust_vector_length(vector) for vector in vectors]
-            num_queries = len(vectors)
-
-            def vector_expr(vector):
-                return cast(array(vector), Vector(VECTOR_LENGTH))
-
-            # Create the values for query vectors
-            qid_col = column("qid", Integer)
-            q_vector_col = column("q_vector", Vector(VECTOR_LENGTH))
-            query_vectors = (
-                values(qid_col, q_vector_col)
-                .data(
-                    [(idx, vector_expr(vector)) for idx, vector in enumerate(vectors)]
+        with self.get_session() as session:
+            try:
+                if not vectors:
+                    return None
+
+                # Adjust query vectors to VECTOR_LENGTH
+                vectors = [self.adjust_vector_length(vector) for vector in vectors]
+                num_queries = len(vectors)
+
+                quantized = bool(self.index_quantization) and limit is not None
+                if PGVECTOR_INDEX_TYPE == "hnsw":
+                    # HNSW returns at most ef_search candidates per query
+                    ef_search = max(
+                        PGVECTOR_HNSW_EF_SEARCH,
+                        get_candidate_limit(limit) if quantized else limit or 0,
+                    )
+                    session.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search};"))
+
+                def vector_expr(vector):
+                    return cast(array(vector), Vector(VECTOR_LENGTH))
+
+                # Create the values for query vectors
+                qid_col = column("qid", Integer)
+                q_vector_col = column("q_vector", Vector(VECTOR_LENGTH))
+                query_vectors = (
+                    values(qid_col, q_vector_col)
+                    .data(
+                        [
+                            (idx, vector_expr(vector))
+                            for idx, vector in enumerate(vectors)
+                        ]
+                    )
+                    .alias("query_vectors")
                 )
-                .alias("query_vectors")
-            )
 
-            # Build the lateral subquery for each query vector
-            subq = (
-                select(
-                    DocumentChunk.id,
-                    DocumentChunk.text,
-                    DocumentChunk.vmetadata,
-                    (
-                        DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)
-                    ).label("distance"),
-                )
-                .where(DocumentChunk.collection_name == collection_name)
-                .order_by(
-                    (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector))
-                )
-            )
-            if limit is not None:
-                subq = subq.limit(limit)
-            subq = subq.lateral("result")
-
-            # Build the main query by joining query_vectors and the lateral subquery
-            stmt = (
-                select(
-                    query_vectors.c.qid,
-                    subq.c.id,
-                    subq.c.text,
-                    subq.c.vmetadata,
-                    subq.c.distance,
+                # Build the lateral subquery for each query vector
+                if quantized:
+                    subq = self.get_quantized_search_query(
+                        collection_name, query_vectors.c.q_vector, limit
+                    )
+                else:
+                    subq = self.get_search_query(
+                        collection_name, query_vectors.c.q_vector, limit
+                    )
+                subq = subq.lateral("result")
+
+                # Build the main query by joining query_vectors and the lateral subquery
+                stmt = (
+                    select(
+                        query_vectors.c.qid,
+                        subq.c.id,
+                        subq.c.text,
+                        subq.c.vmetadata,
+                        subq.c.distance,
+                    )
+                    .select_from(query_vectors)
+                    .join(subq, true())
+                    .order_by(query_vectors.c.qid, subq.c.distance)
                 )
-                .select_from(query_vectors)
-                .join(subq, true())
-                .order_by(query_vectors.c.qid, subq.c.distance)
-            )
 
-            result_proxy = self.session.execute(stmt)
-            results = result_proxy.all()
+                result_proxy = session.execute(stmt)
+                results = result_proxy.all()
 
-            ids = [[] for _ in range(num_queries)]
-            distances = [[] for _ in range(num_queries)]
-            documents = [[] for _ in range(num_queries)]
-            metadatas = [[] for _ in range(num_queries)]
+                ids = [[] for _ in range(num_queries)]
+                distances = [[] for _ in range(num_queries)]
+                documents = [[] for _ in range(num_queries)]
+                metadatas = [[] for _ in range(num_queries)]
+
+                if not results:
+                    return SearchResult(
+                        ids=ids,
+                        distances=distances,
+                        documents=documents,
+                        metadatas=metadatas,
+                    )
+
+                for row in results:
+                    qid = int(row.qid)
+                    ids[qid].append(row.id)
+                    distances[qid].append(row.distance)
+                    documents[qid].append(row.text)
+                    metadatas[qid].append(row.vmetadata)
 
-            if not results:
                 return SearchResult(
                     ids=ids,
                     distances=distances,
                     documents=documents,
                     metadatas=metadatas,
                 )
-
-            for row in results:
-                qid = int(row.qid)
-                ids[qid].append(row.id)
-                distances[qid].append(row.distance)
-                documents[qid].append(row.text)
-                metadatas[qid].append(row.vmetadata)
-
-            return SearchResult(
-                ids=ids, distances=distances, documents=documents, metadatas=metadatas
-            )
-        except Exception as e:
-            log.exception(f"Error during search: {e}")
-            return None
+            except Exception as e:
+                log.exception(f"Error during search: {e}")
+                return None
 
     def query(
         self, collection_name: str, filter: Dict[str, Any], limit: Optional[int] = None
     ) -> Optional[GetResult]:
-        try:
-            query = self.session.query(DocumentChunk).filter(
-                DocumentChunk.collection_name == collection_name
-            )
+        with self.get_session() as session:
+            try:
+                query = session.query(DocumentChunk).filter(
+                    DocumentChunk.collection_name == collection_name
+                )
 
-            for key, value in filter.items():
-                query = query.filter(DocumentChunk.vmetadata[key].astext == str(value))
+                for key, value in filter.items():
+                    query = query.filter(
+                        DocumentChunk.vmetadata[key].astext == str(value)
+                    )
 
-            if limit is not None:
-                query = query.limit(limit)
+                if limit is not None:
+                    query = query.limit(limit)
 
-            results = query.all()
+                results = query.all()
 
-            if not results:
-                return None
+                if not results:
+                    return None
 
-            ids = [[result.id for result in results]]
-            documents = [[result.text for result in results]]
-            metadatas = [[result.vmetadata for result in results]]
+                ids = [[result.id for result in results]]
+                documents = [[result.text for result in results]]
+                metadatas = [[result.vmetadata for result in results]]
 
-            return GetResult(
-                ids=ids,
-                documents=documents,
-                metadatas=metadatas,
-            )
-        except Exception as e:
-            log.exception(f"Error during query: {e}")
-            return None
+                return GetResult(
+                    ids=ids,
+                    documents=documents,
+                    metadatas=metadatas,
+                )
+            except Exception as e:
+                log.exception(f"Error during query: {e}")
+                return None
 
     def get(
         self, collection_name: str, limit: Optional[int] = None
     ) -> Optional[GetResult]:
-        try:
-            query = self.session.query(DocumentChunk).filter(
-                DocumentChunk.collection_name == collection_name
-            )
-            if limit is not None:
-                query = query.limit(limit)
+        with self.get_session() as session:
+            try:
+                query = session.query(DocumentChunk).filter(
+                    DocumentChunk.collection_name == collection_name
+                )
+                if limit is not None:
+                    query = query.limit(limit)
 
-            results = query.all()
+                results = query.all()
 
-            if not results:
-                return None
+                if not results:
+                    return None
 
-            ids = [[result.id for result in results]]
-            documents = [[result.text for result in results]]
-            metadatas = [[result.vmetadata for result in results]]
+                ids = [[result.id for result in results]]
+                documents = [[result.text for result in results]]
+                metadatas = [[result.vmetadata for result in results]]
 
-            return GetResult(ids=ids, documents=documents, metadatas=metadatas)
-        except Exception as e:
-            log.exception(f"Error during get: {e}")
-            return None
+                return GetResult(ids=ids, documents=documents, metadatas=metadatas)
+            except Exception as e:
+                log.exception(f"Error during get: {e}")
+                return None
 
     def delete(
         self,
@@ -351,53 +678,82 @@ class PgvectorClient:
         ids: Optional[List[str]] = None,
         filter: Optional[Dict[str, Any]] = None,
     ) -> None:
-        try:
-            query = self.session.query(DocumentChunk).filter(
-                DocumentChunk.collection_name == collection_name
-            )
-            if ids:
-                query = query.filter(DocumentChunk.id.in_(ids))
-            if filter:
-                for key, value in filter.items():
-                    query = query.filter(
-                        DocumentChunk.vmetadata[key].astext == str(value)
-                    )
-            deleted = query.delete(synchronize_session=False)
-            self.session.commit()
-            log.info(f"Deleted {deleted} items from collection '{collection_name}'.")
-        except Exception as e:
-            self.session.rollback()
-            log.exception(f"Error during delete: {e}")
-            raise
+        with self.get_session() as session:
+            try:
+                query = session.query(DocumentChunk).filter(
+                    DocumentChunk.collection_name == collection_name
+                )
+                if ids:
+                    query = query.filter(DocumentChunk.id.in_(ids))
+                if filter:
+                    for key, value in filter.items():
+                        query = query.filter(
+                            DocumentChunk.vmetadata[key].astext == str(value)
+                        )
+                deleted = query.delete(synchronize_session=False)
+                session.commit()
+                log.info(
+                    f"Deleted {deleted} items from collection '{collection_name}'."
+                )
+            except Exception as e:
+                session.rollback()
+                log.exception(f"Error during delete: {e}")
+                raise
 
     def reset(self) -> None:
-        try:
-            deleted = self.session.query(DocumentChunk).delete()
-            self.session.commit()
-            log.info(
-                f"Reset complete. Deleted {deleted} items from 'document_chunk' table."
-            )
-        except Exception as e:
-            self.session.rollback()
-            log.exception(f"Error during reset: {e}")
-            raise
+        with self.get_session() as session:
+            try:
+                if self.partitioned:
+                    for (partition,) in session.execute(
+                        text(
+                            "SELECT inhrelid::regclass::text FROM pg_inherits "
+                            "WHERE inhparent = 'document_chunk'::regclass "
+                            "AND inhrelid <> 'document_chunk_default'::regclass;"
+                        )
+                    ).all():
+                        session.execute(text(f"DROP TABLE IF EXISTS {partition};"))
+
+                deleted = session.query(DocumentChunk).delete()
+                session.commit()
+                log.info(
+                    f"Reset complete. Deleted {deleted} items from 'document_chunk' table."
+                )
+            except Exception as e:
+                session.rollback()
+                log.exception(f"Error during reset: {e}")
+                raise
 
     def close(self) -> None:
-        pass
+        self.engine.dispose()
 
     def has_collection(self, collection_name: str) -> bool:
-        try:
-            exists = (
-                self.session.query(DocumentChunk)
-                .filter(DocumentChunk.collection_name == collection_name)
-                .first()
-                is not None
-            )
-            return exists
-        except Exception as e:
-            log.exception(f"Error checking collection existence: {e}")
-            return False
+        with self.get_session() as session:
+            try:
+                exists = (
+                    session.query(DocumentChunk)
+                    .filter(DocumentChunk.collection_name == collection_name)
+                    .first()
+                    is not None
+                )
+                return exists
+            except Exception as e:
+                log.exception(f"Error checking collection existence: {e}")
+                return False
 
     def delete_collection(self, collection_name: str) -> None:
+        if self.partitioned:
+            with self.get_session() as session:
+                try:
+                    session.execute(
+                        text(
+                            f"DROP TABLE IF EXISTS {self.get_partition_name(collection_name)};"
+                        )
+                    )
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    log.exception(f"Error during delete_collection: {e}")
+                    raise
+
         self.delete(collection_name)
         log.info(f"Collection '{collection_name}' deleted.")
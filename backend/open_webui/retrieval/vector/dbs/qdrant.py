@@ -6,7 +6,12 @@ from qdrant_client.http.models import PointStruct
 from qdrant_client.models import models
 
 from open_webui.retrieval.vector.main import VectorItem, SearchResult, GetResult
-from open_webui.config import QDRANT_URI, QDRANT_API_KEY
+from open_webui.config import (
+    QDRANT_URI,
+    QDRANT_API_KEY,
+    VECTOR_DB_QUANTIZATION,
+    VECTOR_DB_QUANTIZATION_OVERSAMPLING,
+)
 from open_webui.env import SRC_LOG_LEVELS
 
 NO_LIMIT = 999999999
@@ -45,13 +50,31 @@ class QdrantClient:
             }
         )
 
+    def _get_quantization_config(self):
+        # The quantized vectors stay in RAM, the originals on disk for re-scoring
+        if VECTOR_DB_QUANTIZATION == "int8":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8, always_ram=True
+                )
+            )
+        if VECTOR_DB_QUANTIZATION == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=True)
+            )
+        return None
+
     def _create_collection(self, collection_name: str, dimension: int):
         collection_name_with_prefix = f"{self.collection_prefix}_{collection_name}"
+        quantization_config = self._get_quantization_config()
         self.client.create_collection(
             collection_name=collection_name_with_prefix,
             vectors_config=models.VectorParams(
-                size=dimension, distance=models.Distance.COSINE
+                size=dimension,
+                distance=models.Distance.COSINE,
+                on_disk=quantization_config is not None,
             ),
+            quantization_config=quantization_config,
         )
 
         log.info(f"collection {collection_name_with_prefix} successfully created!")
@@ -89,19 +112,36 @@ class QdrantClient:
         if limit is None:
             limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
 
-        query_response = self.client.query_points(
+        search_params = None
+        if VECTOR_DB_QUANTIZATION:
+            search_params = models.SearchParams(
+                quantization=models.QuantizationSearchParams(
+                    rescore=True, oversampling=VECTOR_DB_QUANTIZATION_OVERSAMPLING
+                )
+            )
+
+        responses = self.client.query_batch_points(
             collection_name=f"{self.collection_prefix}_{collection_name}",
-            query=vectors[0],
-            limit=limit,
-        )
-        get_result = self._result_to_get_result(query_response.points)
-        return SearchResult(
-            ids=get_result.ids,
-            documents=get_result.documents,
-            metadatas=get_result.metadatas,
-            distances=[[point.score for point in query_response.points]],
+            requests=[
+                models.QueryRequest(
+                    query=vector,
+                    limit=limit,
+                    params=search_params,
+                    with_payload=True,
+                )
+                for vector in vectors
+            ],
         )
 
+        result = {"ids": [], "distances": [], "documents": [], "metadatas": []}
+        for response in responses:
+            get_result = self._result_to_get_result(response.points)
+            result["ids"].extend(get_result.ids)
+            result["documents"].extend(get_result.documents)
+            result["metadatas"].extend(get_result.metadatas)
+            result["distances"].append([point.score for point in response.points])
+        return SearchResult(**result)
+
     def query(self, collection_name: str, filter: dict, limit: Optional[int] = None):
         # Construct the filter string for querying
         if not self.has_collection(collection_name):
@@ -0,0 +1,82 @@
+"""
+Quantized codes for the first pass of a vector search.
+
+int8 codes keep 8 bits per dimension of a normalized vector and rank almost
+like float32 at a quarter of the size; binary codes keep only the sign of
+every dimension (1/32 of the size) and are compared by Hamming distance.
+Either way the best `limit * VECTOR_DB_QUANTIZATION_OVERSAMPLING` candidates
+are re-scored with the full-precision vectors.
+"""
+
+import math
+
+import numpy as np
+
+from open_webui.config import (
+    VECTOR_DB_QUANTIZATION,
+    VECTOR_DB_QUANTIZATION_OVERSAMPLING,
+)
+
+INT8_SCALE = 127.0
+# Set bits of every byte value, for numpy releases without np.bitwise_count
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(
+    axis=1, dtype=np.uint8
+)
+bitwise_count = getattr(np, "bitwise_count", POPCOUNT.__getitem__)
+
+
+def normalize(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def get_candidate_limit(
+    limit: int, oversampling: float = VECTOR_DB_QUANTIZATION_OVERSAMPLING
+) -> int:
+    """Number of first-pass candidates to re-score for `limit` results."""
+    return max(limit, math.ceil(limit * oversampling))
+
+
+def get_method(codes: np.ndarray) -> str:
+    return "int8" if codes.dtype == np.int8 else "binary"
+
+
+def quantize(vectors: np.ndarray, method: str = VECTOR_DB_QUANTIZATION) -> np.ndarray:
+    """Codes of normalized vectors, (n, dim) int8 or (n, ceil(dim / 8)) packed bits."""
+    if method == "int8":
+        return np.clip(np.rint(vectors * INT8_SCALE), -127, 127).astype(np.int8)
+    if method == "binary":
+        return np.packbits(vectors > 0, axis=-1)
+    raise ValueError(f"Unknown quantization method: {method}")
+
+
+def score(codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """
+    Approximate similarity of every normalized query (rows) to every code
+    (columns), higher is better.
+    """
+    if get_method(codes) == "int8":
+        return queries @ codes.T.astype(np.float32)
+
+    # Negated Hamming distance between the sign bits
+    query_codes = quantize(queries, "binary")
+    distances = bitwise_count(query_codes[:, None, :] ^ codes[None, :, :]).sum(
+        axis=-1, dtype=np.int32
+    )
+    return -distances.astype(np.float32)
+
+
+def rescore(
+    query: np.ndarray, vectors: np.ndarray, limit: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Indices and cosine similarities of the best `limit` candidate vectors,
+    best first, for a normalized query.
+    """
+    scores = normalize(vectors) @ query if len(vectors) else np.empty(0)
+    best = np.argsort(-scores, kind="stable")[:limit]
+    return best, scores[best]
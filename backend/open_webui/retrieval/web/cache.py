@@ -0,0 +1,232 @@
+import hashlib
+import json
+import logging
+import time
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from langchain_core.documents import Document
+
+from open_webui.retrieval.sqlite import connect
+from open_webui.config import (
+    RAG_WEB_FETCH_CACHE_DEFAULT_TTL,
+    RAG_WEB_FETCH_CACHE_MAX_SIZE,
+    WEB_FETCH_CACHE_PATH,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def normalize_url(url: str) -> str:
+    """Lowercase scheme and host, drop default ports and fragments, sort the query."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.hostname or ""
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        netloc = f"{netloc}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+def get_content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def with_content_hash(document: Document) -> Document:
+    document.metadata["content_hash"] = get_content_hash(document.page_content)
+    return document
+
+
+def get_expires_at(headers: Mapping[str, str], default_ttl: int) -> Optional[float]:
+    """Time until which a response may be served without revalidation, None if it may not be stored."""
+    headers = {key.lower(): value for key, value in headers.items()}
+
+    directives = {}
+    for directive in headers.get("cache-control", "").lower().split(","):
+        key, _, value = directive.strip().partition("=")
+        directives[key] = value.strip('"')
+
+    now = time.time()
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return now
+
+    for key in ("s-maxage", "max-age"):
+        if directives.get(key, "").isdigit():
+            return now + int(directives[key])
+
+    if headers.get("expires"):
+        try:
+            return parsedate_to_datetime(headers["expires"]).timestamp()
+        except Exception:
+            return now
+
+    return now + default_ttl
+
+
+class CachedPage:
+    def __init__(
+        self,
+        documents: list[Document],
+        etag: Optional[str],
+        last_modified: Optional[str],
+        expires_at: float,
+    ):
+        self.documents = documents
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    def is_fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+    def get_validator_headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class WebFetchCache:
+    """
+    Disk cache of fetched and extracted web pages, keyed by normalized URL
+    and by the loader that extracted them.
+
+    Pages are fresh for as long as their Cache-Control / Expires headers
+    allow (`default_ttl` seconds without either) and are revalidated with
+    If-None-Match / If-Modified-Since afterwards; no-store responses are never
+    kept. Once the stored text exceeds `max_size` bytes the least recently
+    used pages are evicted.
+    """
+
+    def __init__(self, path: str, max_size: int, default_ttl: int):
+        self.path = path
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+
+        with connect(self.path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS page (
+                    url TEXT PRIMARY KEY,
+                    documents TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    expires_at REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS page_accessed_at ON page (accessed_at)"
+            )
+
+    @staticmethod
+    def _key(url: str, loader: str) -> str:
+        return f"{loader}:{normalize_url(url)}"
+
+    def get(self, url: str, loader: str) -> Optional[CachedPage]:
+        key = self._key(url, loader)
+        with connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT documents, etag, last_modified, expires_at FROM page WHERE url = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                "UPDATE page SET accessed_at = ? WHERE url = ?", (time.time(), key)
+            )
+
+        documents, etag, last_modified, expires_at = row
+        return CachedPage(
+            documents=[Document(**document) for document in json.loads(documents)],
+            etag=etag,
+            last_modified=last_modified,
+            expires_at=expires_at,
+        )
+
+    def set(
+        self,
+        url: str,
+        loader: str,
+        documents: list[Document],
+        headers: Optional[Mapping[str, str]] = None,
+    ):
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+        expires_at = get_expires_at(headers, self.default_ttl)
+        if expires_at is None:
+            return
+
+        data = json.dumps(
+            [
+                {"page_content": document.page_content, "metadata": document.metadata}
+                for document in documents
+            ],
+            default=str,
+        )
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO page VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self._key(url, loader),
+                    data,
+                    headers.get("etag"),
+                    headers.get("last-modified"),
+                    expires_at,
+                    len(data),
+                    time.time(),
+                ),
+            )
+            self._evict(conn)
+
+    def revalidate(self, url: str, loader: str, headers: Mapping[str, str]):
+        """Extend the freshness of a page after a 304 Not Modified response."""
+        key = self._key(url, loader)
+        expires_at = get_expires_at(headers, self.default_ttl)
+        with connect(self.path) as conn:
+            if expires_at is None:
+                conn.execute("DELETE FROM page WHERE url = ?", (key,))
+            else:
+                conn.execute(
+                    "UPDATE page SET expires_at = ? WHERE url = ?", (expires_at, key)
+                )
+
+    def _evict(self, conn):
+        (size,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM page").fetchone()
+        if size <= self.max_size:
+            return
+
+        # Evict down to 90% so we don't evict on every insert
+        overflow = size - int(self.max_size * 0.9)
+        evicted = 0
+        urls = []
+        for url, page_size in conn.execute(
+            "SELECT url, size FROM page ORDER BY accessed_at"
+        ):
+            if evicted >= overflow:
+                break
+            urls.append((url,))
+            evicted += page_size
+
+        conn.executemany("DELETE FROM page WHERE url = ?", urls)
+        log.debug(f"Evicted {len(urls)} pages ({evicted} bytes) from web fetch cache")
+
+
+WEB_FETCH_CACHE = (
+    WebFetchCache(
+        WEB_FETCH_CACHE_PATH,
+        max_size=RAG_WEB_FETCH_CACHE_MAX_SIZE,
+        default_ttl=RAG_WEB_FETCH_CACHE_DEFAULT_TTL,
+    )
+    if RAG_WEB_FETCH_CACHE_MAX_SIZE > 0
+    else None
+)
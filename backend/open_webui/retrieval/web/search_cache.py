@@ -0,0 +1,199 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Optional
+
+from open_webui.retrieval.sqlite import connect
+from open_webui.config import (
+    RAG_WEB_SEARCH_CACHE_MAX_COLLECTIONS,
+    RAG_WEB_SEARCH_CACHE_RETENTION,
+    RAG_WEB_SEARCH_CACHE_SWEEP_INTERVAL,
+    RAG_WEB_SEARCH_CACHE_TTL,
+    WEB_SEARCH_CACHE_PATH,
+)
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.retrieval.bm25 import BM25_INDEX
+from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def normalize_queries(queries: list[str]) -> list[str]:
+    """Casefold and collapse whitespace, ignoring duplicates and order."""
+    return sorted({" ".join(query.casefold().split()) for query in queries} - {""})
+
+
+def get_web_search_collection_name(engine: str, queries: list[str]) -> str:
+    key = "\n".join([engine, *normalize_queries(queries)])
+    return f"web-search-{hashlib.sha256(key.encode()).hexdigest()}"[:63]
+
+
+class WebSearchCache:
+    """
+    Registry of the vector DB collections created for web searches.
+
+    A collection is reused for `ttl` seconds after it was created, unless it
+    holds partial results or was embedded with another embedding engine or
+    model. Every collection is registered, reusable or not;
+    those neither reused nor retrieved from for `retention` seconds, and the
+    least recently used ones beyond `max_collections`, are returned by
+    `pop_stale` to be deleted.
+    """
+
+    def __init__(self, path: str, ttl: int, retention: int, max_collections: int):
+        self.path = path
+        self.ttl = ttl
+        self.retention = retention
+        self.max_collections = max_collections
+
+        with connect(self.path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS search (
+                    collection_name TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    embedding_config TEXT NOT NULL,
+                    reusable INTEGER NOT NULL DEFAULT 1
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS search_accessed_at ON search (accessed_at)"
+            )
+
+    def get(self, collection_name: str, embedding_config: str) -> Optional[dict]:
+        """The result of a search created within the TTL with the same embedding config."""
+        now = time.time()
+        with connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT result FROM search "
+                "WHERE collection_name = ? AND created_at > ? "
+                "AND embedding_config = ? AND reusable",
+                (collection_name, now - self.ttl, embedding_config),
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                "UPDATE search SET accessed_at = ? WHERE collection_name = ?",
+                (now, collection_name),
+            )
+        return json.loads(row[0])
+
+    def set(
+        self,
+        collection_name: str,
+        result: dict,
+        embedding_config: str,
+        reusable: bool = True,
+    ):
+        now = time.time()
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO search VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    collection_name,
+                    json.dumps(result),
+                    now,
+                    now,
+                    embedding_config,
+                    int(reusable),
+                ),
+            )
+
+    def touch(self, collection_names: list[str]):
+        """Mark collections as used, e.g. when a chat retrieves from them."""
+        with connect(self.path) as conn:
+            conn.executemany(
+                "UPDATE search SET accessed_at = ? WHERE collection_name = ?",
+                [
+                    (time.time(), collection_name)
+                    for collection_name in collection_names
+                ],
+            )
+
+    def delete(self, collection_name: str):
+        with connect(self.path) as conn:
+            conn.execute(
+                "DELETE FROM search WHERE collection_name = ?", (collection_name,)
+            )
+
+    def pop_stale(self) -> list[str]:
+        """Remove and return the collections that should be deleted."""
+        with connect(self.path) as conn:
+            stale = [
+                row[0]
+                for row in conn.execute(
+                    """
+                    SELECT collection_name FROM search
+                    WHERE accessed_at < ? OR collection_name NOT IN (
+                        SELECT collection_name FROM search
+                        ORDER BY accessed_at DESC LIMIT ?
+                    )
+                    """,
+                    (time.time() - self.retention, self.max_collections),
+                )
+            ]
+            conn.executemany(
+                "DELETE FROM search WHERE collection_name = ?",
+                [(collection_name,) for collection_name in stale],
+            )
+        return stale
+
+
+WEB_SEARCH_CACHE = WebSearchCache(
+    WEB_SEARCH_CACHE_PATH,
+    ttl=RAG_WEB_SEARCH_CACHE_TTL,
+    retention=RAG_WEB_SEARCH_CACHE_RETENTION,
+    max_collections=RAG_WEB_SEARCH_CACHE_MAX_COLLECTIONS,
+)
+
+
+def get_cached_web_search(
+    collection_name: str, embedding_config: str
+) -> Optional[dict]:
+    """
+    The cached result for a web search collection, if it is fresh, was
+    embedded with `embedding_config` and still exists.
+    """
+    if RAG_WEB_SEARCH_CACHE_TTL <= 0:
+        return None
+
+    result = WEB_SEARCH_CACHE.get(collection_name, embedding_config)
+    if result is None:
+        return None
+
+    if not VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+        WEB_SEARCH_CACHE.delete(collection_name)
+        return None
+
+    return result
+
+
+def sweep_web_search_collections() -> int:
+    """Delete stale web search collections, returns how many were deleted."""
+    stale = WEB_SEARCH_CACHE.pop_stale()
+    for collection_name in stale:
+        try:
+            if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+                VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+            BM25_INDEX.delete_collection(collection_name)
+        except Exception as e:
+            log.warning(f"Error deleting web search collection {collection_name}: {e}")
+    return len(stale)
+
+
+async def periodic_web_search_cache_sweep():
+    while True:
+        await asyncio.sleep(RAG_WEB_SEARCH_CACHE_SWEEP_INTERVAL)
+        try:
+            deleted = await asyncio.to_thread(sweep_web_search_collections)
+            if deleted:
+                log.info(f"Deleted {deleted} stale web search collections")
+        except Exception as e:
+            log.exception(f"Error sweeping web search collections: {e}")
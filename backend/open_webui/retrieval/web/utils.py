@@ -16,6 +16,8 @@ from typing import (
     Sequence,
     Union,
     Literal,
+    Mapping,
+    Tuple,
 )
 import aiohttp
 import certifi
@@ -33,6 +35,7 @@ from open_webui.config import (
     FIRECRAWL_API_KEY,
 )
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.retrieval.web.cache import WEB_FETCH_CACHE, with_content_hash
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
@@ -95,6 +98,18 @@ def extract_metadata(soup, url):
     return metadata
 
 
+def get_fresh_cached_documents(url: str, loader: str) -> Optional[List[Document]]:
+    """Documents of `url` from the web fetch cache, if they don't need revalidation."""
+    if WEB_FETCH_CACHE is None:
+        return None
+
+    cached = WEB_FETCH_CACHE.get(url, loader)
+    if cached and cached.is_fresh():
+        log.debug(f"Web fetch cache hit for {url}")
+        return cached.documents
+    return None
+
+
 def verify_ssl_cert(url: str) -> bool:
     """Verify SSL certificate for the given URL."""
     if not url.startswith("https://"):
@@ -173,15 +188,18 @@ class SafeFireCrawlLoader(BaseLoader):
         """Load documents concurrently using FireCrawl."""
         for url in self.web_paths:
             try:
-                self._safe_process_url_sync(url)
-                loader = FireCrawlLoader(
-                    url=url,
-                    api_key=self.api_key,
-                    api_url=self.api_url,
-                    mode=self.mode,
-                    params=self.params,
-                )
-                yield from loader.lazy_load()
+                documents = get_fresh_cached_documents(url, self.cache_loader)
+                if documents is None:
+                    self._safe_process_url_sync(url)
+                    loader = FireCrawlLoader(
+                        url=url,
+                        api_key=self.api_key,
+                        api_url=self.api_url,
+                        mode=self.mode,
+                        params=self.params,
+                    )
+                    documents = self._cache_documents(url, loader.lazy_load())
+                yield from documents
             except Exception as e:
                 if self.continue_on_failure:
                     log.exception(e, "Error loading %s", url)
@@ -192,15 +210,24 @@ class SafeFireCrawlLoader(BaseLoader):
         """Async version of lazy_load."""
         for url in self.web_paths:
             try:
-                await self._safe_process_url(url)
-                loader = FireCrawlLoader(
-                    url=url,
-                    api_key=self.api_key,
-                    api_url=self.api_url,
-                    mode=self.mode,
-                    params=self.params,
+                documents = await asyncio.to_thread(
+                    get_fresh_cached_documents, url, self.cache_loader
                 )
-                async for document in loader.alazy_load():
+                if documents is None:
+                    await self._safe_process_url(url)
+                    loader = FireCrawlLoader(
+                        url=url,
+                        api_key=self.api_key,
+                        api_url=self.api_url,
+                        mode=self.mode,
+                        params=self.params,
+                    )
+                    documents = await asyncio.to_thread(
+                        self._cache_documents,
+                        url,
+                        [document async for document in loader.alazy_load()],
+                    )
+                for document in documents:
                     yield document
             except Exception as e:
                 if self.continue_on_failure:
@@ -208,6 +235,17 @@ class SafeFireCrawlLoader(BaseLoader):
                     continue
                 raise e
 
+    @property
+    def cache_loader(self) -> str:
+        return f"firecrawl-{self.mode}"
+
+    def _cache_documents(self, url: str, documents) -> List[Document]:
+        # FireCrawl doesn't pass on the page's caching headers, so the default TTL applies
+        documents = [with_content_hash(document) for document in documents]
+        if WEB_FETCH_CACHE is not None and documents:
+            WEB_FETCH_CACHE.set(url, self.cache_loader, documents)
+        return documents
+
     def _verify_ssl_cert(self, url: str) -> bool:
         return verify_ssl_cert(url)
 
@@ -309,6 +347,11 @@ class SafePlaywrightURLLoader(PlaywrightURLLoader):
 
             for url in self.urls:
                 try:
+                    documents = get_fresh_cached_documents(url, "playwright")
+                    if documents is not None:
+                        yield from documents
+                        continue
+
                     self._safe_process_url_sync(url)
                     page = browser.new_page()
                     response = page.goto(url)
@@ -317,7 +360,9 @@ class SafePlaywrightURLLoader(PlaywrightURLLoader):
 
                     text = self.evaluator.evaluate(page, browser, response)
                     metadata = {"source": url}
-                    yield Document(page_content=text, metadata=metadata)
+                    yield self._cache_document(
+                        url, Document(page_content=text, metadata=metadata), response
+                    )
                 except Exception as e:
                     if self.continue_on_failure:
                         log.exception(e, "Error loading %s", url)
@@ -340,6 +385,14 @@ class SafePlaywrightURLLoader(PlaywrightURLLoader):
 
             for url in self.urls:
                 try:
+                    documents = await asyncio.to_thread(
+                        get_fresh_cached_documents, url, "playwright"
+                    )
+                    if documents is not None:
+                        for document in documents:
+                            yield document
+                        continue
+
                     await self._safe_process_url(url)
                     page = await browser.new_page()
                     response = await page.goto(url)
@@ -348,7 +401,12 @@ class SafePlaywrightURLLoader(PlaywrightURLLoader):
 
                     text = await self.evaluator.evaluate_async(page, browser, response)
                     metadata = {"source": url}
-                    yield Document(page_content=text, metadata=metadata)
+                    yield await asyncio.to_thread(
+                        self._cache_document,
+                        url,
+                        Document(page_content=text, metadata=metadata),
+                        response,
+                    )
                 except Exception as e:
                     if self.continue_on_failure:
                         log.exception(e, "Error loading %s", url)
@@ -356,6 +414,12 @@ class SafePlaywrightURLLoader(PlaywrightURLLoader):
                     raise e
             await browser.close()
 
+    def _cache_document(self, url: str, document: Document, response) -> Document:
+        document = with_content_hash(document)
+        if WEB_FETCH_CACHE is not None and response.ok:
+            WEB_FETCH_CACHE.set(url, "playwright", [document], response.headers)
+        return document
+
     def _verify_ssl_cert(self, url: str) -> bool:
         return verify_ssl_cert(url)
 
@@ -405,90 +469,144 @@ class SafeWebBaseLoader(WebBaseLoader):
         self.trust_env = trust_env
 
     async def _fetch(
-        self, url: str, retries: int = 3, cooldown: int = 2, backoff: float = 1.5
-    ) -> str:
-        async with aiohttp.ClientSession(trust_env=self.trust_env) as session:
-            for i in range(retries):
-                try:
-                    kwargs: Dict = dict(
-                        headers=self.session.headers,
-                        cookies=self.session.cookies.get_dict(),
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        retries: int = 3,
+        cooldown: int = 2,
+        backoff: float = 1.5,
+    ) -> Tuple[int, str, Mapping[str, str]]:
+        """Fetch a url, returns the response status, text and headers."""
+        for i in range(retries):
+            try:
+                kwargs: Dict = dict(
+                    headers={**self.session.headers, **(headers or {})},
+                    cookies=self.session.cookies.get_dict(),
+                )
+                if not self.session.verify:
+                    kwargs["ssl"] = False
+
+                async with session.get(
+                    url, **(self.requests_kwargs | kwargs)
+                ) as response:
+                    if self.raise_for_status:
+                        response.raise_for_status()
+                    return response.status, await response.text(), response.headers
+            except aiohttp.ClientConnectionError as e:
+                if i == retries - 1:
+                    raise
+                else:
+                    log.warning(
+                        f"Error fetching {url} with attempt "
+                        f"{i + 1}/{retries}: {e}. Retrying..."
                     )
-                    if not self.session.verify:
-                        kwargs["ssl"] = False
-
-                    async with session.get(
-                        url, **(self.requests_kwargs | kwargs)
-                    ) as response:
-                        if self.raise_for_status:
-                            response.raise_for_status()
-                        return await response.text()
-                except aiohttp.ClientConnectionError as e:
-                    if i == retries - 1:
-                        raise
-                    else:
-                        log.warning(
-                            f"Error fetching {url} with attempt "
-                            f"{i + 1}/{retries}: {e}. Retrying..."
-                        )
-                        await asyncio.sleep(cooldown * backoff**i)
+                    await asyncio.sleep(cooldown * backoff**i)
         raise ValueError("retry count exceeded")
 
-    def _unpack_fetch_results(
-        self, results: Any, urls: List[str], parser: Union[str, None] = None
-    ) -> List[Any]:
-        """Unpack fetch results into BeautifulSoup objects."""
+    def _build_document(self, url: str, html: str) -> Document:
         from bs4 import BeautifulSoup
 
-        final_results = []
-        for i, result in enumerate(results):
-            url = urls[i]
-            if parser is None:
-                if url.endswith(".xml"):
-                    parser = "xml"
-                else:
-                    parser = self.default_parser
-                self._check_parser(parser)
-            final_results.append(BeautifulSoup(result, parser, **self.bs_kwargs))
-        return final_results
-
-    async def ascrape_all(
-        self, urls: List[str], parser: Union[str, None] = None
-    ) -> List[Any]:
-        """Async fetch all urls, then return soups for all results."""
-        results = await self.fetch_all(urls)
-        return self._unpack_fetch_results(results, urls, parser=parser)
+        parser = "xml" if url.endswith(".xml") else self.default_parser
+        self._check_parser(parser)
+        soup = BeautifulSoup(html, parser, **self.bs_kwargs)
+
+        text = soup.get_text(**self.bs_get_text_kwargs)
+        return with_content_hash(
+            Document(page_content=text, metadata=extract_metadata(soup, url))
+        )
+
+    def _cache_document(
+        self, url: str, status: int, html: str, headers: Mapping[str, str], cached
+    ) -> List[Document]:
+        """Documents for a fetched page, a 304 response returns the revalidated cached ones."""
+        if cached is not None and status == 304:
+            log.debug(f"Web fetch cache revalidated {url}")
+            WEB_FETCH_CACHE.revalidate(url, "safe_web", headers)
+            return cached.documents
+
+        document = self._build_document(url, html)
+        if WEB_FETCH_CACHE is not None and status == 200:
+            WEB_FETCH_CACHE.set(url, "safe_web", [document], headers)
+        return [document]
+
+    def _get_cached(self, url: str):
+        cached = WEB_FETCH_CACHE.get(url, "safe_web") if WEB_FETCH_CACHE else None
+        if cached is not None and cached.is_fresh():
+            log.debug(f"Web fetch cache hit for {url}")
+        return cached
+
+    def _load_url(self, url: str) -> List[Document]:
+        cached = self._get_cached(url)
+        if cached is not None and cached.is_fresh():
+            return cached.documents
+
+        kwargs = dict(self.requests_kwargs)
+        if cached is not None:
+            kwargs["headers"] = {
+                **kwargs.get("headers", {}),
+                **cached.get_validator_headers(),
+            }
+
+        response = self.session.get(url, **kwargs)
+        if self.raise_for_status:
+            response.raise_for_status()
+        if self.encoding is not None:
+            response.encoding = self.encoding
+        elif self.autoset_encoding:
+            response.encoding = response.apparent_encoding
+
+        return self._cache_document(
+            url, response.status_code, response.text, response.headers, cached
+        )
+
+    async def _aload_url(
+        self,
+        session: aiohttp.ClientSession,
+        semaphore: asyncio.Semaphore,
+        url: str,
+    ) -> List[Document]:
+        # The cache is SQLite, keep its reads and writes off the event loop
+        cached = await asyncio.to_thread(self._get_cached, url)
+        if cached is not None and cached.is_fresh():
+            return cached.documents
+
+        async with semaphore:
+            status, html, headers = await self._fetch(
+                session,
+                url,
+                headers=cached.get_validator_headers() if cached else None,
+            )
+
+        return await asyncio.to_thread(
+            self._cache_document, url, status, html, headers, cached
+        )
 
     def lazy_load(self) -> Iterator[Document]:
         """Lazy load text from the url(s) in web_path with error handling."""
         for path in self.web_paths:
             try:
-                soup = self._scrape(path, bs_kwargs=self.bs_kwargs)
-                text = soup.get_text(**self.bs_get_text_kwargs)
-
-                # Build metadata
-                metadata = extract_metadata(soup, path)
-
-                yield Document(page_content=text, metadata=metadata)
+                yield from self._load_url(path)
             except Exception as e:
                 # Log the error and continue with the next URL
                 log.exception(e, "Error loading %s", path)
 
     async def alazy_load(self) -> AsyncIterator[Document]:
         """Async lazy load text from the url(s) in web_path."""
-        results = await self.ascrape_all(self.web_paths)
-        for path, soup in zip(self.web_paths, results):
-            text = soup.get_text(**self.bs_get_text_kwargs)
-            metadata = {"source": path}
-            if title := soup.find("title"):
-                metadata["title"] = title.get_text()
-            if description := soup.find("meta", attrs={"name": "description"}):
-                metadata["description"] = description.get(
-                    "content", "No description found."
-                )
-            if html := soup.find("html"):
-                metadata["language"] = html.get("lang", "No language found.")
-            yield Document(page_content=text, metadata=metadata)
+        # One session for all urls so connections to the same host are reused
+        async with aiohttp.ClientSession(trust_env=self.trust_env) as session:
+            semaphore = asyncio.Semaphore(self.requests_per_second)
+            results = await asyncio.gather(
+                *[self._aload_url(session, semaphore, path) for path in self.web_paths],
+                return_exceptions=self.continue_on_failure,
+            )
+
+        for path, result in zip(self.web_paths, results):
+            if isinstance(result, Exception):
+                log.error(f"Error loading {path}: {result}")
+                continue
+            for document in result:
+                yield document
 
     async def aload(self) -> list[Document]:
         """Load data into Document objects."""
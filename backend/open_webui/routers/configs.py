@@ -4,7 +4,7 @@ from pydantic import BaseModel
 from typing import Optional
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
-from open_webui.config import get_config, save_config
+from open_webui.config import get_config, get_config_overrides, save_config
 from open_webui.config import BannerModel
 
 
@@ -22,6 +22,7 @@ class ImportConfigForm(BaseModel):
 
 @router.post("/import", response_model=dict)
 async def import_config(form_data: ImportConfigForm, user=Depends(get_admin_user)):
+    # Only values that differ from the current config are written and reloaded
     save_config(form_data.config)
     return get_config()
 
@@ -32,7 +33,9 @@ async def import_config(form_data: ImportConfigForm, user=Depends(get_admin_user
 
 
 @router.get("/export", response_model=dict)
-async def export_config(user=Depends(get_admin_user)):
+async def export_config(overrides_only: bool = False, user=Depends(get_admin_user)):
+    if overrides_only:
+        return get_config_overrides()
     return get_config()
 
 
@@ -1,12 +1,7 @@
-# TODO: Implement a more intelligent load balancing mechanism for distributing requests among multiple backend instances.
-# Current implementation uses a simple round-robin approach (random.choice). Consider incorporating algorithms like weighted round-robin,
-# least connections, or least response time for better resource utilization and performance optimization.
-
 import asyncio
 import json
 import logging
 import os
-import random
 import re
 import time
 from typing import Optional, Union
@@ -45,6 +40,8 @@ from open_webui.utils.payload import (
     apply_model_system_prompt_to_body,
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.http_client import cleanup_response, get_http_session
+from open_webui.utils.load_balancer import LoadBalancer
 from open_webui.utils.access_control import has_access
 
 
@@ -54,9 +51,11 @@ from open_webui.config import (
 from open_webui.env import (
     ENV,
     SRC_LOG_LEVELS,
-    AIOHTTP_CLIENT_TIMEOUT,
     AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST,
     BYPASS_MODEL_ACCESS_CONTROL,
+    OLLAMA_LOAD_BALANCING_STRATEGY,
+    OLLAMA_CIRCUIT_BREAKER_THRESHOLD,
+    OLLAMA_CIRCUIT_BREAKER_COOLDOWN,
 )
 from open_webui.constants import ERROR_MESSAGES
 
@@ -64,6 +63,13 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
 
 
+OLLAMA_LOAD_BALANCER = LoadBalancer(
+    strategy=OLLAMA_LOAD_BALANCING_STRATEGY,
+    failure_threshold=OLLAMA_CIRCUIT_BREAKER_THRESHOLD,
+    cooldown=OLLAMA_CIRCUIT_BREAKER_COOLDOWN,
+)
+
+
 ##########################################
 #
 # Utility functions
@@ -74,39 +80,40 @@ log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
 async def send_get_request(url, key=None, user: UserModel = None):
     timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST)
     try:
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    **({"Authorization": f"Bearer {key}"} if key else {}),
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": user.name,
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-            ) as response:
-                return await response.json()
+        session = get_http_session()
+        async with session.get(
+            url,
+            timeout=timeout,
+            headers={
+                "Content-Type": "application/json",
+                **({"Authorization": f"Bearer {key}"} if key else {}),
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": user.name,
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+        ) as response:
+            return await response.json()
     except Exception as e:
         # Handle connection error here
         log.error(f"Connection error: {e}")
         return None
 
 
-async def cleanup_response(
+async def finish_request(
     response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
+    upstream: Optional[str],
+    success: bool = True,
 ):
-    if response:
-        response.close()
-    if session:
-        await session.close()
+    await cleanup_response(response)
+    if upstream:
+        OLLAMA_LOAD_BALANCER.end(upstream, success)
 
 
 async def send_post_request(
@@ -116,14 +123,14 @@ async def send_post_request(
     key: Optional[str] = None,
     content_type: Optional[str] = None,
     user: UserModel = None,
+    upstream: Optional[str] = None,
 ):
+    # `upstream` is the base url the load balancer picked, if any
 
     r = None
+    started_at = OLLAMA_LOAD_BALANCER.begin(upstream) if upstream else None
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
-
+        session = get_http_session()
         r = await session.post(
             url,
             data=payload,
@@ -142,6 +149,8 @@ async def send_post_request(
                 ),
             },
         )
+        if upstream:
+            OLLAMA_LOAD_BALANCER.observe(upstream, started_at)
         r.raise_for_status()
 
         if stream:
@@ -155,12 +164,12 @@ async def send_post_request(
                 status_code=r.status,
                 headers=response_headers,
                 background=BackgroundTask(
-                    cleanup_response, response=r, session=session
+                    finish_request, response=r, upstream=upstream
                 ),
             )
         else:
             res = await r.json()
-            await cleanup_response(r, session)
+            await finish_request(r, upstream)
             return res
 
     except Exception as e:
@@ -174,6 +183,7 @@ async def send_post_request(
             except Exception:
                 detail = f"Ollama: {e}"
 
+        await finish_request(r, upstream, success=r is not None and r.status < 500)
         raise HTTPException(
             status_code=r.status if r else 500,
             detail=detail if detail else "Open WebUI: Server Connection Error",
@@ -188,6 +198,37 @@ def get_api_key(idx, url, configs):
     )  # Legacy support
 
 
+async def refresh_loaded_models(request: Request, url_idx: int):
+    url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
+    api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
+        str(url_idx),
+        request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
+    )
+    prefix_id = api_config.get("prefix_id", None)
+
+    response = await send_get_request(f"{url}/api/ps", api_config.get("key", None))
+    if response is not None:
+        OLLAMA_LOAD_BALANCER.set_loaded_models(
+            url,
+            [
+                f"{prefix_id}.{model['model']}" if prefix_id else model["model"]
+                for model in response.get("models", [])
+            ],
+        )
+
+
+async def select_url_idx(request: Request, url_idxs: list[int], model: str) -> int:
+    urls = {request.app.state.config.OLLAMA_BASE_URLS[idx]: idx for idx in url_idxs}
+
+    # Loaded models are refreshed in the background; until then the last known
+    # state is used so selection never waits on /api/ps.
+    for url, idx in urls.items():
+        if OLLAMA_LOAD_BALANCER.needs_residency_refresh(url):
+            asyncio.create_task(refresh_loaded_models(request, idx))
+
+    return urls[OLLAMA_LOAD_BALANCER.select(list(urls.keys()), model)]
+
+
 ##########################################
 #
 # API routes
@@ -215,45 +256,44 @@ async def verify_connection(
     url = form_data.url
     key = form_data.key
 
-    async with aiohttp.ClientSession(
-        timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST)
-    ) as session:
-        try:
-            async with session.get(
-                f"{url}/api/version",
-                headers={
-                    **({"Authorization": f"Bearer {key}"} if key else {}),
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": user.name,
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-            ) as r:
-                if r.status != 200:
-                    detail = f"HTTP Error: {r.status}"
-                    res = await r.json()
+    session = get_http_session()
+    try:
+        async with session.get(
+            f"{url}/api/version",
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST),
+            headers={
+                **({"Authorization": f"Bearer {key}"} if key else {}),
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": user.name,
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+        ) as r:
+            if r.status != 200:
+                detail = f"HTTP Error: {r.status}"
+                res = await r.json()
 
-                    if "error" in res:
-                        detail = f"External Error: {res['error']}"
-                    raise Exception(detail)
+                if "error" in res:
+                    detail = f"External Error: {res['error']}"
+                raise Exception(detail)
 
-                data = await r.json()
-                return data
-        except aiohttp.ClientError as e:
-            log.exception(f"Client error: {str(e)}")
-            raise HTTPException(
-                status_code=500, detail="Open WebUI: Server Connection Error"
-            )
-        except Exception as e:
-            log.exception(f"Unexpected error: {e}")
-            error_detail = f"Unexpected error: {str(e)}"
-            raise HTTPException(status_code=500, detail=error_detail)
+            data = await r.json()
+            return data
+    except aiohttp.ClientError as e:
+        log.exception(f"Client error: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail="Open WebUI: Server Connection Error"
+        )
+    except Exception as e:
+        log.exception(f"Unexpected error: {e}")
+        error_detail = f"Unexpected error: {str(e)}"
+        raise HTTPException(status_code=500, detail=error_detail)
 
 
 @router.get("/config")
@@ -295,6 +335,11 @@ async def update_config(
     }
 
 
+@router.get("/load_balancer")
+async def get_load_balancer_stats(user=Depends(get_admin_user)):
+    return OLLAMA_LOAD_BALANCER.get_stats()
+
+
 @cached(ttl=3)
 async def get_all_models(request: Request, user: UserModel = None):
     log.info("get_all_models()")
@@ -385,15 +430,12 @@ async def get_all_models(request: Request, user: UserModel = None):
 
 async def get_filtered_models(models, user):
     # Filter models based on user access control
-    filtered_models = []
-    for model in models.get("models", []):
-        model_info = Models.get_model_by_id(model["model"])
-        if model_info:
-            if user.id == model_info.user_id or has_access(
-                user.id, type="read", access_control=model_info.access_control
-            ):
-                filtered_models.append(model)
-    return filtered_models
+    readable_model_ids = Models.get_readable_model_ids(user.id)
+    return [
+        model
+        for model in models.get("models", [])
+        if model["model"] in readable_model_ids
+    ]
 
 
 @router.get("/api/tags")
@@ -782,7 +824,9 @@ async def show_model_info(
             detail=ERROR_MESSAGES.MODEL_NOT_FOUND(form_data.name),
         )
 
-    url_idx = random.choice(models[form_data.name]["urls"])
+    url_idx = await select_url_idx(
+        request, models[form_data.name]["urls"], form_data.name
+    )
 
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     key = get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS)
@@ -856,7 +900,7 @@ async def embed(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = await select_url_idx(request, models[model]["urls"], model)
         else:
             raise HTTPException(
                 status_code=400,
@@ -866,6 +910,8 @@ async def embed(
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     key = get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS)
 
+    r = None
+    started_at = OLLAMA_LOAD_BALANCER.begin(url)
     try:
         r = requests.request(
             method="POST",
@@ -886,6 +932,7 @@ async def embed(
             },
             data=form_data.model_dump_json(exclude_none=True).encode(),
         )
+        OLLAMA_LOAD_BALANCER.observe(url, started_at)
         r.raise_for_status()
 
         data = r.json()
@@ -906,6 +953,8 @@ async def embed(
             status_code=r.status_code if r else 500,
             detail=detail if detail else "Open WebUI: Server Connection Error",
         )
+    finally:
+        OLLAMA_LOAD_BALANCER.end(url, success=r is not None and r.status_code < 500)
 
 
 class GenerateEmbeddingsForm(BaseModel):
@@ -935,7 +984,7 @@ async def embeddings(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = await select_url_idx(request, models[model]["urls"], model)
         else:
             raise HTTPException(
                 status_code=400,
@@ -945,6 +994,8 @@ async def embeddings(
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     key = get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS)
 
+    r = None
+    started_at = OLLAMA_LOAD_BALANCER.begin(url)
     try:
         r = requests.request(
             method="POST",
@@ -965,6 +1016,7 @@ async def embeddings(
             },
             data=form_data.model_dump_json(exclude_none=True).encode(),
         )
+        OLLAMA_LOAD_BALANCER.observe(url, started_at)
         r.raise_for_status()
 
         data = r.json()
@@ -985,6 +1037,8 @@ async def embeddings(
             status_code=r.status_code if r else 500,
             detail=detail if detail else "Open WebUI: Server Connection Error",
         )
+    finally:
+        OLLAMA_LOAD_BALANCER.end(url, success=r is not None and r.status_code < 500)
 
 
 class GenerateCompletionForm(BaseModel):
@@ -1020,7 +1074,7 @@ async def generate_completion(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = await select_url_idx(request, models[model]["urls"], model)
         else:
             raise HTTPException(
                 status_code=400,
@@ -1042,6 +1096,7 @@ async def generate_completion(
         payload=form_data.model_dump_json(exclude_none=True).encode(),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        upstream=url,
     )
 
 
@@ -1084,7 +1139,7 @@ async def get_ollama_url(request: Request, model: str, url_idx: Optional[int] =
                 status_code=400,
                 detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
             )
-        url_idx = random.choice(models[model].get("urls", []))
+        url_idx = await select_url_idx(request, models[model].get("urls", []), model)
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     return url, url_idx
 
@@ -1172,6 +1227,7 @@ async def generate_chat_completion(
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         content_type="application/x-ndjson",
         user=user,
+        upstream=url,
     )
 
 
@@ -1275,6 +1331,7 @@ async def generate_openai_completion(
         stream=payload.get("stream", False),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        upstream=url,
     )
 
 
@@ -1354,6 +1411,7 @@ async def generate_openai_chat_completion(
         stream=payload.get("stream", False),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        upstream=url,
     )
 
 
@@ -1413,15 +1471,8 @@ async def get_openai_models(
 
     if user.role == "user" and not BYPASS_MODEL_ACCESS_CONTROL:
         # Filter models based on user access control
-        filtered_models = []
-        for model in models:
-            model_info = Models.get_model_by_id(model["id"])
-            if model_info:
-                if user.id == model_info.user_id or has_access(
-                    user.id, type="read", access_control=model_info.access_control
-                ):
-                    filtered_models.append(model)
-        models = filtered_models
+        readable_model_ids = Models.get_readable_model_ids(user.id)
+        models = [model for model in models if model["id"] in readable_model_ids]
 
     return {
         "data": models,
@@ -1467,39 +1518,39 @@ async def download_file_stream(
 
     timeout = aiohttp.ClientTimeout(total=600)  # Set the timeout
 
-    async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-        async with session.get(file_url, headers=headers) as response:
-            total_size = int(response.headers.get("content-length", 0)) + current_size
+    session = get_http_session()
+    async with session.get(file_url, headers=headers, timeout=timeout) as response:
+        total_size = int(response.headers.get("content-length", 0)) + current_size
 
-            with open(file_path, "ab+") as file:
-                async for data in response.content.iter_chunked(chunk_size):
-                    current_size += len(data)
-                    file.write(data)
+        with open(file_path, "ab+") as file:
+            async for data in response.content.iter_chunked(chunk_size):
+                current_size += len(data)
+                file.write(data)
 
-                    done = current_size == total_size
-                    progress = round((current_size / total_size) * 100, 2)
+                done = current_size == total_size
+                progress = round((current_size / total_size) * 100, 2)
 
-                    yield f'data: {{"progress": {progress}, "completed": {current_size}, "total": {total_size}}}\n\n'
+                yield f'data: {{"progress": {progress}, "completed": {current_size}, "total": {total_size}}}\n\n'
 
-                if done:
-                    file.seek(0)
-                    hashed = calculate_sha256(file)
-                    file.seek(0)
+            if done:
+                file.seek(0)
+                hashed = calculate_sha256(file)
+                file.seek(0)
 
-                    url = f"{ollama_url}/api/blobs/sha256:{hashed}"
-                    response = requests.post(url, data=file)
+                url = f"{ollama_url}/api/blobs/sha256:{hashed}"
+                response = requests.post(url, data=file)
 
-                    if response.ok:
-                        res = {
-                            "done": done,
-                            "blob": f"sha256:{hashed}",
-                            "name": file_name,
-                        }
-                        os.remove(file_path)
+                if response.ok:
+                    res = {
+                        "done": done,
+                        "blob": f"sha256:{hashed}",
+                        "name": file_name,
+                    }
+                    os.remove(file_path)
 
-                        yield f"data: {json.dumps(res)}\n\n"
-                    else:
-                        raise "Ollama: Could not create blob, Please try again."
+                    yield f"data: {json.dumps(res)}\n\n"
+                else:
+                    raise "Ollama: Could not create blob, Please try again."
 
 
 # url = "https://huggingface.co/TheBloke/stablelm-zephyr-3b-GGUF/resolve/main/stablelm-zephyr-3b.Q2_K.gguf"
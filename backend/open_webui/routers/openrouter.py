@@ -18,6 +18,7 @@ from open_webui.env import (
 )
 from open_webui.models.users import UserModel
 from open_webui.utils.auth import get_verified_user, get_admin_user
+from open_webui.utils.http_client import get_http_session
 from open_webui.constants import ERROR_MESSAGES
 
 log = logging.getLogger(__name__)
@@ -26,29 +27,30 @@ router = APIRouter()
 async def send_get_request(url: str, key: Optional[str] = None, user: UserModel = None):
     timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST)
     try:
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                f"{url}/models",
-                headers={
-                    **({"Authorization": f"Bearer {key}"} if key else {}),
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": user.name,
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-            ) as response:
-                data = await response.json()
-                if response.status != 200:
-                    detail = data.get("error", f"HTTP {response.status}")
-                    log.error(f"OpenRouter error from {url}: {detail}")
-                    raise HTTPException(status_code=response.status, detail=detail)
-                return data
+        session = get_http_session()
+        async with session.get(
+            f"{url}/models",
+            timeout=timeout,
+            headers={
+                **({"Authorization": f"Bearer {key}"} if key else {}),
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": user.name,
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+        ) as response:
+            data = await response.json()
+            if response.status != 200:
+                detail = data.get("error", f"HTTP {response.status}")
+                log.error(f"OpenRouter error from {url}: {detail}")
+                raise HTTPException(status_code=response.status, detail=detail)
+            return data
     except Exception as e:
         log.exception(f"OpenRouter connection error: {e}")
         return None
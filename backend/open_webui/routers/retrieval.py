@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import mimetypes
@@ -35,6 +36,8 @@ from open_webui.storage.provider import Storage
 
 
 from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
+from open_webui.retrieval.bm25 import BM25_INDEX
+from open_webui.retrieval.embedding_cache import EMBEDDING_CACHE
 
 # Document loaders
 from open_webui.retrieval.loaders.main import Loader
@@ -42,6 +45,11 @@ from open_webui.retrieval.loaders.youtube import YoutubeLoader
 
 # Web search engines
 from open_webui.retrieval.web.main import SearchResult
+from open_webui.retrieval.web.search_cache import (
+    WEB_SEARCH_CACHE,
+    get_cached_web_search,
+    get_web_search_collection_name,
+)
 from open_webui.retrieval.web.utils import get_web_loader
 from open_webui.retrieval.web.brave import search_brave
 from open_webui.retrieval.web.kagi import search_kagi
@@ -68,6 +76,7 @@ from open_webui.retrieval.utils import (
     query_collection_with_hybrid_search,
     query_doc,
     query_doc_with_hybrid_search,
+    rebuild_bm25_index,
 )
 from open_webui.utils.misc import (
     calculate_sha256_string,
@@ -81,8 +90,10 @@ from open_webui.config import (
     RAG_EMBEDDING_MODEL_TRUST_REMOTE_CODE,
     RAG_RERANKING_MODEL_AUTO_UPDATE,
     RAG_RERANKING_MODEL_TRUST_REMOTE_CODE,
+    RAG_WEB_SEARCH_TIMEOUT,
     UPLOAD_DIR,
     DEFAULT_LOCALE,
+    VECTOR_DB,
 )
 from open_webui.env import (
     SRC_LOG_LEVELS,
@@ -174,7 +185,8 @@ class ProcessUrlForm(CollectionNameForm):
 
 
 class SearchForm(CollectionNameForm):
-    query: str
+    query: Optional[str] = None
+    queries: Optional[list[str]] = None
 
 
 @router.get("/")
@@ -235,6 +247,13 @@ class EmbeddingModelUpdateForm(BaseModel):
     embedding_batch_size: Optional[int] = 1
 
 
+@router.get("/embedding/cache")
+async def get_embedding_cache_stats(user=Depends(get_admin_user)):
+    if EMBEDDING_CACHE is None:
+        return {"enabled": False}
+    return {"enabled": True, **EMBEDDING_CACHE.get_stats()}
+
+
 @router.post("/embedding/update")
 async def update_embedding_config(
     request: Request, form_data: EmbeddingModelUpdateForm, user=Depends(get_admin_user)
@@ -753,6 +772,43 @@ async def update_query_settings(
 ####################################
 
 
+def dump_embedding_config(request: Request) -> str:
+    """The embedding engine and model, as stored with every embedded chunk."""
+    return json.dumps(
+        {
+            "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
+            "model": request.app.state.config.RAG_EMBEDDING_MODEL,
+        }
+    )
+
+
+def is_collection_up_to_date(request: Request, collection_name: str, docs) -> bool:
+    """
+    Whether the collection already holds exactly the given web documents,
+    compared by their content hash and embedded with the current embedding
+    model, so an unchanged page isn't split and embedded again.
+    """
+    content_hashes = {doc.metadata.get("content_hash") for doc in docs}
+    if not docs or None in content_hashes:
+        return False
+
+    if not VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+        return False
+
+    result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+    if result is None or not result.metadatas or not result.metadatas[0]:
+        return False
+
+    embedding_config = dump_embedding_config(request)
+    metadatas = result.metadatas[0]
+    if any(
+        metadata.get("embedding_config") != embedding_config for metadata in metadatas
+    ):
+        return False
+
+    return {metadata.get("content_hash") for metadata in metadatas} == content_hashes
+
+
 def save_docs_to_vector_db(
     request: Request,
     docs,
@@ -828,12 +884,7 @@ def save_docs_to_vector_db(
         {
             **doc.metadata,
             **(metadata if metadata else {}),
-            "embedding_config": json.dumps(
-                {
-                    "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
-                    "model": request.app.state.config.RAG_EMBEDDING_MODEL,
-                }
-            ),
+            "embedding_config": dump_embedding_config(request),
         }
         for doc in docs
     ]
@@ -850,17 +901,24 @@ def save_docs_to_vector_db(
                 metadata[key] = str(value)
 
     try:
+        # Collections that already hold documents missing from the keyword index
+        # are left to be indexed in full on their first hybrid search.
+        update_bm25_index = True
+
         if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
             log.info(f"collection {collection_name} already exists")
 
             if overwrite:
                 VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+                BM25_INDEX.delete_collection(collection_name)
                 log.info(f"deleting existing collection {collection_name}")
             elif add is False:
                 log.info(
                     f"collection {collection_name} already exists, overwrite is False and add is False"
                 )
                 return True
+            else:
+                update_bm25_index = BM25_INDEX.has_collection(collection_name)
 
         log.info(f"adding to collection {collection_name}")
         embedding_function = get_embedding_function(
@@ -899,6 +957,9 @@ def save_docs_to_vector_db(
             items=items,
         )
 
+        if update_bm25_index:
+            BM25_INDEX.upsert(collection_name, items)
+
         return True
     except Exception as e:
         log.exception(e)
@@ -932,6 +993,7 @@ def process_file(
             try:
                 # /files/{file_id}/data/content/update
                 VECTOR_DB_CLIENT.delete_collection(collection_name=f"file-{file.id}")
+                BM25_INDEX.delete_collection(f"file-{file.id}")
             except:
                 # Audio file upload pipeline
                 pass
@@ -1191,9 +1253,12 @@ def process_web(
         log.debug(f"text_content: {content}")
 
         if not request.app.state.config.BYPASS_WEB_SEARCH_EMBEDDING_AND_RETRIEVAL:
-            save_docs_to_vector_db(
-                request, docs, collection_name, overwrite=True, user=user
-            )
+            if is_collection_up_to_date(request, collection_name, docs):
+                log.info(f"collection {collection_name} is up to date, skipping")
+            else:
+                save_docs_to_vector_db(
+                    request, docs, collection_name, overwrite=True, user=user
+                )
         else:
             collection_name = None
 
@@ -1413,43 +1478,90 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
 async def process_web_search(
     request: Request, form_data: SearchForm, user=Depends(get_verified_user)
 ):
-    try:
-        logging.info(
-            f"trying to web search with {request.app.state.config.RAG_WEB_SEARCH_ENGINE, form_data.query}"
+    queries = form_data.queries or ([form_data.query] if form_data.query else [])
+    if not queries:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("No search query provided"),
         )
-        web_results = search_web(
-            request, request.app.state.config.RAG_WEB_SEARCH_ENGINE, form_data.query
+
+    collection_name = form_data.collection_name
+    if not collection_name:
+        collection_name = get_web_search_collection_name(
+            request.app.state.config.RAG_WEB_SEARCH_ENGINE, queries
         )
-    except Exception as e:
-        log.exception(e)
 
+        # The same search ran recently, its collection can be reused as is
+        if not request.app.state.config.BYPASS_WEB_SEARCH_EMBEDDING_AND_RETRIEVAL:
+            result = await run_in_threadpool(
+                get_cached_web_search, collection_name, dump_embedding_config(request)
+            )
+            if result is not None:
+                log.info(f"Reusing web search collection {collection_name}")
+                return {"status": True, "collection_name": collection_name, **result}
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + RAG_WEB_SEARCH_TIMEOUT
+
+    # Search all queries concurrently, the (sync) engines run in the threadpool
+    logging.info(
+        f"trying to web search with {request.app.state.config.RAG_WEB_SEARCH_ENGINE, queries}"
+    )
+    search_tasks = [
+        asyncio.create_task(
+            run_in_threadpool(
+                search_web,
+                request,
+                request.app.state.config.RAG_WEB_SEARCH_ENGINE,
+                query,
+            )
+        )
+        for query in queries
+    ]
+    await asyncio.wait(search_tasks, timeout=RAG_WEB_SEARCH_TIMEOUT)
+
+    searched_queries = []
+    web_results = []
+    errors = []
+    for query, task in zip(queries, search_tasks):
+        if not task.done():
+            task.cancel()
+            errors.append(TimeoutError(f"Search for '{query}' timed out"))
+        elif task.exception():
+            errors.append(task.exception())
+        else:
+            searched_queries.append(query)
+            web_results.extend(task.result())
+
+    for e in errors:
+        log.error(f"Error searching the web: {e}")
+
+    if not searched_queries:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=ERROR_MESSAGES.WEB_SEARCH_ERROR(e),
+            detail=ERROR_MESSAGES.WEB_SEARCH_ERROR(errors[0]),
         )
 
     log.debug(f"web_results: {web_results}")
 
     try:
-        collection_name = form_data.collection_name
-        if collection_name == "" or collection_name is None:
-            collection_name = f"web-search-{calculate_sha256_string(form_data.query)}"[
-                :63
-            ]
-
-        urls = [result.link for result in web_results]
+        # Fetch every page once, even if several queries returned it
+        urls = list(dict.fromkeys(result.link for result in web_results))
         loader = get_web_loader(
             urls,
             verify_ssl=request.app.state.config.ENABLE_RAG_WEB_LOADER_SSL_VERIFICATION,
             requests_per_second=request.app.state.config.RAG_WEB_SEARCH_CONCURRENT_REQUESTS,
             trust_env=request.app.state.config.RAG_WEB_SEARCH_TRUST_ENV,
         )
-        docs = await loader.aload()
+        docs = await asyncio.wait_for(
+            loader.aload(), timeout=max(deadline - loop.time(), 0)
+        )
 
         if request.app.state.config.BYPASS_WEB_SEARCH_EMBEDDING_AND_RETRIEVAL:
             return {
                 "status": True,
                 "collection_name": None,
+                "queries": searched_queries,
                 "filenames": urls,
                 "docs": [
                     {
@@ -1461,21 +1573,46 @@ async def process_web_search(
                 "loaded_count": len(docs),
             }
         else:
-            await run_in_threadpool(
-                save_docs_to_vector_db,
-                request,
-                docs,
-                collection_name,
-                overwrite=True,
-                user=user,
-            )
+            if await run_in_threadpool(
+                is_collection_up_to_date, request, collection_name, docs
+            ):
+                log.info(f"collection {collection_name} is up to date, skipping")
+            else:
+                # Pages of all queries are embedded together in a single batch
+                await run_in_threadpool(
+                    save_docs_to_vector_db,
+                    request,
+                    docs,
+                    collection_name,
+                    overwrite=True,
+                    user=user,
+                )
 
-            return {
-                "status": True,
-                "collection_name": collection_name,
+            result = {
+                "queries": searched_queries,
                 "filenames": urls,
                 "loaded_count": len(docs),
             }
+
+            # Generated collections are all swept, only complete results are reused
+            if not form_data.collection_name:
+                await run_in_threadpool(
+                    WEB_SEARCH_CACHE.set,
+                    collection_name,
+                    result,
+                    dump_embedding_config(request),
+                    reusable=len(searched_queries) == len(queries),
+                )
+
+            return {"status": True, "collection_name": collection_name, **result}
+    except asyncio.TimeoutError:
+        log.error(
+            f"Fetching web search results timed out after {RAG_WEB_SEARCH_TIMEOUT}s"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.WEB_SEARCH_ERROR("Fetching search results timed out"),
+        )
     except Exception as e:
         log.exception(e)
         raise HTTPException(
@@ -1603,6 +1740,7 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
                 collection_name=form_data.collection_name,
                 metadata={"hash": hash},
             )
+            BM25_INDEX.delete(form_data.collection_name, filter={"hash": hash})
             return {"status": True}
         else:
             return {"status": False}
@@ -1611,9 +1749,55 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
         return {"status": False}
 
 
+class RebuildBM25IndexForm(BaseModel):
+    collection_names: Optional[list[str]] = None
+
+
+@router.post("/bm25/rebuild")
+def rebuild_bm25_indexes(form_data: RebuildBM25IndexForm, user=Depends(get_admin_user)):
+    collection_names = form_data.collection_names
+    if collection_names is None:
+        collection_names = list(
+            {
+                *BM25_INDEX.get_collection_names(),
+                *[knowledge.id for knowledge in Knowledges.get_knowledge_bases()],
+            }
+        )
+
+    rebuilt = []
+    for collection_name in collection_names:
+        try:
+            rebuild_bm25_index(collection_name)
+            rebuilt.append(collection_name)
+        except Exception as e:
+            log.exception(f"Error rebuilding BM25 index for {collection_name}: {e}")
+
+    return {"status": True, "collection_names": rebuilt}
+
+
+@router.post("/reindex/db")
+def reindex_vector_db(user=Depends(get_admin_user)):
+    if not hasattr(VECTOR_DB_CLIENT, "reindex"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Reindexing is not supported by the '{VECTOR_DB}' vector database.",
+        )
+
+    try:
+        VECTOR_DB_CLIENT.reindex()
+        return {"status": True}
+    except Exception as e:
+        log.exception(e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(e),
+        )
+
+
 @router.post("/reset/db")
 def reset_vector_db(user=Depends(get_admin_user)):
     VECTOR_DB_CLIENT.reset()
+    BM25_INDEX.reset()
     Knowledges.delete_all_knowledge()
 
 
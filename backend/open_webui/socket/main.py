@@ -2,20 +2,28 @@ import asyncio
 import socketio
 import logging
 import sys
-import time
 
 from open_webui.models.users import Users, UserNameResponse
 from open_webui.models.channels import Channels
 from open_webui.models.chats import Chats
+from open_webui.utils.chat_buffer import ChatMessages
 
 from open_webui.env import (
     ENABLE_WEBSOCKET_SUPPORT,
     WEBSOCKET_MANAGER,
     WEBSOCKET_REDIS_URL,
     WEBSOCKET_REDIS_LOCK_TIMEOUT,
+    WEBSOCKET_USER_POOL_CACHE_TTL,
 )
 from open_webui.utils.auth import decode_token
-from open_webui.socket.utils import RedisDict, RedisLock
+from open_webui.socket.utils import (
+    AsyncDict,
+    AsyncRedisDict,
+    LocalLock,
+    RedisLock,
+    RedisUsagePool,
+    UsagePool,
+)
 
 from open_webui.env import (
     GLOBAL_LOG_LEVEL,
@@ -55,64 +63,49 @@ TIMEOUT_DURATION = 3
 
 if WEBSOCKET_MANAGER == "redis":
     log.debug("Using Redis to manage websockets.")
-    SESSION_POOL = RedisDict("open-webui:session_pool", redis_url=WEBSOCKET_REDIS_URL)
-    USER_POOL = RedisDict("open-webui:user_pool", redis_url=WEBSOCKET_REDIS_URL)
-    USAGE_POOL = RedisDict("open-webui:usage_pool", redis_url=WEBSOCKET_REDIS_URL)
+    SESSION_POOL = AsyncRedisDict(
+        "open-webui:session_pool", redis_url=WEBSOCKET_REDIS_URL
+    )
+    USER_POOL = AsyncRedisDict(
+        "open-webui:user_pool",
+        redis_url=WEBSOCKET_REDIS_URL,
+        cache_ttl=WEBSOCKET_USER_POOL_CACHE_TTL,
+    )
+    USAGE_POOL = RedisUsagePool(
+        "open-webui:usage", redis_url=WEBSOCKET_REDIS_URL, timeout=TIMEOUT_DURATION
+    )
 
     clean_up_lock = RedisLock(
         redis_url=WEBSOCKET_REDIS_URL,
         lock_name="usage_cleanup_lock",
         timeout_secs=WEBSOCKET_REDIS_LOCK_TIMEOUT,
     )
-    aquire_func = clean_up_lock.aquire_lock
-    renew_func = clean_up_lock.renew_lock
-    release_func = clean_up_lock.release_lock
 else:
-    SESSION_POOL = {}
-    USER_POOL = {}
-    USAGE_POOL = {}
-    aquire_func = release_func = renew_func = lambda: True
+    SESSION_POOL = AsyncDict()
+    USER_POOL = AsyncDict()
+    USAGE_POOL = UsagePool(timeout=TIMEOUT_DURATION)
+
+    clean_up_lock = LocalLock()
 
 
 async def periodic_usage_pool_cleanup():
-    if not aquire_func():
+    if not await clean_up_lock.aquire_lock():
         log.debug("Usage pool cleanup lock already exists. Not running it.")
         return
     log.debug("Running periodic_usage_pool_cleanup")
     try:
         while True:
-            if not renew_func():
+            if not await clean_up_lock.renew_lock():
                 log.error(f"Unable to renew cleanup lock. Exiting usage pool cleanup.")
                 raise Exception("Unable to renew usage pool cleanup lock.")
 
-            now = int(time.time())
-            send_usage = False
-            for model_id, connections in list(USAGE_POOL.items()):
-                # Creating a list of sids to remove if they have timed out
-                expired_sids = [
-                    sid
-                    for sid, details in connections.items()
-                    if now - details["updated_at"] > TIMEOUT_DURATION
-                ]
-
-                for sid in expired_sids:
-                    del connections[sid]
-
-                if not connections:
-                    log.debug(f"Cleaning up model {model_id} from usage pool")
-                    del USAGE_POOL[model_id]
-                else:
-                    USAGE_POOL[model_id] = connections
-
-                send_usage = True
-
-            if send_usage:
+            if await USAGE_POOL.cleanup():
                 # Emit updated usage information after cleaning
-                await sio.emit("usage", {"models": get_models_in_use()})
+                await sio.emit("usage", {"models": await get_models_in_use()})
 
             await asyncio.sleep(TIMEOUT_DURATION)
     finally:
-        release_func()
+        await clean_up_lock.release_lock()
 
 
 app = socketio.ASGIApp(
@@ -121,26 +114,19 @@ app = socketio.ASGIApp(
 )
 
 
-def get_models_in_use():
+async def get_models_in_use():
     # List models that are currently in use
-    models_in_use = list(USAGE_POOL.keys())
-    return models_in_use
+    return await USAGE_POOL.get_models_in_use()
 
 
 @sio.on("usage")
 async def usage(sid, data):
     model_id = data["model"]
     # Record the timestamp for the last update
-    current_time = int(time.time())
-
-    # Store the new usage data and task
-    USAGE_POOL[model_id] = {
-        **(USAGE_POOL[model_id] if model_id in USAGE_POOL else {}),
-        sid: {"updated_at": current_time},
-    }
+    await USAGE_POOL.touch(model_id, sid)
 
     # Broadcast the usage data to all clients
-    await sio.emit("usage", {"models": get_models_in_use()})
+    await sio.emit("usage", {"models": await get_models_in_use()})
 
 
 @sio.event
@@ -153,15 +139,15 @@ async def connect(sid, environ, auth):
             user = Users.get_user_by_id(data["id"])
 
         if user:
-            SESSION_POOL[sid] = user.model_dump()
-            if user.id in USER_POOL:
-                USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-            else:
-                USER_POOL[user.id] = [sid]
+            await SESSION_POOL.set(sid, user.model_dump())
+            await USER_POOL.update(
+                user.id,
+                lambda sids: [*(_sid for _sid in sids or [] if _sid != sid), sid],
+            )
 
             # print(f"user {user.name}({user.id}) connected with session ID {sid}")
-            await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
-            await sio.emit("usage", {"models": get_models_in_use()})
+            await sio.emit("user-list", {"user_ids": await USER_POOL.keys()})
+            await sio.emit("usage", {"models": await get_models_in_use()})
 
 
 @sio.on("user-join")
@@ -179,11 +165,10 @@ async def user_join(sid, data):
     if not user:
         return
 
-    SESSION_POOL[sid] = user.model_dump()
-    if user.id in USER_POOL:
-        USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-    else:
-        USER_POOL[user.id] = [sid]
+    await SESSION_POOL.set(sid, user.model_dump())
+    await USER_POOL.update(
+        user.id, lambda sids: [*(_sid for _sid in sids or [] if _sid != sid), sid]
+    )
 
     # Join all the channels
     channels = Channels.get_channels_by_user_id(user.id)
@@ -193,7 +178,7 @@ async def user_join(sid, data):
 
     # print(f"user {user.name}({user.id}) connected with session ID {sid}")
 
-    await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
+    await sio.emit("user-list", {"user_ids": await USER_POOL.keys()})
     return {"id": user.id, "name": user.name}
 
 
@@ -240,7 +225,7 @@ async def channel_events(sid, data):
                 "channel_id": data["channel_id"],
                 "message_id": data.get("message_id", None),
                 "data": event_data,
-                "user": UserNameResponse(**SESSION_POOL[sid]).model_dump(),
+                "user": UserNameResponse(**await SESSION_POOL.get(sid)).model_dump(),
             },
             room=room,
         )
@@ -248,22 +233,22 @@ async def channel_events(sid, data):
 
 @sio.on("user-list")
 async def user_list(sid):
-    await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
+    await sio.emit("user-list", {"user_ids": await USER_POOL.keys()})
 
 
 @sio.event
 async def disconnect(sid):
-    if sid in SESSION_POOL:
-        user = SESSION_POOL[sid]
-        del SESSION_POOL[sid]
-
-        user_id = user["id"]
-        USER_POOL[user_id] = [_sid for _sid in USER_POOL[user_id] if _sid != sid]
+    user = await SESSION_POOL.get(sid)
+    if user:
+        await SESSION_POOL.delete(sid)
 
-        if len(USER_POOL[user_id]) == 0:
-            del USER_POOL[user_id]
+        # Drop the user once their last session is gone
+        await USER_POOL.update(
+            user["id"],
+            lambda sids: [_sid for _sid in sids or [] if _sid != sid] or None,
+        )
 
-        await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
+        await sio.emit("user-list", {"user_ids": await USER_POOL.keys()})
     else:
         pass
         # print(f"Unknown session ID {sid} disconnected")
@@ -273,7 +258,7 @@ def get_event_emitter(request_info):
     async def __event_emitter__(event_data):
         user_id = request_info["user_id"]
         session_ids = list(
-            set(USER_POOL.get(user_id, []) + [request_info["session_id"]])
+            set(await USER_POOL.get_cached(user_id, []) + [request_info["session_id"]])
         )
 
         for session_id in session_ids:
@@ -294,6 +279,13 @@ def get_event_emitter(request_info):
                 event_data.get("data", {}),
             )
 
+        if "type" in event_data and event_data["type"] in ("message", "replace"):
+            # Persist buffered streaming updates first so they are not overwritten,
+            # the message isn't complete yet so the search index is left alone
+            await ChatMessages.flush(
+                request_info["chat_id"], request_info["message_id"], final=False
+            )
+
         if "type" in event_data and event_data["type"] == "message":
             message = Chats.get_message_by_id_and_message_id(
                 request_info["chat_id"],
@@ -309,6 +301,7 @@ def get_event_emitter(request_info):
                 {
                     "content": content,
                 },
+                update_search_index=False,
             )
 
         if "type" in event_data and event_data["type"] == "replace":
@@ -320,6 +313,7 @@ def get_event_emitter(request_info):
                 {
                     "content": content,
                 },
+                update_search_index=False,
             )
 
     return __event_emitter__
@@ -344,28 +338,29 @@ def get_event_call(request_info):
 get_event_caller = get_event_call
 
 
-def get_user_id_from_session_pool(sid):
-    user = SESSION_POOL.get(sid)
+async def get_user_id_from_session_pool(sid):
+    user = await SESSION_POOL.get(sid)
     if user:
         return user["id"]
     return None
 
 
-def get_user_ids_from_room(room):
+async def get_user_ids_from_room(room):
     active_session_ids = sio.manager.get_participants(
         namespace="/",
         room=room,
     )
 
-    active_user_ids = list(
-        set(
-            [SESSION_POOL.get(session_id[0])["id"] for session_id in active_session_ids]
-        )
+    # Look up all sessions in a single round trip
+    users = await SESSION_POOL.get_many(
+        [session_id[0] for session_id in active_session_ids]
     )
+
+    active_user_ids = list(set([user["id"] for user in users if user]))
     return active_user_ids
 
 
-def get_active_status_by_user_id(user_id):
-    if user_id in USER_POOL:
+async def get_active_status_by_user_id(user_id):
+    if await USER_POOL.contains(user_id):
         return True
     return False
@@ -1,6 +1,22 @@
 import json
-import redis
+import time
 import uuid
+from typing import Any, Callable, Optional
+
+import redis.asyncio as redis
+from redis.exceptions import WatchError
+
+
+_REDIS_CONNECTIONS: dict[str, redis.Redis] = {}
+
+
+def get_redis_connection(redis_url) -> redis.Redis:
+    # Share one client, and with it one connection pool, per Redis url
+    if redis_url not in _REDIS_CONNECTIONS:
+        _REDIS_CONNECTIONS[redis_url] = redis.Redis.from_url(
+            redis_url, decode_responses=True
+        )
+    return _REDIS_CONNECTIONS[redis_url]
 
 
 class RedisLock:
@@ -9,79 +25,218 @@ class RedisLock:
         self.lock_id = str(uuid.uuid4())
         self.timeout_secs = timeout_secs
         self.lock_obtained = False
-        self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+        self.redis = get_redis_connection(redis_url)
 
-    def aquire_lock(self):
+    async def aquire_lock(self):
         # nx=True will only set this key if it _hasn't_ already been set
-        self.lock_obtained = self.redis.set(
+        self.lock_obtained = await self.redis.set(
             self.lock_name, self.lock_id, nx=True, ex=self.timeout_secs
         )
         return self.lock_obtained
 
-    def renew_lock(self):
+    async def renew_lock(self):
         # xx=True will only set this key if it _has_ already been set
-        return self.redis.set(
+        return await self.redis.set(
             self.lock_name, self.lock_id, xx=True, ex=self.timeout_secs
         )
 
-    def release_lock(self):
-        lock_value = self.redis.get(self.lock_name)
+    async def release_lock(self):
+        lock_value = await self.redis.get(self.lock_name)
         if lock_value and lock_value == self.lock_id:
-            self.redis.delete(self.lock_name)
+            await self.redis.delete(self.lock_name)
 
 
-class RedisDict:
-    def __init__(self, name, redis_url):
-        self.name = name
-        self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+class LocalLock:
+    async def aquire_lock(self):
+        return True
+
+    async def renew_lock(self):
+        return True
+
+    async def release_lock(self):
+        pass
+
 
-    def __setitem__(self, key, value):
-        serialized_value = json.dumps(value)
-        self.redis.hset(self.name, key, serialized_value)
+####################
+# Pools
+#
+# `AsyncDict` and `AsyncRedisDict` share the same async interface so socket
+# handlers don't need to know whether state lives in this process or in Redis.
+####################
 
-    def __getitem__(self, key):
-        value = self.redis.hget(self.name, key)
+
+class AsyncDict:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    async def get_cached(self, key, default=None):
+        return self.data.get(key, default)
+
+    async def get_many(self, keys: list) -> list:
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value):
+        self.data[key] = value
+
+    async def update(self, key, func: Callable[[Any], Optional[Any]]):
+        value = func(self.data.get(key))
         if value is None:
-            raise KeyError(key)
-        return json.loads(value)
+            self.data.pop(key, None)
+        else:
+            self.data[key] = value
+        return value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
 
-    def __delitem__(self, key):
-        result = self.redis.hdel(self.name, key)
-        if result == 0:
-            raise KeyError(key)
+    async def contains(self, key) -> bool:
+        return key in self.data
 
-    def __contains__(self, key):
-        return self.redis.hexists(self.name, key)
+    async def keys(self) -> list:
+        return list(self.data.keys())
 
-    def __len__(self):
-        return self.redis.hlen(self.name)
 
-    def keys(self):
-        return self.redis.hkeys(self.name)
+class AsyncRedisDict:
+    """
+    JSON values in a Redis hash, accessed through the shared async client.
 
-    def values(self):
-        return [json.loads(v) for v in self.redis.hvals(self.name)]
+    With a `cache_ttl`, `get_cached` serves reads from a local copy for up to
+    `cache_ttl` seconds; writes made through this instance update it right away.
+    """
 
-    def items(self):
-        return [(k, json.loads(v)) for k, v in self.redis.hgetall(self.name).items()]
+    def __init__(self, name, redis_url, cache_ttl: float = 0):
+        self.name = name
+        self.redis = get_redis_connection(redis_url)
+        self.cache_ttl = cache_ttl
+        self._cache: dict = {}
 
-    def get(self, key, default=None):
-        try:
-            return self[key]
-        except KeyError:
+    def _cache_set(self, key, value):
+        if self.cache_ttl:
+            self._cache[key] = (value, time.monotonic() + self.cache_ttl)
+
+    async def get(self, key, default=None):
+        value = await self.redis.hget(self.name, key)
+        if value is None:
+            self._cache.pop(key, None)
             return default
 
-    def clear(self):
-        self.redis.delete(self.name)
+        value = json.loads(value)
+        self._cache_set(key, value)
+        return value
+
+    async def get_cached(self, key, default=None):
+        if key in self._cache:
+            value, expires_at = self._cache[key]
+            if expires_at > time.monotonic():
+                return value
+        return await self.get(key, default)
+
+    async def get_many(self, keys: list) -> list:
+        if not keys:
+            return []
+
+        values = await self.redis.hmget(self.name, keys)
+        return [json.loads(value) if value is not None else None for value in values]
+
+    async def set(self, key, value):
+        await self.redis.hset(self.name, key, json.dumps(value))
+        self._cache_set(key, value)
+
+    async def update(self, key, func: Callable[[Any], Optional[Any]]):
+        """
+        Atomically replace a value with `func(value)`, deleting it if that
+        returns None. The hash is watched so a concurrent write from another
+        instance makes the transaction retry instead of being overwritten.
+        """
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(self.name)
+                    current = await pipe.hget(self.name, key)
+                    value = func(json.loads(current) if current is not None else None)
+
+                    pipe.multi()
+                    if value is None:
+                        pipe.hdel(self.name, key)
+                    else:
+                        pipe.hset(self.name, key, json.dumps(value))
+                    await pipe.execute()
+                    break
+                except WatchError:
+                    continue
 
-    def update(self, other=None, **kwargs):
-        if other is not None:
-            for k, v in other.items() if hasattr(other, "items") else other:
-                self[k] = v
-        for k, v in kwargs.items():
-            self[k] = v
+        if value is None:
+            self._cache.pop(key, None)
+        else:
+            self._cache_set(key, value)
+        return value
+
+    async def delete(self, key):
+        await self.redis.hdel(self.name, key)
+        self._cache.pop(key, None)
+
+    async def contains(self, key) -> bool:
+        return await self.redis.hexists(self.name, key)
+
+    async def keys(self) -> list:
+        return await self.redis.hkeys(self.name)
+
+
+####################
+# Usage Pools
+#
+# Track which models are in use by which session. Every entry carries the time
+# of its last update and counts as expired `timeout` seconds later, so readers
+# never see stale usage and cleanup is a single range delete, not a scan.
+####################
+
+
+class UsagePool:
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.data: dict[tuple[str, str], float] = {}
+
+    async def touch(self, model_id: str, sid: str):
+        self.data[(model_id, sid)] = time.time()
+
+    async def get_models_in_use(self) -> list[str]:
+        cutoff = time.time() - self.timeout
+        return sorted(
+            {model_id for (model_id, _), at in self.data.items() if at >= cutoff}
+        )
+
+    async def cleanup(self) -> bool:
+        """Drop expired entries, returns True if any were dropped."""
+        cutoff = time.time() - self.timeout
+        expired = [key for key, at in self.data.items() if at < cutoff]
+        for key in expired:
+            del self.data[key]
+        return len(expired) > 0
+
+
+class RedisUsagePool:
+    """`UsagePool` backed by a Redis sorted set scored by update time."""
+
+    def __init__(self, name, redis_url, timeout: float):
+        self.name = name
+        self.redis = get_redis_connection(redis_url)
+        self.timeout = timeout
+
+    async def touch(self, model_id: str, sid: str):
+        await self.redis.zadd(self.name, {json.dumps([model_id, sid]): time.time()})
 
-    def setdefault(self, key, default=None):
-        if key not in self:
-            self[key] = default
-        return self[key]
+    async def get_models_in_use(self) -> list[str]:
+        members = await self.redis.zrangebyscore(
+            self.name, time.time() - self.timeout, "+inf"
+        )
+        return sorted({json.loads(member)[0] for member in members})
+
+    async def cleanup(self) -> bool:
+        """Drop expired entries, returns True if any were dropped."""
+        removed = await self.redis.zremrangebyscore(
+            self.name, "-inf", f"({time.time() - self.timeout}"
+        )
+        return removed > 0
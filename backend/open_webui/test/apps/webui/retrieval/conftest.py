@@ -0,0 +1,9 @@
+import pytest
+
+from open_webui.retrieval.vector.dbs import local
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(local, "LOCAL_VECTOR_DB_PATH", str(tmp_path))
+    return local.LocalClient()
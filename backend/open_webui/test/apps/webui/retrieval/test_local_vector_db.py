@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+
+from open_webui.retrieval.vector.dbs import local
+
+
+def make_items(count: int, dim: int = 32, seed: int = 0) -> list[dict]:
+    vectors = np.random.default_rng(seed).normal(size=(count, dim))
+    return [
+        {
+            "id": f"item-{i}",
+            "text": f"text {i}",
+            "vector": vector.tolist(),
+            "metadata": {"file_id": f"file-{i % 2}", "index": i},
+        }
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def test_search_query_and_delete(client):
+    items = make_items(50)
+    assert not client.has_collection("file-test")
+    client.insert("file-test", items)
+    assert client.has_collection("file-test")
+
+    result = client.search("file-test", [items[3]["vector"], items[4]["vector"]], 2)
+    assert [ids[0] for ids in result.ids] == ["item-3", "item-4"]
+    assert result.distances[0][0] == pytest.approx(1.0, abs=1e-5)
+    assert result.distances[0][0] >= result.distances[0][1]
+
+    result = client.query("file-test", {"file_id": "file-1"}, limit=2)
+    assert result.ids == [["item-1", "item-3"]]
+
+    client.delete("file-test", ids=["item-3"])
+    client.delete("file-test", filter={"file_id": "file-0"})
+    result = client.search("file-test", [items[3]["vector"]], 50)
+    assert "item-3" not in result.ids[0]
+    assert len(result.ids[0]) == 24
+
+    client.upsert("file-test", [{**items[5], "text": "updated"}])
+    assert client.search("file-test", [items[5]["vector"]], 1).documents == [
+        ["updated"]
+    ]
+
+    client.delete_collection("file-test")
+    assert not client.has_collection("file-test")
+    assert client.search("file-test", [items[5]["vector"]], 1) is None
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_quantized_segments(client, monkeypatch, dtype):
+    monkeypatch.setattr(local, "LOCAL_VECTOR_DB_DTYPE", dtype)
+    items = make_items(20)
+    client.insert("file-test", items)
+
+    result = client.search("file-test", [items[7]["vector"]], 1)
+    assert result.ids == [["item-7"]]
+    assert result.distances[0][0] == pytest.approx(1.0, abs=0.02)
+
+
+def test_background_compaction(client, monkeypatch):
+    monkeypatch.setattr(local, "LOCAL_VECTOR_DB_ANN_THRESHOLD", 1000)
+    monkeypatch.setattr(local, "LOCAL_VECTOR_DB_ANN_NPROBE", 1000)
+    items = make_items(1200)
+    for i in range(0, 1000, 100):
+        client.insert("file-test", items[i : i + 100])
+    client.executor.submit(lambda: None).result()
+    client.insert("file-test", items[1000:])
+
+    # The first 1000 vectors were merged into an indexed segment
+    collection = client._get_collection("file-test")
+    assert [segment.index is not None for segment in collection.segments] == [
+        True,
+        False,
+    ]
+
+    # A new client reads the compacted collection from disk
+    result = local.LocalClient().search("file-test", [items[42]["vector"]], 3)
+    assert result.ids[0][0] == "item-42"
+
+    # Deleting a third of the vectors merges everything into one segment
+    client.delete("file-test", ids=[item["id"] for item in items[:400]])
+    client.executor.submit(lambda: None).result()
+    assert len(collection.segments) == 1
+    assert len(client.get("file-test").ids[0]) == 800
+    assert client.search("file-test", [items[900]["vector"]], 1).ids == [["item-900"]]
+
+
+@pytest.mark.parametrize("quantization", ["int8", "binary"])
+def test_quantized_search(client, monkeypatch, quantization):
+    monkeypatch.setattr(local, "VECTOR_DB_QUANTIZATION", quantization)
+    monkeypatch.setattr(local, "LOCAL_VECTOR_DB_ANN_THRESHOLD", 1000)
+    items = make_items(1200, dim=64)
+    client.insert("file-test", items[:1000])
+    client.executor.submit(lambda: None).result()
+    client.insert("file-test", items[1000:])
+    client.delete("file-test", ids=["item-10"])
+
+    collection = client._get_collection("file-test")
+    assert all(segment.codes is not None for segment in collection.segments)
+
+    # Candidates are re-scored with the stored float32 vectors
+    result = client.search(
+        "file-test",
+        [items[10]["vector"], items[42]["vector"], items[1100]["vector"]],
+        3,
+    )
+    assert "item-10" not in result.ids[0]
+    assert [ids[0] for ids in result.ids[1:]] == ["item-42", "item-1100"]
+    assert result.distances[1][0] == pytest.approx(1.0, abs=1e-5)
+    assert result.distances[1] == sorted(result.distances[1], reverse=True)
+
+
+def test_recreated_by_another_process(client):
+    items = make_items(20)
+    client.insert("file-test", items[:10])
+    assert client.search("file-test", [items[3]["vector"]], 1).ids == [["item-3"]]
+
+    # Another worker drops the collection and creates it again with other items,
+    # its version counter matches the one cached here
+    other = local.LocalClient()
+    other.delete_collection("file-test")
+    other.insert("file-test", items[10:])
+    result = client.search("file-test", [items[13]["vector"]], 1)
+    assert result.ids == [["item-13"]]
+    assert result.documents == [["text 13"]]
+
+    other.delete_collection("file-test")
+    assert client.search("file-test", [items[13]["vector"]], 1) is None
+    client.insert("file-test", items[:1])
+    assert client.get("file-test").ids == [["item-0"]]
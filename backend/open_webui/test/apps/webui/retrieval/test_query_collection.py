@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from open_webui.retrieval import utils
+from open_webui.retrieval.vector.main import SearchResult
+
+
+class FirstVectorClient:
+    """Wraps a client the way a backend that only searches vectors[0] behaves."""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = 0
+
+    def search(self, collection_name, vectors, limit):
+        self.calls += 1
+        result = self.client.search(collection_name, vectors[:1], limit)
+        return SearchResult(
+            ids=result.ids,
+            distances=result.distances,
+            documents=result.documents,
+            metadatas=result.metadatas,
+        )
+
+
+@pytest.fixture
+def collections(client):
+    vectors = np.eye(8)
+    for name in ["collection-a", "collection-b"]:
+        client.insert(
+            name,
+            [
+                {
+                    "id": f"{name}-{i}",
+                    "text": f"{name} text {i}",
+                    "vector": vector.tolist(),
+                    "metadata": {"index": i},
+                }
+                for i, vector in enumerate(vectors)
+            ],
+        )
+    return client
+
+
+def embedding_function(queries):
+    # Query "i" embeds onto the i-th stored vector
+    return [np.eye(8)[int(query)].tolist() for query in queries]
+
+
+@pytest.mark.parametrize("wrap", [False, True])
+def test_query_collection_returns_hits_for_every_query(monkeypatch, collections, wrap):
+    search_client = FirstVectorClient(collections) if wrap else collections
+    monkeypatch.setattr(utils, "VECTOR_DB", "local")
+    monkeypatch.setattr(utils, "VECTOR_DB_CLIENT", search_client)
+
+    result = utils.query_collection(
+        ["collection-a", "collection-b"], ["1", "4", "6"], embedding_function, k=6
+    )
+
+    documents = result["documents"][0]
+    for i in [1, 4, 6]:
+        assert f"collection-a text {i}" in documents
+        assert f"collection-b text {i}" in documents
+    if wrap:
+        # One batched call per collection, then one call per query
+        assert search_client.calls == 2 * (1 + 3)
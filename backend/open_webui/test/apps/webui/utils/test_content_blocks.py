@@ -0,0 +1,67 @@
+from open_webui.utils.content_blocks import (
+    ContentBlockBuilder,
+    serialize_content_blocks,
+)
+
+
+def stream(builder, text, chunk_size=3):
+    end = False
+    for i in range(0, len(text), chunk_size):
+        end = builder.append_content(text[i : i + chunk_size])
+        assert builder.serialize() == serialize_content_blocks(builder.blocks)
+        if end:
+            break
+    builder.finalize()
+    return end
+
+
+def test_reasoning_tags_split_across_deltas():
+    builder = ContentBlockBuilder()
+    stream(builder, "Hello <think>step one\nstep two</think> answer <b>bold</b>")
+
+    assert [block["type"] for block in builder.blocks] == [
+        "text",
+        "reasoning",
+        "text",
+    ]
+    assert builder.blocks[1]["content"] == "step one\nstep two"
+    assert builder.blocks[2]["content"] == "answer <b>bold</b>"
+    assert "> step one\n> step two" in builder.serialize()
+
+
+def test_code_interpreter_block_ends_stream():
+    builder = ContentBlockBuilder(detect_code_interpreter=True)
+    end = stream(
+        builder,
+        'Run it\n<code_interpreter type="code" lang="python">\nprint(1)\n</code_interpreter> ignored',
+    )
+
+    assert end
+    assert builder.blocks[-1]["type"] == "code_interpreter"
+    assert builder.blocks[-1]["attributes"] == {"type": "code", "lang": "python"}
+    assert builder.blocks[-1]["content"] == "print(1)"
+
+
+def test_reasoning_content_then_answer():
+    builder = ContentBlockBuilder()
+    for value in ["first\n", "second"]:
+        builder.append_reasoning(value)
+        assert builder.serialize() == serialize_content_blocks(builder.blocks)
+
+    builder.append_content("Answer")
+    builder.finalize()
+
+    assert builder.blocks[-2]["type"] == "reasoning"
+    assert "duration" in builder.blocks[-2]
+    assert builder.serialize().endswith("</details>\nAnswer")
+
+
+def test_text_strips_tag_blocks():
+    builder = ContentBlockBuilder()
+    stream(
+        builder,
+        "<think>plan</think>Answer <|begin_of_solution|>42<|end_of_solution|> done",
+    )
+
+    assert builder.content.startswith("<think>plan</think>")
+    assert builder.text == "Answer  done"
@@ -0,0 +1,50 @@
+from open_webui.utils.load_balancer import LoadBalancer
+
+
+def test_least_outstanding_spreads_requests():
+    balancer = LoadBalancer(strategy="least_outstanding")
+    urls = ["http://a", "http://b", "http://c"]
+
+    picked = []
+    for _ in range(3):
+        url = balancer.select(urls, "llama3:latest")
+        balancer.begin(url)
+        picked.append(url)
+
+    assert sorted(picked) == urls
+
+    balancer.end("http://b")
+    assert balancer.select(urls, "llama3:latest") == "http://b"
+
+
+def test_affinity_prefers_loaded_model_until_busy():
+    balancer = LoadBalancer(strategy="affinity")
+    urls = ["http://a", "http://b"]
+    balancer.set_loaded_models("http://b", ["llama3:latest"])
+
+    assert balancer.select(urls, "llama3:latest") == "http://b"
+
+    balancer.begin("http://b")
+    balancer.begin("http://b")
+    assert balancer.select(urls, "llama3:latest") == "http://a"
+
+
+def test_circuit_breaker():
+    balancer = LoadBalancer(strategy="least_outstanding", failure_threshold=2)
+    urls = ["http://a", "http://b"]
+    balancer.begin("http://b")
+
+    for _ in range(2):
+        balancer.begin("http://a")
+        balancer.end("http://a", success=False)
+
+    assert not balancer.is_available("http://a")
+    assert balancer.select(urls, "llama3:latest") == "http://b"
+
+    # With every candidate open, requests still go somewhere
+    assert balancer.select(["http://a"], "llama3:latest") == "http://a"
+
+    balancer.get_state("http://a").open_until = 0.0
+    balancer.begin("http://a")
+    balancer.end("http://a", success=True)
+    assert balancer.get_state("http://a").failures == 0
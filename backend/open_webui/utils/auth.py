@@ -12,6 +12,7 @@ from datetime import UTC, datetime, timedelta
 from typing import Optional, Union, List, Dict
 
 from open_webui.models.users import Users
+from open_webui.utils.user_activity import LastActive
 
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import (
@@ -21,7 +22,7 @@ from open_webui.env import (
     SRC_LOG_LEVELS,
 )
 
-from fastapi import BackgroundTasks, Depends, HTTPException, Request, Response, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from passlib.context import CryptContext
 
@@ -151,7 +152,6 @@ def get_http_authorization_cred(auth_header: str):
 
 def get_current_user(
     request: Request,
-    background_tasks: BackgroundTasks,
     auth_token: HTTPAuthorizationCredentials = Depends(bearer_security),
 ):
     token = None
@@ -197,17 +197,15 @@ def get_current_user(
         )
 
     if data is not None and "id" in data:
-        user = Users.get_user_by_id(data["id"])
+        user = Users.get_user_by_id_cached(data["id"])
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=ERROR_MESSAGES.INVALID_TOKEN,
             )
         else:
-            # Refresh the user's last active timestamp asynchronously
-            # to prevent blocking the request
-            if background_tasks:
-                background_tasks.add_task(Users.update_user_last_active_by_id, user.id)
+            # Recorded in memory, written in bulk by the periodic flush
+            LastActive.update(user.id)
         return user
     else:
         raise HTTPException(
@@ -225,7 +223,7 @@ def get_current_user_by_api_key(api_key: str):
             detail=ERROR_MESSAGES.INVALID_TOKEN,
         )
     else:
-        Users.update_user_last_active_by_id(user.id)
+        LastActive.update(user.id)
 
     return user
 
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from typing import Optional
+
+from open_webui.models.chats import Chats
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    REALTIME_CHAT_SAVE_INTERVAL,
+    REALTIME_CHAT_SAVE_MAX_PENDING,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class ChatMessageBuffer:
+    """
+    Write-behind buffer for streamed assistant messages.
+
+    Updates are coalesced per (chat_id, message_id) and persisted through
+    `Chats.upsert_message_to_chat_by_id_and_message_id` in a worker thread,
+    either periodically (every `interval` seconds), as soon as more than
+    `max_pending` messages are waiting, or explicitly via `flush` (at stream
+    end or cancellation). At most `interval` seconds of updates can be lost
+    if the process dies. The chat search index is only refreshed by the
+    explicit flushes, once the message is complete.
+    """
+
+    def __init__(self, interval: float = 1.0, max_pending: int = 100):
+        self.interval = interval
+        self.max_pending = max_pending
+
+        self._pending: dict[tuple[str, str], dict] = {}
+        self._writes: dict[tuple[str, str], asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._size_flush: Optional[asyncio.Task] = None
+
+    def update(self, chat_id: str, message_id: str, message: dict):
+        key = (chat_id, message_id)
+        self._pending[key] = {**self._pending.get(key, {}), **message}
+
+        if len(self._pending) > self.max_pending and (
+            self._size_flush is None or self._size_flush.done()
+        ):
+            self._size_flush = asyncio.create_task(self.flush())
+
+    async def flush(
+        self,
+        chat_id: Optional[str] = None,
+        message_id: Optional[str] = None,
+        final: Optional[bool] = None,
+    ):
+        """
+        Persist pending updates, either all of them or only those of one
+        message. Flushing one message marks it `final` by default.
+        """
+        if final is None:
+            final = chat_id is not None
+
+        # Swap the pending updates out before writing, so updates and other
+        # flushes don't wait for the database
+        if chat_id is None:
+            items = list(self._pending.items())
+            self._pending = {}
+        else:
+            key = (chat_id, message_id)
+            message = self._pending.pop(key, None)
+            if message is None and not final:
+                # Nothing buffered, only wait for a write that is still running
+                if key in self._writes:
+                    await asyncio.shield(self._writes[key])
+                return
+            items = [(key, message or {})]
+
+        if not items:
+            return
+
+        keys = [key for key, _ in items]
+        # Writes of the same message still have to land in order
+        previous = {self._writes[key] for key in keys if key in self._writes}
+        write = asyncio.ensure_future(self._write_after(previous, items, final))
+        for key in keys:
+            self._writes[key] = write
+        write.add_done_callback(lambda _: self._forget(keys, write))
+
+        await asyncio.shield(write)
+
+    async def _write_after(self, previous: set, items, final: bool):
+        if previous:
+            await asyncio.wait(previous)
+        await asyncio.to_thread(self._write, items, final)
+
+    def _forget(self, keys, write: asyncio.Future):
+        for key in keys:
+            if self._writes.get(key) is write:
+                del self._writes[key]
+
+    def _write(self, items, final: bool = False):
+        for (chat_id, message_id), message in items:
+            try:
+                if message:
+                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                        chat_id, message_id, message, update_search_index=final
+                    )
+                elif final:
+                    # Already saved by a periodic flush, only index it
+                    Chats.update_search_index_by_id(chat_id)
+            except Exception as e:
+                log.exception(f"Error saving message {chat_id}/{message_id}: {e}")
+
+    async def _periodic_flush(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                log.exception(f"Error flushing chat message buffer: {e}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._periodic_flush())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush(final=True)
+
+
+ChatMessages = ChatMessageBuffer(
+    interval=REALTIME_CHAT_SAVE_INTERVAL, max_pending=REALTIME_CHAT_SAVE_MAX_PENDING
+)
@@ -0,0 +1,483 @@
+import html
+import json
+import re
+import time
+from typing import Optional
+
+
+REASONING_TAGS = [
+    ("think", "/think"),
+    ("thinking", "/thinking"),
+    ("reason", "/reason"),
+    ("reasoning", "/reasoning"),
+    ("thought", "/thought"),
+    ("Thought", "/Thought"),
+    ("|begin_of_thought|", "|end_of_thought|"),
+]
+
+CODE_INTERPRETER_TAGS = [("code_interpreter", "/code_interpreter")]
+
+SOLUTION_TAGS = [("|begin_of_solution|", "|end_of_solution|")]
+
+
+def split_content_and_whitespace(content):
+    content_stripped = content.rstrip()
+    original_whitespace = (
+        content[len(content_stripped) :] if len(content) > len(content_stripped) else ""
+    )
+    return content_stripped, original_whitespace
+
+
+def is_opening_code_block(content):
+    backtick_segments = content.split("```")
+    # Even number of segments means the last backticks are opening a new block
+    return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
+
+
+def extract_attributes(tag_content):
+    """Extract attributes from a tag if they exist."""
+    attributes = {}
+    if not tag_content:  # Ensure tag_content is not None
+        return attributes
+    # Match attributes in the format: key="value" (ignores single quotes for simplicity)
+    matches = re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content)
+    for key, value in matches:
+        attributes[key] = value
+    return attributes
+
+
+def render_reasoning_lines(content):
+    return "\n".join(
+        (f"> {line}" if not line.startswith(">") else line)
+        for line in content.splitlines()
+    )
+
+
+def serialize_content_block(content, block, raw=False, reasoning_display=None):
+    """
+    Append the serialized form of a single block to the already serialized
+    `content` of the blocks before it and return the result.
+    """
+    if block["type"] == "text":
+        content = f"{content}{block['content'].strip()}\n"
+    elif block["type"] == "tool_calls":
+        block_content = block.get("content", [])
+        results = block.get("results", [])
+
+        if results:
+
+            result_display_content = ""
+
+            for result in results:
+                tool_call_id = result.get("tool_call_id", "")
+                tool_name = ""
+
+                for tool_call in block_content:
+                    if tool_call.get("id", "") == tool_call_id:
+                        tool_name = tool_call.get("function", {}).get("name", "")
+                        break
+
+                result_display_content = f"{result_display_content}\n> {tool_name}: {result.get('content', '')}"
+
+            if not raw:
+                content = f'{content}\n<details type="tool_calls" done="true" content="{html.escape(json.dumps(block_content))}" results="{html.escape(json.dumps(results))}">\n<summary>Tool Executed</summary>\n{result_display_content}\n</details>\n'
+        else:
+            tool_calls_display_content = ""
+
+            for tool_call in block_content:
+                tool_calls_display_content = f"{tool_calls_display_content}\n> Executing {tool_call.get('function', {}).get('name', '')}"
+
+            if not raw:
+                content = f'{content}\n<details type="tool_calls" done="false" content="{html.escape(json.dumps(block_content))}">\n<summary>Tool Executing...</summary>\n{tool_calls_display_content}\n</details>\n'
+
+    elif block["type"] == "reasoning":
+        reasoning_display_content = (
+            reasoning_display
+            if reasoning_display is not None
+            else render_reasoning_lines(block["content"])
+        )
+
+        reasoning_duration = block.get("duration", None)
+
+        if reasoning_duration is not None:
+            if raw:
+                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+            else:
+                content = f'{content}\n<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+        else:
+            if raw:
+                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+            else:
+                content = f'{content}\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
+
+    elif block["type"] == "code_interpreter":
+        attributes = block.get("attributes", {})
+        output = block.get("output", None)
+        lang = attributes.get("lang", "")
+
+        content_stripped, original_whitespace = split_content_and_whitespace(content)
+        if is_opening_code_block(content_stripped):
+            # Remove trailing backticks that would open a new block
+            content = content_stripped.rstrip("`").rstrip() + original_whitespace
+        else:
+            # Keep content as is - either closing backticks or no backticks
+            content = content_stripped + original_whitespace
+
+        if output:
+            output = html.escape(json.dumps(output))
+
+            if raw:
+                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
+            else:
+                content = f'{content}\n<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+        else:
+            if raw:
+                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
+            else:
+                content = f'{content}\n<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+
+    else:
+        block_content = str(block["content"]).strip()
+        content = f"{content}{block['type']}: {block_content}\n"
+
+    return content
+
+
+def serialize_content_blocks(content_blocks, raw=False):
+    content = ""
+
+    for block in content_blocks:
+        content = serialize_content_block(content, block, raw=raw)
+
+    return content.strip()
+
+
+class ContentBlockBuilder:
+    """
+    Incrementally assembles the content blocks of a streamed assistant message.
+
+    Deltas are appended to the active (last) block and only the newly received
+    text is scanned for opening/closing tags, so the per-delta cost no longer
+    grows with the length of the whole answer. Serialization keeps a cached
+    prefix for every block before the active one and renders reasoning blocks
+    line by line, so only the tail of the message is re-serialized per delta.
+
+    Blocks other than the last one are treated as immutable once another block
+    has been appended after them; callers may still update the last block in
+    place (e.g. tool call results or code interpreter output).
+    """
+
+    def __init__(
+        self,
+        content: str = "",
+        detect_reasoning: bool = True,
+        detect_code_interpreter: bool = False,
+        detect_solution: bool = True,
+    ):
+        self.blocks = [{"type": "text", "content": content}]
+
+        self._chunks = [content] if content else []
+
+        self._tags = {}
+        if detect_reasoning:
+            self._tags.update(
+                {start: ("reasoning", end) for start, end in REASONING_TAGS}
+            )
+        if detect_code_interpreter:
+            self._tags.update(
+                {
+                    start: ("code_interpreter", end)
+                    for start, end in CODE_INTERPRETER_TAGS
+                }
+            )
+        if detect_solution:
+            self._tags.update(
+                {start: ("solution", end) for start, end in SOLUTION_TAGS}
+            )
+
+        self._start_tag_regex = (
+            re.compile(
+                "<("
+                + "|".join(
+                    re.escape(tag)
+                    for tag in sorted(self._tags.keys(), key=len, reverse=True)
+                )
+                + r")(\s.*?)?>"
+            )
+            if self._tags
+            else None
+        )
+
+        # Offset in the active block's content from which tags still need to be scanned
+        self._scan_offset = 0
+
+        # Serialized checkpoints: [(block, serialized content up to and including block)]
+        self._checkpoints = []
+
+        # Incremental reasoning rendering: (block, rendered source length, rendered text)
+        self._reasoning_cache = None
+
+    @property
+    def content(self) -> str:
+        """The raw streamed text, as received from the model."""
+        return "".join(self._chunks)
+
+    @property
+    def text(self) -> str:
+        """The streamed text without its reasoning, solution and code interpreter blocks."""
+        text = self.content
+        for start_tag, (_, end_tag) in self._tags.items():
+            text = re.sub(
+                rf"<{re.escape(start_tag)}(.*?)>.*?<{re.escape(end_tag)}>",
+                "",
+                text,
+                flags=re.DOTALL,
+            )
+        return text
+
+    ####################
+    # Mutation
+    ####################
+
+    def append_block(self, block: dict):
+        self.blocks.append(block)
+        self._scan_offset = 0
+
+    def append_reasoning(self, value: str):
+        """Append provider-native reasoning (e.g. `reasoning_content`) to the message."""
+        if not self.blocks or self.blocks[-1]["type"] != "reasoning":
+            self.append_block(
+                {
+                    "type": "reasoning",
+                    "start_tag": "think",
+                    "end_tag": "/think",
+                    "attributes": {"type": "reasoning_content"},
+                    "content": "",
+                    "started_at": time.time(),
+                }
+            )
+
+        self.blocks[-1]["content"] += value
+
+    def append_content(self, value: str) -> bool:
+        """
+        Append a content delta and process any tags it completes.
+
+        Returns True when a code interpreter block has just been closed, in
+        which case the caller should stop consuming the stream and run it.
+        """
+        self._chunks.append(value)
+
+        if (
+            self.blocks
+            and self.blocks[-1]["type"] == "reasoning"
+            and self.blocks[-1].get("attributes", {}).get("type") == "reasoning_content"
+        ):
+            reasoning_block = self.blocks[-1]
+            reasoning_block["ended_at"] = time.time()
+            reasoning_block["duration"] = int(
+                reasoning_block["ended_at"] - reasoning_block["started_at"]
+            )
+
+            self.append_block({"type": "text", "content": ""})
+
+        if not self.blocks:
+            self.append_block({"type": "text", "content": ""})
+
+        self.blocks[-1]["content"] = self.blocks[-1]["content"] + value
+
+        return self._process_tags()
+
+    def finalize(self):
+        """Clean up the last text block once a stream has ended."""
+        if self.blocks and self.blocks[-1]["type"] == "text":
+            self.blocks[-1]["content"] = self.blocks[-1]["content"].strip()
+
+            if not self.blocks[-1]["content"]:
+                self.blocks.pop()
+
+                if not self.blocks:
+                    self.blocks.append({"type": "text", "content": ""})
+
+        self._scan_offset = 0
+
+    ####################
+    # Tag detection
+    ####################
+
+    def _could_open_tag(self, fragment: str) -> bool:
+        """Whether `fragment` (starting with "<") may still become an opening tag."""
+        rest = fragment[1:]
+        for tag in self._tags:
+            if tag.startswith(rest):
+                return True
+            if rest.startswith(tag):
+                after = rest[len(tag) :]
+                if after == "":
+                    return True
+                if after[0].isspace() and ">" not in after and "\n" not in after[1:]:
+                    return True
+        return False
+
+    def _process_tags(self) -> bool:
+        end = False
+
+        while self.blocks:
+            block = self.blocks[-1]
+
+            if block["type"] == "text":
+                if not self._open_tag(block):
+                    break
+            elif block["type"] in ("reasoning", "code_interpreter", "solution") and (
+                block.get("end_tag") is not None
+                and block.get("attributes", {}).get("type") != "reasoning_content"
+            ):
+                closed_type = self._close_tag(block)
+                if closed_type is None:
+                    break
+                if closed_type == "code_interpreter":
+                    end = True
+                    break
+            else:
+                break
+
+        return end
+
+    def _open_tag(self, block: dict) -> bool:
+        if self._start_tag_regex is None:
+            return False
+
+        text = block["content"]
+        pos = text.find("<", self._scan_offset)
+
+        while pos != -1:
+            match = self._start_tag_regex.match(text, pos)
+            if match:
+                start_tag = match.group(1)
+                content_type, end_tag = self._tags[start_tag]
+                attributes = extract_attributes(match.group(2) or "")
+
+                before_tag = text[: match.start()]
+                after_tag = text[match.end() :]
+
+                block["content"] = before_tag
+                if not block["content"]:
+                    self.blocks.pop()
+
+                self.append_block(
+                    {
+                        "type": content_type,
+                        "start_tag": start_tag,
+                        "end_tag": end_tag,
+                        "attributes": attributes,
+                        "content": after_tag,
+                        "started_at": time.time(),
+                    }
+                )
+                return True
+
+            if self._could_open_tag(text[pos:]):
+                # Wait for more data before deciding on this candidate
+                self._scan_offset = pos
+                return False
+
+            pos = text.find("<", pos + 1)
+
+        self._scan_offset = len(text)
+        return False
+
+    def _close_tag(self, block: dict) -> Optional[str]:
+        end_tag = f"<{block['end_tag']}>"
+        text = block["content"]
+
+        idx = text.find(end_tag, max(0, self._scan_offset - len(end_tag) + 1))
+        if idx == -1:
+            self._scan_offset = len(text)
+            return None
+
+        content_type = block["type"]
+
+        # Strip any nested start tags from the content inside the tag
+        block_content = re.sub(
+            rf"<{re.escape(block['start_tag'])}(.*?)>", "", text[:idx]
+        ).strip()
+        leftover_content = text[idx + len(end_tag) :].strip()
+
+        if block_content:
+            block["content"] = block_content
+            block["ended_at"] = time.time()
+            block["duration"] = int(block["ended_at"] - block["started_at"])
+
+            if content_type != "code_interpreter":
+                self.append_block({"type": "text", "content": leftover_content})
+        else:
+            # Remove the block if content is empty
+            self.blocks.pop()
+            self.append_block({"type": "text", "content": leftover_content})
+
+        self._scan_offset = 0
+        return content_type
+
+    ####################
+    # Serialization
+    ####################
+
+    def _render_reasoning(self, block: dict) -> str:
+        text = block["content"]
+
+        cached = self._reasoning_cache
+        if (
+            cached is None
+            or cached[0] is not block
+            or cached[1] > len(text)
+            or (cached[1] and text[cached[1] - 1] != "\n")
+        ):
+            cached = (block, 0, "")
+
+        _, rendered_len, rendered = cached
+
+        boundary = text.rfind("\n", rendered_len) + 1
+        if boundary > rendered_len:
+            lines = render_reasoning_lines(text[rendered_len:boundary])
+            if lines:
+                rendered = f"{rendered}\n{lines}" if rendered else lines
+            rendered_len = boundary
+
+        self._reasoning_cache = (block, rendered_len, rendered)
+
+        tail = render_reasoning_lines(text[rendered_len:])
+        if rendered and tail:
+            return f"{rendered}\n{tail}"
+        return rendered or tail
+
+    def _serialized_prefix(self) -> str:
+        """Serialized content of every block except the active one, cached."""
+        prefix_blocks = self.blocks[:-1]
+
+        matched = 0
+        for checkpoint, block in zip(self._checkpoints, prefix_blocks):
+            if checkpoint[0] is not block:
+                break
+            matched += 1
+
+        del self._checkpoints[matched:]
+
+        content = self._checkpoints[-1][1] if self._checkpoints else ""
+        for block in prefix_blocks[matched:]:
+            content = serialize_content_block(content, block)
+            self._checkpoints.append((block, content))
+
+        return content
+
+    def serialize(self) -> str:
+        if not self.blocks:
+            return ""
+
+        block = self.blocks[-1]
+        return serialize_content_block(
+            self._serialized_prefix(),
+            block,
+            reasoning_display=(
+                self._render_reasoning(block) if block["type"] == "reasoning" else None
+            ),
+        ).strip()
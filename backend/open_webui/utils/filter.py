@@ -1,35 +1,96 @@
 import inspect
 import logging
+import threading
+import time
+from typing import Optional
 
 from open_webui.utils.plugin import load_function_module_by_id
-from open_webui.models.functions import Functions
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.models.functions import FunctionStateModel, Functions
+from open_webui.env import FILTER_CACHE_TTL, SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
 
-def get_sorted_filter_ids(model: dict):
-    def get_priority(function_id):
-        function = Functions.get_function_by_id(function_id)
-        if function is not None and hasattr(function, "valves"):
-            # TODO: Fix FunctionModel to include vavles
-            return (function.valves if function.valves else {}).get("priority", 0)
-        return 0
-
-    filter_ids = [function.id for function in Functions.get_global_filter_functions()]
+class FilterCache:
+    """
+    Snapshot of the filter functions' state (active, global, valves) and the
+    priority-sorted filter chains built from it, keyed by the model's own
+    filter ids so that changes to a model's meta get a new chain.
+
+    The snapshot is refreshed when functions are written through this
+    process, once it is older than `ttl` seconds so that changes made by
+    other instances are picked up, and by `sync`, which the plugin sync also
+    calls periodically. In between, building a model's filter chain and
+    applying valves need no database queries.
+    """
+
+    def __init__(self, ttl: float = FILTER_CACHE_TTL):
+        self.ttl = ttl
+        self.synced_at = 0.0
+        self.version: Optional[int] = None
+        self.filters: dict[str, FunctionStateModel] = {}
+        self.chains: dict[tuple[str, ...], list[FunctionStateModel]] = {}
+        self._lock = threading.Lock()
+
+    def sync(self):
+        with self._lock:
+            # Read the version first, a write during the query refreshes again
+            version = Functions.version
+            filters = {
+                function.id: function
+                for function in Functions.get_function_states(type="filter")
+            }
+
+            if filters != self.filters:
+                self.filters = filters
+                self.chains = {}
+            self.version = version
+            self.synced_at = time.monotonic()
+
+    def get_filters(self) -> dict[str, FunctionStateModel]:
+        if (
+            self.version != Functions.version
+            or time.monotonic() - self.synced_at >= self.ttl
+        ):
+            self.sync()
+        return self.filters
+
+    def get_valves(self, filter_id: str) -> dict:
+        filter = self.get_filters().get(filter_id)
+        return filter.valves if filter else {}
+
+    def get_chain(self, filter_ids: list[str]) -> list[FunctionStateModel]:
+        filters = self.get_filters()
+
+        key = tuple(sorted(set(filter_ids)))
+        chain = self.chains.get(key)
+        if chain is None:
+            chain = sorted(
+                (
+                    filter
+                    for filter in filters.values()
+                    if filter.is_active and (filter.is_global or filter.id in key)
+                ),
+                key=lambda filter: (filter.valves.get("priority", 0), filter.id),
+            )
+            self.chains[key] = chain
+        return chain
+
+
+FILTERS = FilterCache()
+
+
+def get_sorted_filter_functions(model: dict) -> list[FunctionStateModel]:
+    filter_ids = []
     if "info" in model and "meta" in model["info"]:
-        filter_ids.extend(model["info"]["meta"].get("filterIds", []))
-        filter_ids = list(set(filter_ids))
+        filter_ids = model["info"]["meta"].get("filterIds", [])
 
-    enabled_filter_ids = [
-        function.id
-        for function in Functions.get_functions_by_type("filter", active_only=True)
-    ]
+    return FILTERS.get_chain(filter_ids)
 
-    filter_ids = [fid for fid in filter_ids if fid in enabled_filter_ids]
-    filter_ids.sort(key=get_priority)
-    return filter_ids
+
+def get_sorted_filter_ids(model: dict):
+    return [function.id for function in get_sorted_filter_functions(model)]
 
 
 async def process_filter_functions(
@@ -60,7 +121,7 @@ async def process_filter_functions(
 
         # Apply valves to the function
         if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-            valves = Functions.get_function_valves_by_id(filter_id)
+            valves = FILTERS.get_valves(filter_id)
             function_module.valves = function_module.Valves(
                 **(valves if valves else {})
             )
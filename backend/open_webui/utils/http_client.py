@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import aiohttp
+
+from open_webui.env import (
+    AIOHTTP_CLIENT_DNS_CACHE_TTL,
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+    AIOHTTP_CLIENT_POOL_SIZE,
+    AIOHTTP_CLIENT_POOL_SIZE_PER_HOST,
+    AIOHTTP_CLIENT_TIMEOUT,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class HTTPClientPool:
+    """
+    Application-wide aiohttp session for upstream requests.
+
+    All requests share one connector, so connections to the same upstream
+    are kept alive and reused, DNS lookups are cached, and the number of
+    concurrent connections is bounded both in total (`limit`) and per
+    upstream host (`limit_per_host`). Requests that have to wait for a free
+    connection are counted so pool saturation can be monitored.
+
+    The session is opened in the app lifespan; `get_session` also opens it
+    lazily so the routers work outside of the app (e.g. in scripts).
+    Callers must not close the shared session, only release their responses.
+    """
+
+    def __init__(
+        self,
+        limit: int = 500,
+        limit_per_host: int = 100,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 60.0,
+        timeout: Optional[int] = None,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._stats = {
+            "requests": 0,
+            "request_errors": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "queued": 0,
+            "queued_total": 0,
+            "queued_seconds_total": 0.0,
+        }
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self._stats["requests"] += 1
+
+        async def on_request_exception(session, ctx, params):
+            self._stats["request_errors"] += 1
+
+        async def on_connection_queued_start(session, ctx, params):
+            ctx.queued_at = time.perf_counter()
+            self._stats["queued"] += 1
+            self._stats["queued_total"] += 1
+
+        async def on_connection_queued_end(session, ctx, params):
+            self._stats["queued"] -= 1
+            self._stats["queued_seconds_total"] += time.perf_counter() - getattr(
+                ctx, "queued_at", time.perf_counter()
+            )
+
+        async def on_connection_create_end(session, ctx, params):
+            self._stats["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self._stats["connections_reused"] += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_connection_queued_start.append(on_connection_queued_start)
+        trace_config.on_connection_queued_end.append(on_connection_queued_end)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    def get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[self._trace_config()],
+                trust_env=True,
+            )
+            self._loop = loop
+            log.info(
+                f"Opened upstream HTTP pool (limit={self.limit}, limit_per_host={self.limit_per_host})"
+            )
+        return self._session
+
+    async def start(self):
+        self.get_session()
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    def get_stats(self) -> dict:
+        hosts = {}
+        in_use = 0
+        idle = 0
+
+        connector = self._session.connector if self._session else None
+        if connector is not None and not connector.closed:
+            # The connector does not expose its bookkeeping publicly.
+            for key, protocols in getattr(connector, "_acquired_per_host", {}).items():
+                if protocols:
+                    hosts.setdefault(f"{key.host}:{key.port}", {"in_use": 0, "idle": 0})
+                    hosts[f"{key.host}:{key.port}"]["in_use"] = len(protocols)
+            for key, connections in getattr(connector, "_conns", {}).items():
+                if connections:
+                    hosts.setdefault(f"{key.host}:{key.port}", {"in_use": 0, "idle": 0})
+                    hosts[f"{key.host}:{key.port}"]["idle"] = len(connections)
+
+            in_use = len(getattr(connector, "_acquired", ()))
+            idle = sum(host["idle"] for host in hosts.values())
+
+        for host in hosts.values():
+            host["saturation"] = (
+                host["in_use"] / self.limit_per_host if self.limit_per_host else 0.0
+            )
+
+        return {
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "in_use": in_use,
+            "idle": idle,
+            "saturation": in_use / self.limit if self.limit else 0.0,
+            **self._stats,
+            "hosts": hosts,
+        }
+
+
+HTTP_CLIENT_POOL = HTTPClientPool(
+    limit=AIOHTTP_CLIENT_POOL_SIZE,
+    limit_per_host=AIOHTTP_CLIENT_POOL_SIZE_PER_HOST,
+    dns_cache_ttl=AIOHTTP_CLIENT_DNS_CACHE_TTL,
+    keepalive_timeout=AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+    timeout=AIOHTTP_CLIENT_TIMEOUT,
+)
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    return HTTP_CLIENT_POOL.get_session()
+
+
+async def cleanup_response(response: Optional[aiohttp.ClientResponse]):
+    """Hand the connection of a (streamed) response back to the shared pool."""
+    if response:
+        response.release()
@@ -0,0 +1,181 @@
+import logging
+import random
+import time
+from typing import Callable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class UpstreamState:
+    def __init__(self):
+        self.outstanding = 0
+        self.latency: Optional[float] = None
+        self.failures = 0
+        self.open_until = 0.0
+        self.loaded_models: set[str] = set()
+        self.loaded_models_at = 0.0
+
+
+####################
+# Strategies
+#
+# A strategy receives the balancer, the candidate upstream urls (never empty)
+# and the requested model, and returns one of the candidates.
+####################
+
+
+def _pick_lowest(urls: list[str], score: Callable[[str], float]) -> str:
+    scores = {url: score(url) for url in urls}
+    lowest = min(scores.values())
+    return random.choice([url for url in urls if scores[url] == lowest])
+
+
+def random_strategy(balancer: "LoadBalancer", urls: list[str], model: str) -> str:
+    return random.choice(urls)
+
+
+def least_outstanding_strategy(
+    balancer: "LoadBalancer", urls: list[str], model: str
+) -> str:
+    return _pick_lowest(urls, lambda url: balancer.get_state(url).outstanding)
+
+
+def ewma_strategy(balancer: "LoadBalancer", urls: list[str], model: str) -> str:
+    # Expected wait: smoothed response latency times the queue in front of us.
+    # Upstreams without a measurement yet score 0 so they get probed.
+    def score(url):
+        state = balancer.get_state(url)
+        return (state.latency or 0.0) * (state.outstanding + 1)
+
+    return _pick_lowest(urls, score)
+
+
+def affinity_strategy(balancer: "LoadBalancer", urls: list[str], model: str) -> str:
+    # Prefer upstreams that already have the model in memory, but not at the
+    # cost of queueing behind more than one extra request.
+    def score(url):
+        state = balancer.get_state(url)
+        return state.outstanding + (0 if model in state.loaded_models else 1)
+
+    return _pick_lowest(urls, score)
+
+
+STRATEGIES: dict[str, Callable[["LoadBalancer", list[str], str], str]] = {
+    "random": random_strategy,
+    "least_outstanding": least_outstanding_strategy,
+    "ewma": ewma_strategy,
+    "affinity": affinity_strategy,
+}
+
+
+class LoadBalancer:
+    """
+    Picks an upstream url per request and tracks each upstream's health.
+
+    Every request is bracketed by `begin` / `end` so the number of in-flight
+    requests per upstream is known; `observe` feeds the time until response
+    headers into an exponentially weighted moving average. Upstreams failing
+    `failure_threshold` times in a row are taken out of rotation for
+    `cooldown` seconds, after which a single success closes the circuit
+    again. If every candidate is open, all of them are tried anyway.
+    """
+
+    def __init__(
+        self,
+        strategy: str = "least_outstanding",
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        residency_ttl: float = 10.0,
+        decay: float = 0.3,
+    ):
+        if strategy not in STRATEGIES:
+            log.warning(
+                f"Unknown load balancing strategy {strategy}, using least_outstanding"
+            )
+            strategy = "least_outstanding"
+
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.residency_ttl = residency_ttl
+        self.decay = decay
+
+        self._states: dict[str, UpstreamState] = {}
+
+    def get_state(self, url: str) -> UpstreamState:
+        if url not in self._states:
+            self._states[url] = UpstreamState()
+        return self._states[url]
+
+    def is_available(self, url: str) -> bool:
+        return self.get_state(url).open_until <= time.monotonic()
+
+    def select(self, urls: list[str], model: str) -> str:
+        available = [url for url in urls if self.is_available(url)] or urls
+        if len(available) == 1:
+            return available[0]
+        return STRATEGIES[self.strategy](self, available, model)
+
+    def begin(self, url: str) -> float:
+        self.get_state(url).outstanding += 1
+        return time.monotonic()
+
+    def observe(self, url: str, started_at: float):
+        state = self.get_state(url)
+        latency = time.monotonic() - started_at
+        state.latency = (
+            latency
+            if state.latency is None
+            else self.decay * latency + (1 - self.decay) * state.latency
+        )
+
+    def end(self, url: str, success: bool = True):
+        state = self.get_state(url)
+        state.outstanding = max(state.outstanding - 1, 0)
+
+        if success:
+            state.failures = 0
+            state.open_until = 0.0
+        else:
+            state.failures += 1
+            if state.failures >= self.failure_threshold:
+                state.open_until = time.monotonic() + self.cooldown
+                log.warning(
+                    f"{url} failed {state.failures} times in a row, "
+                    f"removing it from rotation for {self.cooldown}s"
+                )
+
+    def needs_residency_refresh(self, url: str) -> bool:
+        """Return True (once per `residency_ttl`) when loaded models should be re-read."""
+        if self.strategy != "affinity":
+            return False
+
+        state = self.get_state(url)
+        now = time.monotonic()
+        if now - state.loaded_models_at < self.residency_ttl:
+            return False
+
+        state.loaded_models_at = now
+        return True
+
+    def set_loaded_models(self, url: str, models: list[str]):
+        self.get_state(url).loaded_models = set(models)
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "strategy": self.strategy,
+            "upstreams": {
+                url: {
+                    "outstanding": state.outstanding,
+                    "latency": state.latency,
+                    "failures": state.failures,
+                    "available": state.open_until <= now,
+                    "loaded_models": sorted(state.loaded_models),
+                }
+                for url, state in self._states.items()
+            },
+        }
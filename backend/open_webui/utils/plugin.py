@@ -1,19 +1,29 @@
+import asyncio
 import os
 import re
 import subprocess
 import sys
+import threading
 from importlib import util
+from typing import Literal
 import types
-import tempfile
 import logging
 
-from open_webui.env import SRC_LOG_LEVELS
-from open_webui.models.functions import Functions
+from open_webui.config import CACHE_DIR
+from open_webui.env import PLUGIN_SYNC_INTERVAL, SRC_LOG_LEVELS
+from open_webui.models.functions import Functions, get_content_hash
 from open_webui.models.tools import Tools
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
+PLUGIN_CACHE_DIR = CACHE_DIR / "plugins"
+PLUGIN_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+_requirements_lock = threading.Lock()
+# Hashes of the requirement lists installed by this process
+_installed_requirements: set[str] = set()
+
 
 def extract_frontmatter(content):
     """
@@ -68,6 +78,22 @@ def replace_imports(content):
     return content
 
 
+def exec_module(module, content):
+    """
+    Execute the content in the module's namespace. The source is kept in a
+    file per content hash, so `__file__` works as expected from the module's
+    perspective and tracebacks can show the plugin's source lines.
+    """
+    path = PLUGIN_CACHE_DIR / f"{get_content_hash(content)}.py"
+    if not path.exists():
+        temp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        temp_path.write_text(content, encoding="utf-8")
+        os.replace(temp_path, path)
+
+    module.__dict__["__file__"] = str(path)
+    exec(compile(content, str(path), "exec"), module.__dict__)
+
+
 def load_tools_module_by_id(toolkit_id, content=None):
 
     if content is None:
@@ -75,35 +101,26 @@ def load_tools_module_by_id(toolkit_id, content=None):
         if not tool:
             raise Exception(f"Toolkit not found: {toolkit_id}")
 
-        content = tool.content
+        content = replace_imports(tool.content)
+        if content != tool.content:
+            Tools.update_tool_by_id(toolkit_id, {"content": content})
 
-        content = replace_imports(content)
-        Tools.update_tool_by_id(toolkit_id, {"content": content})
-    else:
-        frontmatter = extract_frontmatter(content)
-        # Install required packages found within the frontmatter
-        install_frontmatter_requirements(frontmatter.get("requirements", ""))
+    frontmatter = extract_frontmatter(content)
+    # Install required packages found within the frontmatter
+    install_frontmatter_requirements(frontmatter.get("requirements", ""))
 
     module_name = f"tool_{toolkit_id}"
     module = types.ModuleType(module_name)
     sys.modules[module_name] = module
 
-    # Create a temporary file and use it to define `__file__` so
-    # that it works as expected from the module's perspective.
-    temp_file = tempfile.NamedTemporaryFile(delete=False)
-    temp_file.close()
     try:
-        with open(temp_file.name, "w", encoding="utf-8") as f:
-            f.write(content)
-        module.__dict__["__file__"] = temp_file.name
-
         # Executing the modified content in the created module's namespace
-        exec(content, module.__dict__)
-        frontmatter = extract_frontmatter(content)
+        exec_module(module, content)
         log.info(f"Loaded module: {module.__name__}")
 
         # Create and return the object if the class 'Tools' is found in the module
         if hasattr(module, "Tools"):
+            TOOLS.content_hashes[toolkit_id] = get_content_hash(content)
             return module.Tools(), frontmatter
         else:
             raise Exception("No Tools class found in the module")
@@ -111,70 +128,152 @@ def load_tools_module_by_id(toolkit_id, content=None):
         log.error(f"Error loading module: {toolkit_id}: {e}")
         del sys.modules[module_name]  # Clean up
         raise e
-    finally:
-        os.unlink(temp_file.name)
 
 
-def load_function_module_by_id(function_id, content=None):
+def load_function_module_by_id(function_id, content=None, deactivate_on_error=True):
     if content is None:
         function = Functions.get_function_by_id(function_id)
         if not function:
             raise Exception(f"Function not found: {function_id}")
-        content = function.content
 
-        content = replace_imports(content)
-        Functions.update_function_by_id(function_id, {"content": content})
-    else:
-        frontmatter = extract_frontmatter(content)
-        install_frontmatter_requirements(frontmatter.get("requirements", ""))
+        content = replace_imports(function.content)
+        if content != function.content:
+            Functions.update_function_by_id(function_id, {"content": content})
+
+    frontmatter = extract_frontmatter(content)
+    install_frontmatter_requirements(frontmatter.get("requirements", ""))
 
     module_name = f"function_{function_id}"
     module = types.ModuleType(module_name)
     sys.modules[module_name] = module
 
-    # Create a temporary file and use it to define `__file__` so
-    # that it works as expected from the module's perspective.
-    temp_file = tempfile.NamedTemporaryFile(delete=False)
-    temp_file.close()
     try:
-        with open(temp_file.name, "w", encoding="utf-8") as f:
-            f.write(content)
-        module.__dict__["__file__"] = temp_file.name
-
         # Execute the modified content in the created module's namespace
-        exec(content, module.__dict__)
-        frontmatter = extract_frontmatter(content)
+        exec_module(module, content)
         log.info(f"Loaded module: {module.__name__}")
 
         # Create appropriate object based on available class type in the module
         if hasattr(module, "Pipe"):
-            return module.Pipe(), "pipe", frontmatter
+            function_module, function_type = module.Pipe(), "pipe"
         elif hasattr(module, "Filter"):
-            return module.Filter(), "filter", frontmatter
+            function_module, function_type = module.Filter(), "filter"
         elif hasattr(module, "Action"):
-            return module.Action(), "action", frontmatter
+            function_module, function_type = module.Action(), "action"
         else:
             raise Exception("No Function class found in the module")
+
+        FUNCTIONS.content_hashes[function_id] = get_content_hash(content)
+        return function_module, function_type, frontmatter
     except Exception as e:
         log.error(f"Error loading module: {function_id}: {e}")
         del sys.modules[module_name]  # Cleanup by removing the module in case of error
 
-        Functions.update_function_by_id(function_id, {"is_active": False})
+        # Background reloads leave the function active, a failure there may
+        # be transient or specific to this process
+        if deactivate_on_error:
+            Functions.update_function_by_id(function_id, {"is_active": False})
         raise e
-    finally:
-        os.unlink(temp_file.name)
 
 
 def install_frontmatter_requirements(requirements):
     if requirements:
-        try:
-            req_list = [req.strip() for req in requirements.split(",")]
-            for req in req_list:
-                log.info(f"Installing requirement: {req}")
-                subprocess.check_call([sys.executable, "-m", "pip", "install", req])
-        except Exception as e:
-            log.error(f"Error installing package: {req}")
-            raise e
-
+        req_list = [req.strip() for req in requirements.split(",") if req.strip()]
+
+        # Installed requirements are remembered in memory rather than on the
+        # data volume, which outlives the environment the packages live in
+        requirements_hash = get_content_hash("\n".join(sorted(req_list)))
+        with _requirements_lock:
+            if requirements_hash in _installed_requirements:
+                log.debug(f"Requirements already installed: {req_list}")
+                return
+
+            try:
+                log.info(f"Installing requirements: {', '.join(req_list)}")
+                subprocess.check_call(
+                    [sys.executable, "-m", "pip", "install", *req_list]
+                )
+            except Exception as e:
+                log.error(f"Error installing packages: {', '.join(req_list)}")
+                raise e
+
+            _installed_requirements.add(requirements_hash)
     else:
         log.info("No requirements found in frontmatter.")
+
+
+class PluginRegistry(dict):
+    """
+    Loaded function or tool objects of this process, by id.
+
+    The hash of the content every object was loaded from is kept next to it.
+    `sync` compares them with the content hashes in the database, reloading
+    plugins that were changed and dropping ones that were deleted, so updates
+    made through any worker or replica reach every process. `preload` loads
+    active plugins ahead of their first use.
+    """
+
+    def __init__(self, kind: Literal["function", "tool"]):
+        super().__init__()
+        self.kind = kind
+        self.content_hashes: dict[str, str] = {}
+
+    def get_content_hashes(self, active_only: bool = False) -> dict[str, str]:
+        if self.kind == "function":
+            return Functions.get_function_content_hashes(active_only=active_only)
+        return Tools.get_tool_content_hashes()
+
+    def load(self, id: str, background: bool = False):
+        if self.kind == "function":
+            module, _, _ = load_function_module_by_id(
+                id, deactivate_on_error=not background
+            )
+        else:
+            module, _ = load_tools_module_by_id(id)
+
+        self[id] = module
+        return module
+
+    def sync(self):
+        content_hashes = self.get_content_hashes()
+        for id in list(self.keys()):
+            if id not in content_hashes:
+                log.info(f"Unloading deleted {self.kind}: {id}")
+                self.pop(id, None)
+            elif content_hashes[id] != self.content_hashes.get(id):
+                log.info(f"Reloading changed {self.kind}: {id}")
+                try:
+                    self.load(id, background=True)
+                except Exception:
+                    # Loaded again (and the error raised) on next use
+                    self.pop(id, None)
+
+    def preload(self):
+        for id in self.get_content_hashes(active_only=True):
+            if id not in self:
+                try:
+                    self.load(id, background=True)
+                except Exception:
+                    pass
+
+
+FUNCTIONS = PluginRegistry("function")
+TOOLS = PluginRegistry("tool")
+
+
+async def periodic_plugin_sync():
+    from open_webui.utils.filter import FILTERS
+
+    try:
+        await asyncio.to_thread(FUNCTIONS.preload)
+        await asyncio.to_thread(TOOLS.preload)
+    except Exception as e:
+        log.exception(f"Error preloading plugins: {e}")
+
+    while True:
+        await asyncio.sleep(PLUGIN_SYNC_INTERVAL)
+        try:
+            await asyncio.to_thread(FUNCTIONS.sync)
+            await asyncio.to_thread(TOOLS.sync)
+            await asyncio.to_thread(FILTERS.sync)
+        except Exception as e:
+            log.exception(f"Error syncing plugins: {e}")
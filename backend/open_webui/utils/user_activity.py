@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from open_webui.models.users import Users
+from open_webui.env import SRC_LOG_LEVELS, USER_LAST_ACTIVE_UPDATE_INTERVAL
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class LastActiveBuffer:
+    """
+    Write-behind buffer for users' last active timestamps.
+
+    Requests only record the time in memory; every `interval` seconds all
+    recorded timestamps are written with one bulk UPDATE through
+    `Users.update_users_last_active`.
+    """
+
+    def __init__(self, interval: float = 30.0):
+        self.interval = interval
+
+        self._pending: dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def update(self, user_id: str):
+        self._pending[user_id] = int(time.time())
+
+    async def flush(self):
+        pending, self._pending = self._pending, {}
+        if pending:
+            await asyncio.to_thread(Users.update_users_last_active, pending)
+
+    async def _periodic_flush(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                log.exception(f"Error updating last active timestamps: {e}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._periodic_flush())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+
+
+LastActive = LastActiveBuffer(interval=USER_LAST_ACTIVE_UPDATE_INTERVAL)
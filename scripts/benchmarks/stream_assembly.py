@@ -0,0 +1,109 @@
+"""
+Micro-benchmark for streamed message assembly.
+
+Replays recorded SSE streams (files of `data: {...}` lines as produced by the
+OpenAI-compatible chat completion endpoints) through `ContentBlockBuilder` and
+compares incremental serialization against re-serializing every content block
+on each delta.
+
+Usage:
+    PYTHONPATH=backend python scripts/benchmarks/stream_assembly.py [stream.sse ...]
+
+Without arguments a synthetic reasoning stream is generated.
+"""
+
+import argparse
+import json
+import time
+
+from open_webui.utils.content_blocks import (
+    ContentBlockBuilder,
+    serialize_content_blocks,
+)
+
+
+def load_deltas(path):
+    deltas = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line.startswith("data:"):
+                continue
+
+            data = line[len("data:") :].strip()
+            if data == "[DONE]":
+                break
+
+            try:
+                choices = json.loads(data).get("choices", [])
+            except json.JSONDecodeError:
+                continue
+
+            if choices:
+                delta = choices[0].get("delta", {})
+                deltas.append((delta.get("reasoning_content"), delta.get("content")))
+    return deltas
+
+
+def synthetic_deltas(tokens=4000):
+    words = "the model considers several options before settling on one".split()
+    deltas = [(None, "<think>")]
+    for i in range(tokens // 2):
+        token = words[i % len(words)]
+        deltas.append((None, f"{token}\n" if i % 12 == 11 else f"{token} "))
+    deltas.append((None, "</think>"))
+    for i in range(tokens // 2):
+        deltas.append((None, f"{words[i % len(words)]} "))
+    return deltas
+
+
+def replay(deltas, incremental=True):
+    builder = ContentBlockBuilder(detect_code_interpreter=True)
+
+    start = time.perf_counter()
+    for reasoning_content, value in deltas:
+        if reasoning_content:
+            builder.append_reasoning(reasoning_content)
+        if value:
+            builder.append_content(value)
+
+        if incremental:
+            content = builder.serialize()
+        else:
+            content = serialize_content_blocks(builder.blocks)
+    builder.finalize()
+    elapsed = time.perf_counter() - start
+
+    return elapsed, content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("streams", nargs="*", help="recorded SSE stream files")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    streams = (
+        [(path, load_deltas(path)) for path in args.streams]
+        if args.streams
+        else [("synthetic", synthetic_deltas())]
+    )
+
+    for name, deltas in streams:
+        full = min(replay(deltas, incremental=False)[0] for _ in range(args.repeat))
+        incremental = min(
+            replay(deltas, incremental=True)[0] for _ in range(args.repeat)
+        )
+
+        assert replay(deltas, False)[1] == replay(deltas, True)[1]
+
+        print(
+            f"{name}: {len(deltas)} deltas | "
+            f"full re-serialization {full * 1000:.1f} ms | "
+            f"incremental {incremental * 1000:.1f} ms | "
+            f"speedup {full / incremental if incremental else float('inf'):.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()